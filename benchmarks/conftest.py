@@ -0,0 +1,148 @@
+# benchmarks/conftest.py
+"""
+Suite de benchmarks (pytest + factory_boy). Se salta salvo con LAVA2_BENCHMARKS=1:
+
+    LAVA2_BENCHMARKS=1 DJANGO_SETTINGS_MODULE=config.settings.development \\
+        pytest benchmarks --reuse-db -q
+
+Variables de entorno:
+- BENCHMARK_SCALE (0.01): fracción de los volúmenes de seed.py (1 = 5M reservas).
+- BENCHMARK_SEED (42): semilla de factory_boy/Faker (datos reproducibles).
+- BENCHMARK_ROUNDS (15): repeticiones medidas por vista (más 2 de calentamiento).
+- BENCHMARK_OUTPUT (benchmarks/results/latest.json): resultados de la corrida.
+- BENCHMARK_BASELINE (benchmarks/baseline.json): si existe, una vista cuyo p50 empeora más
+  de BENCHMARK_TOLERANCE (0.25 = 25 %) y más de BENCHMARK_MIN_DELTA_MS (2 ms) falla.
+- BENCHMARK_UPDATE_BASELINE=1: guarda esta corrida como la nueva línea base.
+
+Con --reuse-db la BD sembrada se conserva entre corridas (sembrar 5M filas lleva rato).
+"""
+
+import json
+import os
+import platform
+import statistics
+import time
+from pathlib import Path
+
+import django
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+BENCH_DIR = Path(__file__).resolve().parent
+ENABLED = os.environ.get("LAVA2_BENCHMARKS") == "1"
+SCALE = float(os.environ.get("BENCHMARK_SCALE", "0.01"))
+SEED = int(os.environ.get("BENCHMARK_SEED", "42"))
+ROUNDS = int(os.environ.get("BENCHMARK_ROUNDS", "15"))
+WARMUP = 2
+OUTPUT = Path(os.environ.get("BENCHMARK_OUTPUT", BENCH_DIR / "results" / "latest.json"))
+BASELINE = Path(os.environ.get("BENCHMARK_BASELINE", BENCH_DIR / "baseline.json"))
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", "0.25"))
+MIN_DELTA_MS = float(os.environ.get("BENCHMARK_MIN_DELTA_MS", "2"))
+UPDATE_BASELINE = os.environ.get("BENCHMARK_UPDATE_BASELINE") == "1"
+
+
+def pytest_collection_modifyitems(config, items):
+    if ENABLED:
+        return
+    skip = pytest.mark.skip(reason="Benchmarks desactivados (LAVA2_BENCHMARKS=1 para correrlos)")
+    for item in items:
+        if BENCH_DIR in Path(item.path).parents:
+            item.add_marker(skip)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+class BenchmarkRecorder:
+    def __init__(self, baseline: dict):
+        self.baseline = baseline
+        self.results = {}
+
+    def measure(self, name: str, func, rounds: int = ROUNDS) -> dict:
+        """
+        Ejecuta `func(i)` WARMUP + `rounds` veces y registra latencias y nº de queries.
+        Falla el test si el p50 empeora respecto a la línea base.
+        """
+        for i in range(WARMUP - 1):
+            func(i)
+        # execute_wrapper y no CaptureQueriesContext: request_started vacía queries_log
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            func(WARMUP - 1)
+
+        timings = []
+        for i in range(WARMUP, WARMUP + rounds):
+            started = time.perf_counter()
+            func(i)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        result = {
+            "rounds": rounds,
+            "queries": len(queries),
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(_percentile(timings, 95), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "min_ms": round(min(timings), 3),
+        }
+        self.results[name] = result
+
+        base = self.baseline.get(name)
+        if base and not UPDATE_BASELINE:
+            limit = base["p50_ms"] * (1 + TOLERANCE)
+            delta = result["p50_ms"] - base["p50_ms"]
+            if result["p50_ms"] > limit and delta > MIN_DELTA_MS:
+                pytest.fail(
+                    f"Regresión en {name}: p50 {result['p50_ms']} ms vs {base['p50_ms']} ms "
+                    f"de la línea base (+{delta:.1f} ms, tolerancia {TOLERANCE:.0%})"
+                )
+        return result
+
+    def write(self, counts: dict):
+        payload = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "scale": SCALE,
+                "seed": SEED,
+                "counts": counts,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "results": dict(sorted(self.results.items())),
+        }
+        OUTPUT.parent.mkdir(parents=True, exist_ok=True)
+        OUTPUT.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        if UPDATE_BASELINE:
+            baseline = {**self.baseline, **self.results}
+            BASELINE.write_text(json.dumps(dict(sorted(baseline.items())), indent=2))
+
+
+@pytest.fixture(scope="session")
+def seeded_counts(django_db_setup, django_db_blocker):
+    from .seed import seed
+
+    with django_db_blocker.unblock():
+        return seed(SCALE, seed_value=SEED)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(settings):
+    # Se mide la vista, no el limitador: con ROUNDS escrituras seguidas saltarían los 429
+    settings.RATE_LIMITS = {}
+
+
+@pytest.fixture(scope="session")
+def bench(seeded_counts):
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    recorder = BenchmarkRecorder(baseline)
+    yield recorder
+    if recorder.results:
+        recorder.write(seeded_counts)
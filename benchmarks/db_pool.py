@@ -0,0 +1,122 @@
+# benchmarks/db_pool.py
+"""
+Latencia por request con y sin pool de conexiones PostgreSQL.
+
+Cada modo corre en su propio proceso (el pool se crea una vez por proceso) y lanza
+`--requests` peticiones a una vista que toca la BD (por defecto /ready/) desde `--threads`
+hilos, como un worker gthread de gunicorn. Sin pool, Django abre y cierra una conexión por
+request (CONN_MAX_AGE=0); con pool, las toma prestadas de psycopg_pool.
+
+Uso (necesita PostgreSQL con las variables DB_* de siempre):
+    python benchmarks/db_pool.py --requests 500 --threads 4
+    python benchmarks/db_pool.py --path /services/ --json resultados.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("sin_pool", "pool")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def run_mode(mode: str, requests: int, threads: int, path: str, warmup: int) -> dict:
+    """Corre dentro del proceso hijo: configura la BD según el modo y mide."""
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+
+    from django.conf import settings
+
+    database = settings.DATABASES["default"]
+    database["CONN_MAX_AGE"] = 0
+    if mode == "pool":
+        from config.db import pool_options
+
+        database.setdefault("OPTIONS", {})["pool"] = pool_options(max_size=threads)
+    settings.ALLOWED_HOSTS = ["*"]
+
+    import django
+
+    django.setup()
+
+    from django.test import Client
+
+    def one(_):
+        client = Client()
+        started = time.perf_counter()
+        response = client.get(path)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise RuntimeError(f"{path} respondió {response.status_code}")
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(warmup)))
+        started = time.perf_counter()
+        latencies = list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "threads": threads,
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "throughput_rps": round(requests / wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--path", default="/ready/")
+    parser.add_argument("--json", default="", help="Guarda los resultados en este archivo.")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:  # proceso hijo
+        result = run_mode(args.mode, args.requests, args.threads, args.path, args.warmup)
+        print(json.dumps(result))
+        return
+
+    results = []
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, *sys.argv[1:]],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{'modo':<10} {'media':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8}")
+    for r in results:
+        print(
+            f"{r['mode']:<10} {r['mean_ms']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+            f"{r['p99_ms']:>8} {r['throughput_rps']:>8}"
+        )
+    base, pooled = results
+    print(f"p50 con pool: {pooled['p50_ms'] / base['p50_ms']:.2f}x respecto a sin pool")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
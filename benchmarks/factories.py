@@ -0,0 +1,105 @@
+# benchmarks/factories.py
+"""
+Factories (factory_boy) para los datos del benchmark.
+
+Se usan con `build_batch` + `bulk_create` (ver seed.py): los objetos se construyen en memoria
+y se insertan por lotes, sin señales ni un INSERT por fila. Las FKs se pasan explícitas.
+"""
+
+from decimal import Decimal
+
+import factory
+from django.contrib.auth.hashers import make_password
+
+from bookings.models import Booking, BookingStatus
+from notifications.models import Notification, NotificationChannel, NotificationStatus
+from payments.models import Payment, PaymentStatus
+from services.models import Service
+from users.models import Profile, User
+from vehicles.models import Vehicle
+
+# Un único hash para todos: hashear 100k contraseñas con Argon2 tardaría horas
+PASSWORD = "bench-password"
+PASSWORD_HASH = make_password(PASSWORD)
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = User
+
+    email = factory.Sequence(lambda n: f"user{n}@bench.lava2.test")
+    first_name = factory.Faker("first_name", locale="es_CO")
+    last_name = factory.Faker("last_name", locale="es_CO")
+    password = PASSWORD_HASH
+    is_active = True
+
+
+class ProfileFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Profile
+
+    full_name = factory.LazyAttribute(lambda p: f"{p.user.first_name} {p.user.last_name}")
+    phone = factory.Sequence(lambda n: f"+57 3{n % 10**9:09d}")
+    wants_sms = factory.Faker("boolean", chance_of_getting_true=30)
+    wants_push = factory.Faker("boolean", chance_of_getting_true=50)
+
+
+class ServiceFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Service
+
+    name = factory.Sequence(lambda n: f"Servicio {n:03d}")
+    description = factory.Faker("sentence", nb_words=12, locale="es_ES")
+    price = factory.Sequence(lambda n: Decimal(15000 + (n % 20) * 5000))
+    duration_minutes = factory.Iterator([30, 45, 60, 90, 120])
+    is_active = factory.Sequence(lambda n: n % 10 != 0)
+
+
+class VehicleFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Vehicle
+
+    plate = factory.Sequence(lambda n: f"B{n:07d}")
+    make = factory.Iterator(["Chevrolet", "Renault", "Mazda", "Kia", "Toyota", "Nissan"])
+    model = factory.Iterator(["Spark", "Logan", "3", "Picanto", "Corolla", "Versa", "Sail"])
+    year = factory.Sequence(lambda n: 2005 + n % 20)
+    color = factory.Iterator(["Blanco", "Negro", "Gris", "Rojo", "Azul", ""])
+    is_active = factory.Sequence(lambda n: n % 20 != 0)
+
+
+class BookingFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Booking
+
+    status = BookingStatus.PENDING
+    notes = ""
+
+
+class NotificationFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Notification
+
+    channel = factory.Iterator(NotificationChannel.values)
+    # Iterators en vez de Faker: millones de filas, el texto da igual
+    subject = factory.Iterator(["Recordatorio de reserva", "Pago recibido", "Reserva confirmada"])
+    message = factory.Iterator(
+        [
+            "Tu reserva es mañana a las 10:00. Te esperamos.",
+            "Recibimos tu pago. ¡Gracias por usar LAVA2!",
+            "Tu reserva quedó confirmada.",
+        ]
+    )
+    status = factory.Iterator(
+        [NotificationStatus.SENT] * 8 + [NotificationStatus.FAILED, NotificationStatus.QUEUED]
+    )
+
+
+class PaymentFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Payment
+
+    currency = "COP"
+    provider = "fake"
+    status = factory.Iterator(
+        [PaymentStatus.PAID] * 7 + [PaymentStatus.PENDING] * 2 + [PaymentStatus.FAILED]
+    )
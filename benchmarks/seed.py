@@ -0,0 +1,140 @@
+# benchmarks/seed.py
+"""
+Siembra de volúmenes realistas para el benchmark.
+
+Con BENCHMARK_SCALE=1: 100k usuarios, 300k vehículos, 5M reservas y 2M notificaciones
+(más 40 servicios y un pago por cada 5 reservas). Por defecto se usa una fracción.
+
+Las reservas de cada vehículo van separadas una semana (y desfasadas por hora entre
+vehículos): nunca se solapan ni violan (vehicle, scheduled_at). La mitad queda en el
+pasado (COMPLETED/CANCELLED) y la mitad en el futuro (PENDING/CONFIRMED).
+"""
+
+import logging
+import math
+from datetime import timedelta
+
+import factory.random
+from django.utils import timezone
+
+from bookings.models import Booking, BookingStatus
+from notifications.models import Notification
+from payments.models import Payment
+from services.models import Service
+from users.models import Profile, User
+from vehicles.models import Vehicle
+
+from .factories import (
+    PASSWORD_HASH,
+    BookingFactory,
+    NotificationFactory,
+    PaymentFactory,
+    ProfileFactory,
+    ServiceFactory,
+    UserFactory,
+    VehicleFactory,
+)
+
+logger = logging.getLogger(__name__)
+
+BASE_COUNTS = {
+    "users": 100_000,
+    "vehicles": 300_000,
+    "bookings": 5_000_000,
+    "notifications": 2_000_000,
+}
+SERVICES = 40
+PAYMENT_EVERY = 5
+ADMIN_EMAIL = "admin@bench.lava2.test"
+EMAIL_DOMAIN = "@bench.lava2.test"
+
+
+def counts_for(scale: float) -> dict:
+    return {name: max(10, int(n * scale)) for name, n in BASE_COUNTS.items()}
+
+
+def _chunks(total: int, size: int):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def is_seeded(counts: dict) -> bool:
+    """Con --reuse-db la BD de test sobrevive entre corridas: no volver a sembrar."""
+    return User.objects.filter(email__endswith=EMAIL_DOMAIN).count() >= counts["users"]
+
+
+def seed(scale: float, seed_value: int = 42, chunk_size: int = 5000) -> dict:
+    counts = counts_for(scale)
+    if is_seeded(counts):
+        return counts
+    factory.random.reseed_random(seed_value)
+
+    User.objects.create_superuser(email=ADMIN_EMAIL, password="x")
+    User.objects.filter(email=ADMIN_EMAIL).update(password=PASSWORD_HASH)
+
+    services = Service.objects.bulk_create(ServiceFactory.build_batch(SERVICES))
+    active_services = [s for s in services if s.is_active]
+    prices = {s.pk: s.price for s in services}
+
+    for _, size in _chunks(counts["users"], chunk_size):
+        users = User.objects.bulk_create(UserFactory.build_batch(size))
+        Profile.objects.bulk_create([ProfileFactory.build(user=u) for u in users])
+    user_ids = list(
+        User.objects.filter(email__endswith=EMAIL_DOMAIN)
+        .exclude(email=ADMIN_EMAIL)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    logger.info("Usuarios: %s", len(user_ids))
+
+    # Vehículo i → usuario i % n (3 vehículos por usuario con la escala por defecto)
+    for start, size in _chunks(counts["vehicles"], chunk_size):
+        Vehicle.objects.bulk_create(
+            [
+                VehicleFactory.build(owner_id=user_ids[(start + i) % len(user_ids)])
+                for i in range(size)
+            ]
+        )
+    vehicles = list(Vehicle.objects.order_by("pk").values_list("pk", "owner_id"))
+    logger.info("Vehículos: %s", len(vehicles))
+
+    rounds = math.ceil(counts["bookings"] / len(vehicles))
+    now = timezone.now()
+    base = (now - timedelta(weeks=rounds // 2)).replace(hour=8, minute=0, second=0, microsecond=0)
+    for start, size in _chunks(counts["bookings"], chunk_size):
+        batch = []
+        for j in range(start, start + size):
+            k, index = divmod(j, len(vehicles))
+            vehicle_id, owner_id = vehicles[index]
+            scheduled_at = base + timedelta(weeks=k, hours=index % 10)
+            if scheduled_at < now:
+                status = BookingStatus.CANCELLED if j % 10 == 0 else BookingStatus.COMPLETED
+            else:
+                status = BookingStatus.CONFIRMED if j % 3 == 0 else BookingStatus.PENDING
+            batch.append(
+                BookingFactory.build(
+                    user_id=owner_id,
+                    vehicle_id=vehicle_id,
+                    service_id=active_services[j % len(active_services)].pk,
+                    scheduled_at=scheduled_at,
+                    status=status,
+                )
+            )
+        bookings = Booking.objects.bulk_create(batch)
+        Payment.objects.bulk_create(
+            [
+                PaymentFactory.build(booking_id=b.pk, amount=prices[b.service_id])
+                for b in bookings[::PAYMENT_EVERY]
+            ]
+        )
+    logger.info("Reservas: %s", counts["bookings"])
+
+    for start, size in _chunks(counts["notifications"], chunk_size):
+        Notification.objects.bulk_create(
+            [
+                NotificationFactory.build(user_id=user_ids[(start + i) % len(user_ids)])
+                for i in range(size)
+            ]
+        )
+    logger.info("Notificaciones: %s", counts["notifications"])
+    return counts
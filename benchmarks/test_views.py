@@ -0,0 +1,155 @@
+# benchmarks/test_views.py
+"""Tiempos de las vistas calientes y de los changelists del admin sobre la BD sembrada."""
+
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Booking, BookingStatus
+from services.models import Service
+from users.models import User
+from vehicles.models import Vehicle
+
+from .seed import ADMIN_EMAIL
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def vehicle(seeded_counts):
+    """Primer vehículo activo con reservas futuras activas: su dueño es el usuario medido."""
+    return (
+        Vehicle.objects.filter(
+            is_active=True,
+            bookings__status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
+            bookings__scheduled_at__gte=timezone.now() + timedelta(days=2),
+        )
+        .select_related("owner")
+        .order_by("pk")
+        .first()
+    )
+
+
+@pytest.fixture
+def client(vehicle):
+    client = Client()
+    client.force_login(vehicle.owner)
+    return client
+
+
+@pytest.fixture
+def admin_client(seeded_counts):
+    client = Client()
+    client.force_login(User.objects.get(email=ADMIN_EMAIL))
+    return client
+
+
+@pytest.fixture
+def service(seeded_counts):
+    return Service.objects.filter(is_active=True).order_by("pk").first()
+
+
+def _far_slot(i: int) -> str:
+    # Huecos libres: lejos de las reservas sembradas y distintos en cada ronda
+    slot = timezone.localtime() + timedelta(days=3 * 365, hours=3 * i)
+    return slot.strftime("%Y-%m-%dT%H:%M")
+
+
+def test_service_catalog(bench):
+    client = Client()
+    url = reverse("services:public_list")
+
+    def run(i):
+        assert client.get(url).status_code == 200
+
+    bench.measure("services:public_list", run)
+
+
+def test_booking_list(bench, client):
+    url = reverse("bookings:list")
+
+    def run(i):
+        assert client.get(url).status_code == 200
+
+    bench.measure("bookings:list", run)
+
+
+def test_booking_list_api(bench, client):
+    url = reverse("api_v1:booking-list")
+
+    def run(i):
+        assert (
+            client.get(url, {"fields": "id,scheduled_at,status,vehicle_plate"}).status_code == 200
+        )
+
+    bench.measure("api_v1:booking-list", run)
+
+
+def test_booking_availability(bench, client, vehicle, service):
+    url = reverse("bookings:availability")
+    day = (timezone.localdate() + timedelta(days=7)).isoformat()
+
+    def run(i):
+        response = client.get(url, {"vehicle": vehicle.pk, "service": service.pk, "date": day})
+        assert response.status_code == 200
+
+    bench.measure("bookings:availability", run)
+
+
+def test_booking_create(bench, client, vehicle, service):
+    url = reverse("bookings:create")
+
+    def run(i):
+        data = {"vehicle": vehicle.pk, "service": service.pk, "scheduled_at": _far_slot(i)}
+        assert client.post(url, data).status_code == 302
+
+    bench.measure("bookings:create", run)
+
+
+def test_booking_update(bench, client, vehicle, service):
+    booking = (
+        Booking.objects.filter(
+            vehicle=vehicle,
+            status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
+            scheduled_at__gte=timezone.now() + timedelta(days=2),
+        )
+        .order_by("scheduled_at")
+        .first()
+    )
+    url = reverse("bookings:edit", args=[booking.pk])
+
+    def run(i):
+        data = {"vehicle": vehicle.pk, "service": service.pk, "scheduled_at": _far_slot(i)}
+        assert client.post(url, data).status_code == 302
+
+    bench.measure("bookings:edit", run)
+
+
+def test_vehicle_delete_check(bench, client, vehicle):
+    # El vehículo tiene reservas futuras: se mide el chequeo que bloquea el borrado
+    url = reverse("vehicles:delete", args=[vehicle.pk])
+
+    def run(i):
+        assert client.post(url).status_code == 200
+
+    bench.measure("vehicles:delete", run)
+
+
+@pytest.mark.parametrize(
+    "changelist",
+    [
+        "admin:services_service_changelist",
+        "admin:payments_payment_changelist",
+        "admin:payments_revenuerollup_changelist",
+    ],
+)
+def test_admin_changelist(bench, admin_client, changelist):
+    url = reverse(changelist)
+
+    def run(i):
+        assert admin_client.get(url).status_code == 200
+
+    bench.measure(changelist, run)
@@ -1,3 +1,23 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import BookingEvent
+
+
+@admin.register(BookingEvent)
+class BookingEventAdmin(admin.ModelAdmin):
+    """Historial de reservas: solo lectura (lo escribe bookings/audit.py)."""
+
+    # booking_id, sin JOIN: los eventos de reservas ya borradas también se listan
+    list_display = ("created_at", "booking_id", "kind", "actor")
+    list_filter = ("kind",)
+    search_fields = ("=booking__id",)
+    date_hierarchy = "created_at"
+    list_select_related = ("actor",)
+    raw_id_fields = ("booking", "actor")
+    readonly_fields = [f.name for f in BookingEvent._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,78 @@
+# bookings/api.py
+import django_filters
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from config.api import Conflict, ProjectedQuerysetMixin
+
+from .models import Booking
+from .serializers import BookingSerializer
+from .services import BookingConflict, BookingError, cancel_booking, create_booking, update_booking
+
+
+class BookingFilter(django_filters.FilterSet):
+    # Rango sobre el índice (user, scheduled_at)
+    scheduled_after = django_filters.IsoDateTimeFilter(field_name="scheduled_at", lookup_expr="gte")
+    scheduled_before = django_filters.IsoDateTimeFilter(field_name="scheduled_at", lookup_expr="lt")
+
+    class Meta:
+        model = Booking
+        fields = ["status", "vehicle", "scheduled_after", "scheduled_before"]
+
+
+class BookingViewSet(
+    ProjectedQuerysetMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    """
+    Reservas del usuario autenticado. Crear/modificar/cancelar pasa por bookings.services,
+    igual que las vistas HTML (bloqueo del vehículo + chequeo de solapamientos atómico).
+    """
+
+    queryset = Booking.objects.select_related("vehicle", "service")
+    serializer_class = BookingSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = BookingFilter
+    ordering_fields = ["scheduled_at"]
+    ordering = ("-scheduled_at", "-id")
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+    def _run(self, func, *args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except BookingConflict as exc:
+            raise Conflict(str(exc)) from exc
+        except BookingError as exc:
+            raise ValidationError({"detail": str(exc)}) from exc
+
+    def perform_create(self, serializer):
+        serializer.instance = self._run(
+            create_booking, user=self.request.user, **serializer.validated_data
+        )
+
+    def perform_update(self, serializer):
+        booking, data = serializer.instance, serializer.validated_data
+        serializer.instance = self._run(
+            update_booking,
+            booking,
+            vehicle=data.get("vehicle", booking.vehicle),
+            service=data.get("service", booking.service),
+            scheduled_at=data.get("scheduled_at", booking.scheduled_at),
+            notes=data.get("notes"),
+            actor=self.request.user,
+        )
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        booking = self._run(cancel_booking, self.get_object(), actor=request.user)
+        return Response(self.get_serializer(booking).data, status=status.HTTP_200_OK)
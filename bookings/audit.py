@@ -0,0 +1,200 @@
+# bookings/audit.py
+"""
+Historial de reservas con escritura diferida (write-behind).
+
+bookings/services.py llama a `record()` dentro de su transacción. El evento se arma en
+memoria y, solo si la transacción confirma (`on_commit`), pasa al búfer del proceso; un
+rollback lo descarta. Un hilo por proceso vacía el búfer con `bulk_create` cada
+BOOKING_AUDIT_FLUSH_INTERVAL segundos (o antes si junta BOOKING_AUDIT_BATCH_SIZE): la
+petición no paga ningún INSERT extra.
+
+- `created_at` es el momento del cambio, no el de la escritura.
+- Si el INSERT falla por la BD (caída, timeout), los eventos vuelven al búfer y se
+  reintentan; por encima de BOOKING_AUDIT_BUFFER_MAX se descartan los más viejos (con
+  warning). La reserva no tiene FK en la BD (el historial sobrevive a su borrado); si falla
+  por los datos (IntegrityError: p. ej. el actor se borró antes del volcado), el actor
+  ausente queda en NULL y, si aun así falla, se descartan solo las filas inválidas.
+- Un proceso que muere de golpe pierde lo que tenía en el búfer (como mucho un intervalo);
+  al salir de forma ordenada se vacía (atexit).
+- Con BOOKING_AUDIT_FLUSH_INTERVAL = 0 se escribe en el propio on_commit (tests, shell).
+"""
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Model
+from django.utils import timezone
+
+from users.models import User
+
+from .models import BookingEvent, BookingEventKind
+
+logger = logging.getLogger(__name__)
+
+# Campos que se comparan en una modificación
+TRACKED_FIELDS = ("vehicle_id", "service_id", "scheduled_at", "status", "notes")
+
+
+def _json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Model):
+        return value.pk
+    return value
+
+
+def snapshot(booking) -> dict:
+    return {field: getattr(booking, field) for field in TRACKED_FIELDS}
+
+
+def diff(before: dict, after: dict) -> dict:
+    """{"campo": [antes, después]} solo con lo que cambió (claves sin el sufijo _id)."""
+    return {
+        field.removesuffix("_id"): [_json(before[field]), _json(after[field])]
+        for field in TRACKED_FIELDS
+        if before.get(field) != after.get(field)
+    }
+
+
+class _Buffer:
+    def __init__(self):
+        self.events = []
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, event: BookingEvent):
+        with self._lock:
+            self.events.append(event)
+            overflow = len(self.events) - settings.BOOKING_AUDIT_BUFFER_MAX
+            if overflow > 0:
+                del self.events[:overflow]
+                logger.warning("Búfer de auditoría lleno: se descartan %s eventos", overflow)
+            full = len(self.events) >= settings.BOOKING_AUDIT_BATCH_SIZE
+        if full:
+            self._wake.set()
+
+    def take(self) -> list:
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    def put_back(self, events: list):
+        with self._lock:
+            self.events[:0] = events
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="booking-audit", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.BOOKING_AUDIT_FLUSH_INTERVAL)
+            self._wake.clear()
+            flush(self)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def _get_buffer() -> _Buffer:
+    # Por pid: con preload_app el hilo del master no existe en los workers
+    global _buffer
+    if _buffer is None or _buffer.pid != os.getpid():
+        with _buffer_lock:
+            if _buffer is None or _buffer.pid != os.getpid():
+                _buffer = _Buffer()
+    return _buffer
+
+
+def flush(buffer: _Buffer = None) -> int:
+    """Escribe lo pendiente con bulk_create. Devuelve cuántos eventos guardó."""
+    buffer = buffer or _get_buffer()
+    events = buffer.take()
+    if not events:
+        return 0
+    try:
+        try:
+            BookingEvent.objects.bulk_create(events, batch_size=settings.BOOKING_AUDIT_BATCH_SIZE)
+        except IntegrityError:
+            # Un evento malo no debe bloquear el lote (ni los siguientes): se reintenta sin él
+            return _save_valid(events)
+    except Exception:
+        logger.exception("No se pudieron guardar %s eventos de reserva; se reintenta", len(events))
+        buffer.put_back(events)
+        return 0
+    finally:
+        if threading.current_thread() is buffer._thread:
+            # Conexiones por hilo: la de este hilo no la cierra ningún request_finished
+            for conn in connections.all(initialized_only=True):
+                conn.close()
+    return len(events)
+
+
+def _save_valid(events: list) -> int:
+    """Reintento tras un IntegrityError: actores borrados a NULL; si aun así falla, uno a uno."""
+    # Contra la BD en la que se escribe: una réplica con retraso no vería actores recién creados
+    db = router.db_for_write(BookingEvent)
+    actor_ids = {e.actor_id for e in events if e.actor_id is not None}
+    existing = set(User.objects.using(db).filter(pk__in=actor_ids).values_list("pk", flat=True))
+    for event in events:
+        if event.actor_id not in existing:
+            event.actor_id = None  # lo que habría hecho SET_NULL si ya estuviera guardado
+    try:
+        BookingEvent.objects.using(db).bulk_create(
+            events, batch_size=settings.BOOKING_AUDIT_BATCH_SIZE
+        )
+        saved = len(events)
+    except IntegrityError:
+        saved = 0
+        for event in events:
+            try:
+                with transaction.atomic(using=db):
+                    event.save(using=db, force_insert=True)
+                saved += 1
+            except IntegrityError:
+                logger.warning("Evento %s de la reserva #%s inválido", event.kind, event.booking_id)
+    if saved < len(events):
+        logger.warning("Se descartaron %s eventos de reserva inválidos", len(events) - saved)
+    return saved
+
+
+def _enqueue(event: BookingEvent):
+    buffer = _get_buffer()
+    buffer.add(event)
+    if settings.BOOKING_AUDIT_FLUSH_INTERVAL:
+        buffer.start()
+    else:
+        flush(buffer)
+
+
+def record(booking, kind: str, actor=None, changes=None):
+    """Registra un evento; se escribe solo si la transacción en curso confirma."""
+    event = BookingEvent(
+        booking_id=booking.pk,
+        actor_id=getattr(actor, "pk", None),
+        kind=kind,
+        changes=changes or {},
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(partial(_enqueue, event))
+
+
+def created(booking, actor=None):
+    initial = diff(dict.fromkeys(TRACKED_FIELDS), snapshot(booking))
+    record(booking, BookingEventKind.CREATED, actor, initial)
+
+
+@atexit.register
+def _flush_at_exit():
+    if _buffer is not None and _buffer.pid == os.getpid() and _buffer.events:
+        flush(_buffer)
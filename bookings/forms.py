@@ -33,3 +33,9 @@ class BookingCreateForm(forms.ModelForm):
 
 class BookingUpdateForm(BookingCreateForm):
     pass
+
+
+class AvailabilityForm(forms.Form):
+    vehicle = forms.IntegerField(min_value=1)
+    service = forms.IntegerField(min_value=1)
+    date = forms.DateField()
@@ -0,0 +1,42 @@
+# bookings/management/commands/seed_data.py
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bookings.seeding import Seeder, counts_for
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra usuarios, perfiles, vehículos y reservas con COPY (solo PostgreSQL). "
+        "--scale 1 = 10M filas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=0.01)
+        parser.add_argument("--seed", type=int, default=42, help="Semilla (datos reproducibles).")
+        parser.add_argument(
+            "--anchor",
+            type=date.fromisoformat,
+            default=None,
+            help="Fecha de referencia (YYYY-MM-DD) para las reservas; por defecto hoy.",
+        )
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("seed_data usa COPY: requiere PostgreSQL.")
+
+        counts = counts_for(opts["scale"])
+        self.stdout.write(f"Sembrando {counts} (semilla {opts['seed']})...")
+        started = time.monotonic()
+        seeder = Seeder(
+            scale=opts["scale"], seed=opts["seed"], anchor=opts["anchor"], log=self.stdout.write
+        )
+        try:
+            loaded = seeder.run()
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        total = sum(loaded.values())
+        self.stdout.write(self.style.SUCCESS(f"{total} filas en {time.monotonic() - started:.1f}s"))
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("CREATED", "Creada"),
+                            ("UPDATED", "Modificada"),
+                            ("CANCELLED", "Cancelada"),
+                        ],
+                        max_length=12,
+                    ),
+                ),
+                ("changes", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="events",
+                        to="bookings.booking",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Evento de reserva",
+                "verbose_name_plural": "Eventos de reserva",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["booking", "created_at"],
+                        name="bookings_bo_booking_d5ff0d_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0003_bookingevent"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="bookingevent",
+            name="booking",
+            field=models.ForeignKey(
+                db_constraint=False,
+                db_index=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="events",
+                to="bookings.booking",
+            ),
+        ),
+    ]
@@ -7,6 +7,8 @@ from services.models import Service
 from users.models import User
 from vehicles.models import Vehicle
 
+from .utils import MAX_SLOT_WINDOW, overlaps, slot_range
+
 
 class BookingStatus(models.TextChoices):
     PENDING = "PENDING", "Pendiente"
@@ -55,21 +57,26 @@ class Booking(TimeStampedModel):
         if self.scheduled_at < timezone.now():
             raise ValidationError("No puedes reservar en el pasado.")
 
-        # Verificación simple de solapamiento por vehículo (mismo timeslot exacto
-        # lo cubre la UniqueConstraint; aquí miramos rango por duración).
-        duration = timezone.timedelta(minutes=self.service.duration_minutes or 0)
-        start = self.scheduled_at
-        end = start + duration
-
-        overlapping = Booking.objects.filter(
-            vehicle=self.vehicle,
-            scheduled_at__lt=end,
-            # Suponiendo que el otro booking dura su propio `service.duration_minutes`:
-        ).exclude(pk=self.pk)
-
-        # Esta comprobación es básica; en Paso 6 haremos chequeo atómico.
-        if overlapping.exists():
-            raise ValidationError("El vehículo ya tiene una reserva que se solapa con ese horario.")
+        # Verificación previa de solapamiento por vehículo (mismo timeslot exacto lo cubre
+        # la UniqueConstraint). Solo reservas activas que empiezan antes de que acabe esta y
+        # como mucho MAX_SLOT_WINDOW antes; el chequeo atómico definitivo está en
+        # bookings.services.
+        start, end = slot_range(self.scheduled_at, self.service.duration_minutes or 0)
+        candidates = (
+            Booking.objects.filter(
+                vehicle_id=self.vehicle_id,
+                status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
+                scheduled_at__gte=start - MAX_SLOT_WINDOW,
+                scheduled_at__lt=end,
+            )
+            .exclude(pk=self.pk)
+            .select_related("service")
+        )
+        for b in candidates:
+            if overlaps(start, end, *slot_range(b.scheduled_at, b.service.duration_minutes)):
+                raise ValidationError(
+                    "El vehículo ya tiene una reserva que se solapa con ese horario."
+                )
 
     def can_modify(self) -> bool:
         """Regla: se puede modificar con >= 24h de antelación."""
@@ -78,3 +85,45 @@ class Booking(TimeStampedModel):
     def can_cancel(self) -> bool:
         """Regla: se puede cancelar con >= 12h de antelación."""
         return (self.scheduled_at - timezone.now()) >= timezone.timedelta(hours=12)
+
+
+class BookingEventKind(models.TextChoices):
+    CREATED = "CREATED", "Creada"
+    UPDATED = "UPDATED", "Modificada"
+    CANCELLED = "CANCELLED", "Cancelada"
+
+
+class BookingEvent(models.Model):
+    """
+    Historial de una reserva (solo inserciones): quién hizo qué y cuándo.
+    Lo escribe bookings/audit.py en diferido, por lotes, tras el commit.
+    """
+
+    # Sin FK en la BD ni CASCADE: el historial sobrevive a la reserva y borrarla no arrastra
+    # sus eventos (ni falla el volcado diferido de una reserva ya borrada). Sin índice
+    # propio: lo cubre el compuesto (booking, created_at)
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="events",
+        db_index=False,
+    )
+    actor = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    kind = models.CharField(max_length=12, choices=BookingEventKind.choices)
+    # {"campo": [antes, después]}; en CREATED, los valores iniciales como [null, valor]
+    changes = models.JSONField(default=dict, blank=True)
+    # Momento del cambio (no el de la escritura diferida)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Evento de reserva"
+        verbose_name_plural = "Eventos de reserva"
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["booking", "created_at"])]
+
+    def __str__(self):
+        when = f"{self.created_at:%Y-%m-%d %H:%M}"
+        return f"Reserva #{self.booking_id} - {self.get_kind_display()} - {when}"
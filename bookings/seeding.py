@@ -0,0 +1,262 @@
+# bookings/seeding.py
+"""
+Carga masiva de datos de prueba con COPY (PostgreSQL): usuarios, perfiles, vehículos y
+reservas coherentes para pruebas de carga y tuning de queries.
+
+- COPY ... FROM STDIN en streaming (generadores): memoria constante, sin ORM ni señales
+  (no se crea un Profile por usuario vía post_save ni un Payment por reserva).
+- IDs explícitos a partir del máximo actual de cada tabla; al final se ajustan las
+  secuencias y se hace ANALYZE. Se puede sembrar sobre una BD con datos.
+- Determinista: misma semilla y `anchor` → mismos datos. Todas las fechas (altas, estados
+  pasados/futuros, created_at) se derivan de `anchor`, nunca del reloj.
+- Reservas repartidas por la rejilla de huecos (BOOKINGS_OPENING_HOUR..CLOSING_HOUR, cada
+  BOOKINGS_SLOT_MINUTES, los 7 días), como la ocupación real. Sin solapes por vehículo:
+  cada vehículo tiene una reserva por semana y terminan antes del cierre, así que nunca
+  llegan a la siguiente (tampoco chocan con UNIQUE (vehicle, scheduled_at)).
+
+Con scale=1: 500k usuarios + 500k perfiles + 1M vehículos + 8M reservas = 10M filas.
+"""
+
+import math
+import random
+from datetime import datetime, time, timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from services.models import Service
+from users.models import Profile, User
+from vehicles.models import Vehicle
+
+from .models import Booking, BookingStatus
+
+BASE_COUNTS = {"users": 500_000, "vehicles": 1_000_000, "bookings": 8_000_000}
+SEED_PASSWORD = "seed-password"
+EMAIL_DOMAIN = "seed.lava2.test"
+
+FIRST_NAMES = ["Ana", "Luis", "María", "Carlos", "Laura", "Andrés", "Paula", "Jorge", "Sofía"]
+LAST_NAMES = ["Gómez", "Rodríguez", "Martínez", "López", "García", "Pérez", "Díaz", "Torres"]
+MAKES = {
+    "Chevrolet": ["Spark", "Sail", "Onix"],
+    "Renault": ["Logan", "Sandero", "Duster"],
+    "Mazda": ["2", "3", "CX-5"],
+    "Kia": ["Picanto", "Rio", "Sportage"],
+    "Toyota": ["Corolla", "Hilux", "Yaris"],
+}
+COLORS = ["Blanco", "Negro", "Gris", "Rojo", "Azul", "Plata", ""]
+
+# Campos de cada COPY, en el orden de las tuplas que generan los métodos de Seeder
+USER_COLUMNS = [
+    "id", "password", "last_login", "is_superuser", "first_name", "last_name", "is_staff",
+    "is_active", "date_joined", "created_at", "updated_at", "email",
+]  # fmt: skip
+PROFILE_COLUMNS = [
+    "id", "user", "full_name", "phone", "timezone", "avatar", "wants_email", "wants_sms",
+    "wants_push", "created_at", "updated_at",
+]  # fmt: skip
+VEHICLE_COLUMNS = [
+    "id", "owner", "plate", "make", "model", "year", "color", "is_active", "created_at",
+    "updated_at",
+]  # fmt: skip
+BOOKING_COLUMNS = [
+    "id", "user", "vehicle", "service", "scheduled_at", "status", "notes", "created_at",
+    "updated_at",
+]  # fmt: skip
+
+
+def counts_for(scale: float) -> dict:
+    return {name: max(1, int(n * scale)) for name, n in BASE_COUNTS.items()}
+
+
+def _columns(model, names):
+    return [model._meta.get_field(name).column for name in names]
+
+
+def copy_rows(cursor, model, names, rows) -> int:
+    """COPY de `rows` (tuplas en el orden de `names`) a la tabla del modelo."""
+    sql = "COPY {} ({}) FROM STDIN".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(connection.ops.quote_name(c) for c in _columns(model, names)),
+    )
+    count = 0
+    with cursor.copy(sql) as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    return count
+
+
+def _next_id(cursor, model) -> int:
+    table = connection.ops.quote_name(model._meta.db_table)
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def _reset_sequence(cursor, model):
+    table = model._meta.db_table
+    cursor.execute(
+        "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+        f"(SELECT COALESCE(MAX(id), 1) FROM {connection.ops.quote_name(table)}))",
+        [table],
+    )
+
+
+def _plate(n: int) -> str:
+    digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    out = ""
+    while n:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+    return "S" + out.rjust(6, "0")  # ^[A-Z0-9\-]{5,10}$
+
+
+class Seeder:
+    def __init__(self, scale=1.0, seed=42, anchor=None, log=print):
+        self.counts = counts_for(scale)
+        self.seed = seed
+        tz = timezone.get_current_timezone()
+        anchor = anchor or timezone.localdate()
+        # Apertura del día de referencia: origen de la rejilla y "ahora" de los datos
+        self.anchor = datetime.combine(anchor, time(settings.BOOKINGS_OPENING_HOUR), tz)
+        self.slot_minutes = settings.BOOKINGS_SLOT_MINUTES
+        self.slots_per_day = (
+            (settings.BOOKINGS_CLOSING_HOUR - settings.BOOKINGS_OPENING_HOUR) * 60
+        ) // self.slot_minutes
+        self.log = log
+
+    def rng(self, table: str) -> random.Random:
+        # Un generador por tabla: cambiar una tabla no altera los datos de las demás
+        return random.Random(f"{self.seed}:{table}")
+
+    def users(self, first_id):
+        rng = self.rng("users")
+        password = make_password(SEED_PASSWORD)
+        for i in range(self.counts["users"]):
+            uid = first_id + i
+            joined = self.anchor - timedelta(days=rng.randint(0, 3 * 365))
+            yield (
+                uid,
+                password,
+                None,
+                False,
+                rng.choice(FIRST_NAMES),
+                rng.choice(LAST_NAMES),
+                False,
+                True,
+                joined,
+                joined,
+                joined,
+                f"user{uid}@{EMAIL_DOMAIN}",
+            )
+
+    def profiles(self, first_id, first_user_id):
+        rng = self.rng("profiles")
+        for i in range(self.counts["users"]):
+            yield (
+                first_id + i,
+                first_user_id + i,
+                "",
+                f"+57 3{rng.randrange(10**9):09d}",
+                "America/Bogota",
+                "",
+                True,
+                rng.random() < 0.3,
+                rng.random() < 0.5,
+                self.anchor,
+                self.anchor,
+            )
+
+    def vehicles(self, first_id, first_user_id):
+        rng = self.rng("vehicles")
+        users = self.counts["users"]
+        for i in range(self.counts["vehicles"]):
+            vid = first_id + i
+            make = rng.choice(list(MAKES))
+            yield (
+                vid,
+                first_user_id + i % users,
+                _plate(vid),
+                make,
+                rng.choice(MAKES[make]),
+                rng.randint(2005, 2025),
+                rng.choice(COLORS),
+                rng.random() > 0.05,
+                self.anchor,
+                self.anchor,
+            )
+
+    def bookings(self, first_id, first_vehicle_id, first_user_id, services):
+        """`services`: pares (id, duración en minutos) del catálogo activo."""
+        rng = self.rng("bookings")
+        vehicles, users = self.counts["vehicles"], self.counts["users"]
+        rounds = math.ceil(self.counts["bookings"] / vehicles)
+        start = self.anchor - timedelta(weeks=rounds // 2)
+        for j in range(self.counts["bookings"]):
+            week, index = divmod(j, vehicles)
+            service_id, minutes = rng.choice(services)
+            # Último hueco del que el servicio sale antes del cierre
+            last_slot = max(self.slots_per_day - math.ceil(minutes / self.slot_minutes), 0)
+            scheduled_at = start + timedelta(
+                weeks=week,
+                days=rng.randrange(7),
+                minutes=rng.randint(0, last_slot) * self.slot_minutes,
+            )
+            if scheduled_at < self.anchor:
+                status = BookingStatus.CANCELLED if rng.random() < 0.1 else BookingStatus.COMPLETED
+            else:
+                status = BookingStatus.CONFIRMED if rng.random() < 0.4 else BookingStatus.PENDING
+            created = min(scheduled_at, self.anchor) - timedelta(days=rng.randint(1, 30))
+            yield (
+                first_id + j,
+                first_user_id + index % users,  # el dueño del vehículo (ver vehicles())
+                first_vehicle_id + index,
+                service_id,
+                scheduled_at,
+                status.value,
+                "",
+                created,
+                created,
+            )
+
+    def run(self) -> dict:
+        services = list(
+            Service.objects.filter(is_active=True)
+            .order_by("pk")
+            .values_list("pk", "duration_minutes")
+        )
+        if not services:
+            raise ValueError("No hay servicios activos: crea el catálogo antes de sembrar.")
+
+        loaded = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            user_id = _next_id(cursor, User)
+            profile_id = _next_id(cursor, Profile)
+            vehicle_id = _next_id(cursor, Vehicle)
+            booking_id = _next_id(cursor, Booking)
+
+            steps = [
+                (User, USER_COLUMNS, self.users(user_id)),
+                (Profile, PROFILE_COLUMNS, self.profiles(profile_id, user_id)),
+                (Vehicle, VEHICLE_COLUMNS, self.vehicles(vehicle_id, user_id)),
+                (
+                    Booking,
+                    BOOKING_COLUMNS,
+                    self.bookings(booking_id, vehicle_id, user_id, services),
+                ),
+            ]
+            for model, names, rows in steps:
+                started = monotonic()
+                loaded[model._meta.label] = copy_rows(cursor, model, names, rows)
+                _reset_sequence(cursor, model)
+                elapsed = monotonic() - started
+                self.log(
+                    f"{model._meta.label}: {loaded[model._meta.label]} filas en {elapsed:.1f}s"
+                )
+
+        with connection.cursor() as cursor:
+            for model in (User, Profile, Vehicle, Booking):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+        return loaded
@@ -0,0 +1,57 @@
+# bookings/serializers.py
+from django.utils import timezone
+from rest_framework import serializers
+
+from config.api import SparseFieldsetsMixin
+from services.models import Service
+from vehicles.models import Vehicle
+
+from .models import Booking
+
+
+class BookingSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    vehicle = serializers.PrimaryKeyRelatedField(queryset=Vehicle.objects.none())
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.filter(is_active=True))
+    vehicle_plate = serializers.CharField(source="vehicle.plate", read_only=True)
+    service_name = serializers.CharField(source="service.name", read_only=True)
+    service_duration = serializers.IntegerField(source="service.duration_minutes", read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = [
+            "id",
+            "scheduled_at",
+            "status",
+            "notes",
+            "vehicle",
+            "vehicle_plate",
+            "service",
+            "service_name",
+            "service_duration",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["id", "status", "created_at", "updated_at"]
+        # Columnas que necesita cada campo (proyección con only(), ver config/api.py)
+        only = {
+            "vehicle": ("vehicle",),
+            "vehicle_plate": ("vehicle", "vehicle__plate"),
+            "service": ("service",),
+            "service_name": ("service", "service__name"),
+            "service_duration": ("service", "service__duration_minutes"),
+        }
+        # La unicidad (vehículo, horario) la resuelve el chequeo de solapamientos
+        validators = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if "vehicle" in self.fields and request is not None and request.user.is_authenticated:
+            self.fields["vehicle"].queryset = Vehicle.objects.filter(
+                owner=request.user, is_active=True
+            )
+
+    def validate_scheduled_at(self, value):
+        if value < timezone.now():
+            raise serializers.ValidationError("No puedes reservar en el pasado.")
+        return value
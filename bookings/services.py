@@ -0,0 +1,112 @@
+# bookings/services.py
+"""
+Reglas de negocio de reservas, compartidas por las vistas HTML y la API.
+
+Crear/modificar una reserva bloquea la fila del vehículo (SELECT ... FOR UPDATE) y revisa
+los solapamientos dentro de la misma transacción: dos peticiones concurrentes para el mismo
+vehículo se serializan y la segunda ve la reserva de la primera.
+
+Cada cambio deja un evento en el historial (bookings/audit.py), que se escribe en diferido
+tras el commit. `actor` es quien hace el cambio (por defecto, el dueño de la reserva).
+"""
+
+from django.db import transaction
+
+from vehicles.models import Vehicle
+
+from . import audit
+from .models import Booking, BookingEventKind, BookingStatus
+from .utils import MAX_SLOT_WINDOW, overlaps, slot_range
+
+ACTIVE_STATUSES = [BookingStatus.PENDING, BookingStatus.CONFIRMED]
+
+
+class BookingError(Exception):
+    """Regla de negocio incumplida. El mensaje se puede mostrar al usuario."""
+
+
+class BookingConflict(BookingError):
+    """El vehículo ya tiene una reserva activa que se solapa con el horario pedido."""
+
+    def __init__(self, message="Ese horario ya está ocupado para ese vehículo."):
+        super().__init__(message)
+
+
+def _lock_vehicle(user, vehicle) -> Vehicle:
+    try:
+        return Vehicle.objects.select_for_update().get(pk=vehicle.pk, owner=user)
+    except Vehicle.DoesNotExist as exc:
+        raise BookingError("No puedes usar un vehículo que no te pertenece.") from exc
+
+
+def _check_overlaps(vehicle, service, scheduled_at, exclude_pk=None):
+    """Debe llamarse dentro de transaction.atomic() y con el vehículo bloqueado."""
+    start, end = slot_range(scheduled_at, service.duration_minutes)
+    candidates = (
+        Booking.objects.select_for_update()
+        .filter(
+            vehicle=vehicle,
+            status__in=ACTIVE_STATUSES,
+            scheduled_at__gte=start - MAX_SLOT_WINDOW,
+            scheduled_at__lt=end + MAX_SLOT_WINDOW,
+        )
+        .select_related("service")
+    )
+    if exclude_pk is not None:
+        candidates = candidates.exclude(pk=exclude_pk)
+
+    for b in candidates:
+        b_start, b_end = slot_range(b.scheduled_at, b.service.duration_minutes)
+        if overlaps(start, end, b_start, b_end):
+            raise BookingConflict()
+
+
+def create_booking(*, user, vehicle, service, scheduled_at, notes="") -> Booking:
+    with transaction.atomic():
+        vehicle = _lock_vehicle(user, vehicle)
+        _check_overlaps(vehicle, service, scheduled_at)
+        booking = Booking.objects.create(
+            user=user,
+            vehicle=vehicle,
+            service=service,
+            scheduled_at=scheduled_at,
+            notes=notes,
+            status=BookingStatus.PENDING,
+        )
+        audit.created(booking, actor=user)
+    return booking
+
+
+def update_booking(booking, *, vehicle, service, scheduled_at, notes=None, actor=None) -> Booking:
+    if not booking.can_modify():
+        raise BookingError("Solo puedes modificar reservas con al menos 24 horas de antelación.")
+
+    with transaction.atomic():
+        vehicle = _lock_vehicle(booking.user, vehicle)
+        _check_overlaps(vehicle, service, scheduled_at, exclude_pk=booking.pk)
+        # Estado previo desde la BD: un ModelForm ya modificó `booking` al validar
+        before = Booking.objects.values(*audit.TRACKED_FIELDS).get(pk=booking.pk)
+        booking.vehicle = vehicle
+        booking.service = service
+        booking.scheduled_at = scheduled_at
+        if notes is not None:
+            booking.notes = notes
+        booking.save(update_fields=["vehicle", "service", "scheduled_at", "notes", "updated_at"])
+        changes = audit.diff(before, audit.snapshot(booking))
+        if changes:
+            audit.record(booking, BookingEventKind.UPDATED, actor or booking.user, changes)
+    return booking
+
+
+def cancel_booking(booking, actor=None) -> Booking:
+    if booking.status not in ACTIVE_STATUSES:
+        raise BookingError("Solo se pueden cancelar reservas pendientes o confirmadas.")
+    if not booking.can_cancel():
+        raise BookingError("Solo puedes cancelar con al menos 12 horas de antelación.")
+
+    previous = booking.status
+    booking.status = BookingStatus.CANCELLED
+    booking.save(update_fields=["status", "updated_at"])
+    changes = {"status": [previous, booking.status]}
+    audit.record(booking, BookingEventKind.CANCELLED, actor or booking.user, changes)
+    return booking
@@ -1,3 +1,385 @@
-from django.test import TestCase
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import partial
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, OperationalError, connection, router, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from services.models import Service
+from users.models import User
+from vehicles.models import Vehicle
+
+from . import audit
+from .models import Booking, BookingEvent, BookingEventKind, BookingStatus
+from .seeding import Seeder
+from .services import cancel_booking, create_booking, update_booking
+
+
+class BookingTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="cliente@example.com", password="x")
+        cls.service = Service.objects.create(name="Lavado", price=10, duration_minutes=30)
+        cls.vehicle = Vehicle.objects.create(
+            owner=cls.user, plate="ABC123", make="Mazda", model="3", year=2020
+        )
+
+    def create(self, days=3):
+        return create_booking(
+            user=self.user,
+            vehicle=self.vehicle,
+            service=self.service,
+            scheduled_at=timezone.now() + timedelta(days=days),
+        )
+
+
+class BookingCleanTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.start = (timezone.now() + timedelta(days=3)).replace(second=0, microsecond=0)
+        self.existing = Booking.objects.create(
+            user=self.user, vehicle=self.vehicle, service=self.service, scheduled_at=self.start
+        )
+
+    def clean_at(self, scheduled_at, service=None):
+        Booking(
+            user=self.user,
+            vehicle=self.vehicle,
+            service=service or self.service,
+            scheduled_at=scheduled_at,
+        ).clean()
+
+    def test_overlapping_active_booking_is_rejected(self):
+        for minutes in (-20, 0, 29):
+            with self.subTest(minutes=minutes), self.assertRaises(ValidationError):
+                self.clean_at(self.start + timedelta(minutes=minutes))
+
+    def test_adjacent_slots_are_allowed(self):
+        self.clean_at(self.start + timedelta(minutes=30))
+        self.clean_at(self.start - timedelta(minutes=30))
+
+    def test_earlier_history_does_not_block_new_bookings(self):
+        # Antes se comparaba contra toda reserva anterior del vehículo
+        self.clean_at(self.start + timedelta(days=2))
+
+    def test_long_service_started_earlier_is_detected(self):
+        long_service = Service.objects.create(name="Detallado", price=80, duration_minutes=180)
+        Booking.objects.filter(pk=self.existing.pk).update(service=long_service)
+        with self.assertRaises(ValidationError):
+            self.clean_at(self.start + timedelta(hours=2))
+
+    def test_cancelled_bookings_do_not_block(self):
+        Booking.objects.filter(pk=self.existing.pk).update(status=BookingStatus.CANCELLED)
+        self.clean_at(self.start + timedelta(minutes=10))
+
+    def test_past_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.clean_at(timezone.now() - timedelta(hours=1))
+
+
+@override_settings(BOOKING_AUDIT_FLUSH_INTERVAL=0)
+class BookingAuditTests(BookingTestMixin, TestCase):
+    def test_changes_are_written_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.create()
+            self.assertFalse(BookingEvent.objects.exists())  # aún sin commit
+        with self.captureOnCommitCallbacks(execute=True):
+            update_booking(
+                booking,
+                vehicle=self.vehicle,
+                service=self.service,
+                scheduled_at=booking.scheduled_at,
+                notes="Con aspirado",
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_booking(booking)
+
+        events = list(booking.events.order_by("created_at", "id"))
+        self.assertEqual(
+            [e.kind for e in events],
+            [BookingEventKind.CREATED, BookingEventKind.UPDATED, BookingEventKind.CANCELLED],
+        )
+        self.assertEqual(events[0].changes["service"], [None, self.service.pk])
+        self.assertEqual(events[1].changes, {"notes": ["", "Con aspirado"]})
+        self.assertEqual(events[2].changes, {"status": ["PENDING", "CANCELLED"]})
+        self.assertTrue(all(e.actor_id == self.user.pk for e in events))
+
+    def test_rollback_discards_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create()
+                    raise IntegrityError("rollback")
+            except IntegrityError:
+                pass
+        self.assertFalse(BookingEvent.objects.exists())
+
+    def test_unchanged_update_records_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.create()
+        with self.captureOnCommitCallbacks(execute=True):
+            update_booking(
+                booking,
+                vehicle=self.vehicle,
+                service=self.service,
+                scheduled_at=booking.scheduled_at,
+            )
+        self.assertEqual(booking.events.count(), 1)
+
+
+class AuditFlushTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.buffer = audit._Buffer()
+        with self.captureOnCommitCallbacks():  # sin ejecutar: el búfer del test empieza vacío
+            self.bookings = [self.create(days=2), self.create(days=3)]
+
+    def event(self, booking_id, actor_id=None):
+        return BookingEvent(booking_id=booking_id, actor_id=actor_id, kind=BookingEventKind.UPDATED)
+
+    def flush_after_fk_violation(self):
+        bulk_create = BookingEvent.objects.bulk_create
+        calls = []
+
+        def fk_violation_once(events, **kwargs):
+            # Como PostgreSQL en autocommit: la FK rota hace fallar el INSERT del lote
+            calls.append(events)
+            if len(calls) == 1:
+                raise IntegrityError("violates foreign key constraint")
+            return bulk_create(events, **kwargs)
+
+        with mock.patch.object(BookingEvent.objects, "bulk_create", fk_violation_once):
+            return audit.flush(self.buffer)
+
+    def test_deleted_actor_is_nulled_and_every_event_saved(self):
+        ghost = User.objects.create_user(email="borrado@example.com", password="x")
+        ghost_id = ghost.pk
+        ghost.delete()
+        first, second = self.bookings
+        for event in [
+            self.event(first.pk, self.user.pk),
+            self.event(second.pk, ghost_id),
+            self.event(0),  # reserva ya borrada: el historial se conserva
+        ]:
+            self.buffer.add(event)
+
+        self.assertEqual(self.flush_after_fk_violation(), 3)
+        self.assertEqual(
+            set(BookingEvent.objects.values_list("booking_id", "actor_id")),
+            {(first.pk, self.user.pk), (second.pk, None), (0, None)},
+        )
+        self.assertEqual(self.buffer.events, [])
+
+    def test_retry_reads_actors_from_the_primary(self):
+        self.buffer.add(self.event(self.bookings[0].pk, self.user.pk))
+        # Una lectura enrutada a la réplica ("replica" no existe aquí) haría fallar el volcado
+        with mock.patch.object(router, "db_for_read", return_value="replica"):
+            self.assertEqual(self.flush_after_fk_violation(), 1)
+        self.assertEqual(BookingEvent.objects.get().actor_id, self.user.pk)
+
+    def test_deleting_a_booking_keeps_its_history(self):
+        booking = self.bookings[0]
+        booking_id = booking.pk
+        self.buffer.add(self.event(booking_id))
+        self.assertEqual(audit.flush(self.buffer), 1)
+        with CaptureQueriesContext(connection) as queries:
+            booking.delete()
+        # DO_NOTHING: el borrado ni carga ni toca los eventos
+        self.assertFalse(any("bookings_bookingevent" in q["sql"] for q in queries))
+        self.assertEqual(BookingEvent.objects.filter(booking_id=booking_id).count(), 1)
+
+    def test_database_errors_keep_events_for_retry(self):
+        self.buffer.add(self.event(self.bookings[0].pk))
+        with mock.patch.object(
+            BookingEvent.objects, "bulk_create", side_effect=OperationalError("sin conexión")
+        ), self.assertLogs("bookings.audit", "ERROR"):
+            self.assertEqual(audit.flush(self.buffer), 0)
+
+        self.assertEqual(len(self.buffer.events), 1)
+        self.assertEqual(audit.flush(self.buffer), 1)
+        self.assertTrue(BookingEvent.objects.exists())
+
+    @override_settings(BOOKING_AUDIT_BUFFER_MAX=2)
+    def test_full_buffer_drops_oldest_events(self):
+        with self.assertLogs("bookings.audit", "WARNING"):
+            for booking_id in (1, 2, 3):
+                self.buffer.add(self.event(booking_id))
+        self.assertEqual([e.booking_id for e in self.buffer.events], [2, 3])
+
+
+@override_settings(BOOKINGS_OPENING_HOUR=8, BOOKINGS_CLOSING_HOUR=18, BOOKINGS_SLOT_MINUTES=30)
+class SeederTests(SimpleTestCase):
+    services = [(1, 30), (2, 45), (3, 180)]
+    anchor = date(2026, 3, 2)
+
+    def seeder(self, seed=42):
+        return Seeder(scale=0.0002, seed=seed, anchor=self.anchor)  # 100 usuarios, 1600 reservas
+
+    def bookings(self, seeder):
+        return list(seeder.bookings(1, 1, 1, self.services))
+
+    def test_same_seed_and_anchor_give_the_same_rows(self):
+        rows = self.bookings(self.seeder())
+        self.assertEqual(rows, self.bookings(self.seeder()))
+        self.assertNotEqual(rows, self.bookings(self.seeder(seed=7)))
+        with mock.patch(
+            "django.utils.timezone.now", return_value=timezone.now() + timedelta(days=90)
+        ):
+            self.assertEqual(rows, self.bookings(self.seeder()))
+
+    def test_bookings_fill_the_slot_grid_without_overlaps(self):
+        seeder = self.seeder()
+        durations = dict(self.services)
+        by_vehicle = defaultdict(list)
+        for _, _, vehicle, service, scheduled_at, *_ in self.bookings(seeder):
+            local = timezone.localtime(scheduled_at)
+            end = local + timedelta(minutes=durations[service])
+            self.assertGreaterEqual(local.hour, 8)
+            self.assertLessEqual((end.hour, end.minute), (18, 0))
+            self.assertEqual(local.minute % 30, 0)
+            by_vehicle[vehicle].append((scheduled_at, end))
+
+        self.assertEqual(len(by_vehicle), seeder.counts["vehicles"])
+        for slots in by_vehicle.values():
+            slots.sort()
+            for (_, end), (next_start, _) in zip(slots, slots[1:]):
+                self.assertLessEqual(end, next_start)
+        starts = {timezone.localtime(s[0]).time() for slots in by_vehicle.values() for s in slots}
+        self.assertGreater(len(starts), 10)
+
+    def test_rows_reference_seeded_owners_and_vehicles(self):
+        seeder = self.seeder()
+        owners = {row[0]: row[1] for row in seeder.vehicles(first_id=1, first_user_id=1)}
+        users = {row[0] for row in seeder.users(first_id=1)}
+        for _, user, vehicle, *_ in self.bookings(seeder):
+            self.assertEqual(owners[vehicle], user)
+            self.assertIn(user, users)
+
+    def test_status_and_created_at_follow_the_anchor(self):
+        seeder = self.seeder()
+        past = {BookingStatus.COMPLETED, BookingStatus.CANCELLED}
+        for *_, scheduled_at, status, _, created, _ in self.bookings(seeder):
+            self.assertEqual(status in past, scheduled_at < seeder.anchor)
+            self.assertLess(created, min(scheduled_at, seeder.anchor))
+
+
+class BookingApiTests(BookingTestMixin, TestCase):
+    list_url = reverse("api_v1:booking-list")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.bookings = [self.create(days=d) for d in range(1, 6)]
+
+    def detail_url(self, booking):
+        return reverse("api_v1:booking-detail", kwargs={"pk": booking.pk})
+
+    def test_cursor_pagination_walks_every_booking_once(self):
+        url, seen = f"{self.list_url}?page_size=2", []
+        while url:
+            page = self.client.get(url).json()
+            self.assertNotIn("count", page)  # sin COUNT(*)
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, [b.pk for b in reversed(self.bookings)])
+
+    def test_sparse_fieldsets_project_columns_and_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, {"fields": "id,vehicle_plate"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()["results"][0]), {"id", "vehicle_plate"})
+        sql = next(q["sql"] for q in queries if '"bookings_booking"' in q["sql"])
+        self.assertIn('"vehicles_vehicle"', sql)
+        self.assertNotIn('"services_service"', sql)
+        self.assertNotIn('"notes"', sql)
+
+    def test_sparse_fieldsets_without_relations_skip_deferred_joins(self):
+        # vehicle/service quedan diferidos: select_related sobre ellos fallaría
+        for fields in ("id", "id,vehicle", "id,service_name"):
+            with self.subTest(fields=fields):
+                response = self.client.get(self.list_url, {"fields": fields})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(set(response.json()["results"][0]), set(fields.split(",")))
+
+    def test_fields_are_ignored_on_writes(self):
+        payload = {
+            "vehicle": self.vehicle.pk,
+            "service": self.service.pk,
+            "scheduled_at": (timezone.now() + timedelta(days=10)).isoformat(),
+        }
+        response = self.client.post(f"{self.list_url}?fields=id", payload, "application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("service_name", response.json())
+
+    def test_other_users_bookings_are_not_visible(self):
+        other = User.objects.create_user(email="otro@example.com", password="x")
+        other_vehicle = Vehicle.objects.create(
+            owner=other, plate="XYZ987", make="Kia", model="Rio", year=2021
+        )
+        foreign = Booking.objects.create(
+            user=other,
+            vehicle=other_vehicle,
+            service=self.service,
+            scheduled_at=timezone.now() + timedelta(days=2),
+        )
+        ids = [row["id"] for row in self.client.get(self.list_url).json()["results"]]
+        self.assertNotIn(foreign.pk, ids)
+        self.assertEqual(self.client.get(self.detail_url(foreign)).status_code, 404)
+        cancel = reverse("api_v1:booking-cancel", kwargs={"pk": foreign.pk})
+        self.assertEqual(self.client.post(cancel).status_code, 404)
+
+        payload = {
+            "vehicle": other_vehicle.pk,
+            "service": self.service.pk,
+            "scheduled_at": (timezone.now() + timedelta(days=10)).isoformat(),
+        }
+        response = self.client.post(self.list_url, payload, "application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("vehicle", response.json())
+
+    def test_anonymous_is_rejected(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.list_url).status_code, 403)
+
+    def test_api_is_versioned_under_v1(self):
+        self.assertTrue(self.list_url.startswith("/api/v1/"))
+        self.assertEqual(self.client.get("/api/bookings/").status_code, 404)
+        self.assertEqual(self.client.get("/api/v2/bookings/").status_code, 404)
+
+
+class BookingListViewTests(BookingTestMixin, TestCase):
+    url = reverse("bookings:list")
+
+    def setUp(self):
+        self.bookings = [self.create(days=d) for d in range(1, 12)]
+        self.other = User.objects.create_user(email="otro@example.com", password="x")
+
+    async def test_anonymous_is_redirected_to_login(self):
+        response = await self.async_client.get(self.url, {"page": 2})
+        self.assertRedirects(
+            response,
+            f"{reverse('users:login')}?next=/bookings/%3Fpage%3D2",
+            fetch_redirect_response=False,
+        )
+
+    async def test_rows_are_rendered_from_a_partial(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.context["booking_rows"], partial)
+        self.assertEqual(response.content.decode().count("ABC123"), 10)
+        self.assertTrue(response.context["is_paginated"])
+
+        # Las más lejanas primero: en la página 2 queda la más próxima
+        response = await self.async_client.get(self.url, {"page": 2})
+        self.assertEqual([b.pk for b in response.context["bookings"]], [self.bookings[0].pk])
+        response = await self.async_client.get(self.url, {"page": 3})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_only_own_bookings_are_listed(self):
+        await self.async_client.aforce_login(self.other)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["bookings"], [])
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views import (
+    BookingAvailabilityView,
     BookingCancelView,
     BookingCreateView,
     BookingDetailView,
@@ -13,6 +14,7 @@ app_name = "bookings"
 urlpatterns = [
     path("", BookingListView.as_view(), name="list"),
     path("create/", BookingCreateView.as_view(), name="create"),
+    path("availability/", BookingAvailabilityView.as_view(), name="availability"),
     path("<int:pk>/", BookingDetailView.as_view(), name="detail"),
     path("<int:pk>/edit/", BookingUpdateView.as_view(), name="edit"),
     path("<int:pk>/cancel/", BookingCancelView.as_view(), name="cancel"),
@@ -1,5 +1,9 @@
 from datetime import timedelta
 
+# Ninguna reserva dura más que esto: acota la ventana de candidatos a solapamiento
+# (Booking.clean y bookings.services comparten el valor)
+MAX_SLOT_WINDOW = timedelta(hours=4)
+
 
 def slot_range(start_dt, duration_minutes: int):
     return start_dt, start_dt + timedelta(minutes=duration_minutes)
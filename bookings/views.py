@@ -1,17 +1,32 @@
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+from functools import partial
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.response import TemplateResponse
+from django.utils import timezone
 from django.views import View
-from django.views.generic import DetailView, ListView
+from django.views.generic import DetailView
 
+from config.async_views import AsyncLoginRequiredMixin, apaginate
+from config.fragments import render_rows
+from services.models import Service
 from vehicles.models import Vehicle
 
-from .forms import BookingCreateForm, BookingUpdateForm
-from .models import Booking, BookingStatus
-from .utils import overlaps, slot_range
+from .forms import AvailabilityForm, BookingCreateForm, BookingUpdateForm
+from .models import Booking
+from .services import (
+    ACTIVE_STATUSES,
+    BookingConflict,
+    BookingError,
+    cancel_booking,
+    create_booking,
+    update_booking,
+)
+from .utils import MAX_SLOT_WINDOW, overlaps, slot_range
 
 
 class OwnerBookingMixin(LoginRequiredMixin):
@@ -19,14 +34,86 @@ class OwnerBookingMixin(LoginRequiredMixin):
         return super().get_queryset().filter(user=self.request.user)
 
 
-class BookingListView(OwnerBookingMixin, ListView):
-    model = Booking
+class BookingListView(AsyncLoginRequiredMixin, View):
+    """Listado de reservas del usuario. Vista async: lecturas con el ORM async."""
+
     template_name = "bookings/booking_list.html"
-    context_object_name = "bookings"
     paginate_by = 10
 
     def get_queryset(self):
-        return super().get_queryset().select_related("vehicle", "service").order_by("-scheduled_at")
+        return (
+            Booking.objects.filter(user=self.request.user)
+            .select_related("vehicle", "service")
+            .order_by("-scheduled_at")
+        )
+
+    async def get(self, request):
+        context = await apaginate(self.get_queryset(), request.GET.get("page"), self.paginate_by)
+        context["bookings"] = context["object_list"]
+        # La fila muestra placa y nombre del servicio: sus updated_at también van en la clave.
+        # Callable: se renderiza junto con la plantilla (hilo sync), fuera del event loop.
+        context["booking_rows"] = partial(
+            render_rows,
+            "bookings/_booking_row.html",
+            context["bookings"],
+            "b",
+            related=lambda b: (b.vehicle, b.service),
+        )
+        return TemplateResponse(request, self.template_name, context)
+
+
+class BookingAvailabilityView(AsyncLoginRequiredMixin, View):
+    """
+    Huecos del día para un vehículo y un servicio (JSON), dentro del horario de atención.
+    GET ?vehicle=<id>&service=<id>&date=YYYY-MM-DD
+    """
+
+    async def get(self, request):
+        form = AvailabilityForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        data = form.cleaned_data
+        try:
+            vehicle = await Vehicle.objects.filter(owner=request.user, is_active=True).aget(
+                pk=data["vehicle"]
+            )
+            service = await Service.objects.filter(is_active=True).aget(pk=data["service"])
+        except (Vehicle.DoesNotExist, Service.DoesNotExist) as exc:
+            raise Http404("Vehículo o servicio no encontrado.") from exc
+
+        tz = timezone.get_current_timezone()
+        day_start = datetime.combine(data["date"], time(settings.BOOKINGS_OPENING_HOUR), tz)
+        day_end = datetime.combine(data["date"], time(settings.BOOKINGS_CLOSING_HOUR), tz)
+        busy = [
+            slot_range(b.scheduled_at, b.service.duration_minutes)
+            async for b in Booking.objects.filter(
+                vehicle=vehicle,
+                status__in=ACTIVE_STATUSES,
+                scheduled_at__gte=day_start - MAX_SLOT_WINDOW,
+                scheduled_at__lt=day_end,
+            )
+            .select_related("service")
+            .only("scheduled_at", "service", "service__duration_minutes")
+        ]
+
+        now = timezone.now()
+        step = timedelta(minutes=settings.BOOKINGS_SLOT_MINUTES)
+        slots = []
+        start = day_start
+        while start + timedelta(minutes=service.duration_minutes) <= day_end:
+            s_start, s_end = slot_range(start, service.duration_minutes)
+            free = start >= now and not any(overlaps(s_start, s_end, *b) for b in busy)
+            slots.append({"start": start.isoformat(), "available": free})
+            start += step
+        return JsonResponse(
+            {
+                "date": data["date"].isoformat(),
+                "vehicle": vehicle.pk,
+                "service": service.pk,
+                "duration_minutes": service.duration_minutes,
+                "slots": slots,
+            }
+        )
 
 
 class BookingDetailView(OwnerBookingMixin, DetailView):
@@ -47,46 +134,26 @@ class BookingCreateView(LoginRequiredMixin, View):
             return render(request, self.template_name, {"form": form})
 
         vehicle = form.cleaned_data["vehicle"]
-        service = form.cleaned_data["service"]
-        scheduled_at = form.cleaned_data["scheduled_at"]
-        notes = form.cleaned_data.get("notes", "")
-
         if vehicle.owner_id != request.user.id:
             messages.error(request, "No puedes reservar con un vehículo que no te pertenece.")
             return render(request, self.template_name, {"form": form})
 
-        with transaction.atomic():
-            vehicle = Vehicle.objects.select_for_update().get(pk=vehicle.pk, owner=request.user)
-            start, end = slot_range(scheduled_at, service.duration_minutes)
-            window_start, window_end = start - timedelta(hours=4), end + timedelta(hours=4)
-
-            candidates = (
-                Booking.objects.select_for_update()
-                .filter(
-                    vehicle=vehicle,
-                    status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
-                    scheduled_at__gte=window_start,
-                    scheduled_at__lt=window_end,
-                )
-                .select_related("service")
-            )
-
-            for b in candidates:
-                b_start, b_end = slot_range(b.scheduled_at, b.service.duration_minutes)
-                if overlaps(start, end, b_start, b_end):
-                    messages.error(
-                        request, "El vehículo ya tiene una reserva que se solapa en ese horario."
-                    )
-                    return render(request, self.template_name, {"form": form})
-
-            booking = Booking.objects.create(
+        try:
+            booking = create_booking(
                 user=request.user,
                 vehicle=vehicle,
-                service=service,
-                scheduled_at=scheduled_at,
-                notes=notes,
-                status=BookingStatus.PENDING,
+                service=form.cleaned_data["service"],
+                scheduled_at=form.cleaned_data["scheduled_at"],
+                notes=form.cleaned_data.get("notes", ""),
             )
+        except BookingConflict:
+            messages.error(
+                request, "El vehículo ya tiene una reserva que se solapa en ese horario."
+            )
+            return render(request, self.template_name, {"form": form})
+        except BookingError as exc:
+            messages.error(request, str(exc))
+            return render(request, self.template_name, {"form": form})
 
         messages.success(request, "Reserva creada correctamente.")
         return redirect("bookings:detail", pk=booking.pk)
@@ -109,53 +176,19 @@ class BookingUpdateView(LoginRequiredMixin, View):
         if not form.is_valid():
             return render(request, self.template_name, {"form": form, "booking": booking})
 
-        if not booking.can_modify():
-            messages.error(
-                request, "Solo puedes modificar reservas con al menos 24 horas de antelación."
+        try:
+            update_booking(
+                booking,
+                vehicle=form.cleaned_data["vehicle"],
+                service=form.cleaned_data["service"],
+                scheduled_at=form.cleaned_data["scheduled_at"],
+                notes=form.cleaned_data.get("notes", booking.notes),
+                actor=request.user,
             )
+        except BookingError as exc:
+            messages.error(request, str(exc))
             return render(request, self.template_name, {"form": form, "booking": booking})
 
-        new_vehicle = form.cleaned_data["vehicle"]
-        new_service = form.cleaned_data["service"]
-        new_scheduled_at = form.cleaned_data["scheduled_at"]
-
-        if new_vehicle.owner_id != request.user.id:
-            messages.error(request, "No puedes usar un vehículo que no te pertenece.")
-            return render(request, self.template_name, {"form": form, "booking": booking})
-
-        with transaction.atomic():
-            new_vehicle = Vehicle.objects.select_for_update().get(
-                pk=new_vehicle.pk, owner=request.user
-            )
-            start, end = slot_range(new_scheduled_at, new_service.duration_minutes)
-            window_start, window_end = start - timedelta(hours=4), end + timedelta(hours=4)
-
-            candidates = (
-                Booking.objects.select_for_update()
-                .filter(
-                    vehicle=new_vehicle,
-                    status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
-                    scheduled_at__gte=window_start,
-                    scheduled_at__lt=window_end,
-                )
-                .exclude(pk=booking.pk)
-                .select_related("service")
-            )
-
-            for b in candidates:
-                b_start, b_end = slot_range(b.scheduled_at, b.service.duration_minutes)
-                if overlaps(start, end, b_start, b_end):
-                    messages.error(request, "Ese horario ya está ocupado para ese vehículo.")
-                    return render(request, self.template_name, {"form": form, "booking": booking})
-
-            booking.vehicle = new_vehicle
-            booking.service = new_service
-            booking.scheduled_at = new_scheduled_at
-            booking.notes = form.cleaned_data.get("notes", booking.notes)
-            booking.save(
-                update_fields=["vehicle", "service", "scheduled_at", "notes", "updated_at"]
-            )
-
         messages.success(request, "Reserva actualizada correctamente.")
         return redirect("bookings:detail", pk=booking.pk)
 
@@ -172,15 +205,11 @@ class BookingCancelView(LoginRequiredMixin, View):
     def post(self, request, pk):
         booking = self.get_object(request, pk)
 
-        if booking.status not in [BookingStatus.PENDING, BookingStatus.CONFIRMED]:
-            messages.error(request, "Solo se pueden cancelar reservas pendientes o confirmadas.")
-            return redirect("bookings:detail", pk=booking.pk)
-
-        if not booking.can_cancel():
-            messages.error(request, "Solo puedes cancelar con al menos 12 horas de antelación.")
+        try:
+            cancel_booking(booking, actor=request.user)
+        except BookingError as exc:
+            messages.error(request, str(exc))
             return redirect("bookings:detail", pk=booking.pk)
 
-        booking.status = BookingStatus.CANCELLED
-        booking.save(update_fields=["status", "updated_at"])
         messages.success(request, "Reserva cancelada.")
         return redirect("bookings:list")
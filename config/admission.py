@@ -0,0 +1,154 @@
+# config/admission.py
+"""
+Control de admisión: con el worker saturado se rechazan primero las peticiones de baja
+prioridad, antes de sesiones, auth y vistas (es decir, antes de tocar la BD), para que el
+camino de escritura de reservas (con locks de fila) mantenga su latencia.
+
+Señales de sobrecarga, por proceso:
+- peticiones en curso (relevante bajo ASGI, donde no hay tope de hilos):
+  ADMISSION_MAX_INFLIGHT para baja prioridad; las de alta prioridad admiten hasta
+  ADMISSION_MAX_INFLIGHT_HIGH.
+- espera en cola antes de llegar al worker, con la cabecera `X-Request-Start` del proxy
+  (nginx: `proxy_set_header X-Request-Start "t=${msec}";`). Con gthread es la señal útil:
+  si las peticiones esperan más de ADMISSION_MAX_QUEUE_MS, se descartan las de baja prioridad
+  (ya llegarían tarde) y pasan las de alta.
+
+Prioridad por nombre de URL: ADMISSION_HIGH_PRIORITY (escrituras de reservas, webhooks de
+pago; solo métodos que escriben) y ADMISSION_EXEMPT (health/ready/metrics: nunca se
+rechazan). El resto es baja.
+Respuesta: 503 con `Retry-After`. Con ADMISSION_MAX_INFLIGHT = 0 el control está apagado.
+"""
+
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+from config.metrics import REQUESTS_REJECTED
+
+logger = logging.getLogger(__name__)
+
+HIGH, LOW, EXEMPT = "high", "low", "exempt"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def request_queue_ms(request, now: float):
+    """Milisegundos desde que el proxy recibió la petición (X-Request-Start), o None."""
+    raw = request.META.get("HTTP_X_REQUEST_START", "")
+    try:
+        started = float(raw.removeprefix("t="))
+    except ValueError:
+        return None
+    # nginx manda segundos con decimales; otros proxies, milisegundos o microsegundos
+    if started > 1e14:
+        started /= 1_000_000
+    elif started > 1e11:
+        started /= 1000
+    return max(0.0, (now - started) * 1000)
+
+
+def classify(request):
+    """(nombre de URL, prioridad). resolve() usa el resolver ya poblado: microsegundos."""
+    try:
+        view_name = resolve(request.path_info).view_name
+    except Resolver404:
+        return "unresolved", LOW
+    if view_name in settings.ADMISSION_EXEMPT:
+        return view_name, EXEMPT
+    if view_name in settings.ADMISSION_HIGH_PRIORITY and request.method not in SAFE_METHODS:
+        return view_name, HIGH
+    return view_name, LOW
+
+
+class _InFlight:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def try_enter(self, limit: int) -> bool:
+        with self._lock:
+            if self.count >= limit:
+                return False
+            self.count += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.count -= 1
+
+
+_inflight = _InFlight()
+
+
+def service_unavailable(retry_after: int):
+    response = HttpResponse(
+        "Servicio saturado. Vuelve a intentarlo en unos segundos.",
+        status=503,
+        content_type="text/plain; charset=utf-8",
+    )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+class AdmissionControlMiddleware:
+    """Va justo después de MetricsMiddleware: los rechazos se miden pero no cuestan nada más."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        rejected, limit = self._admit(request)
+        if rejected is not None:
+            return rejected
+        try:
+            return self.get_response(request)
+        finally:
+            if limit:
+                _inflight.leave()
+
+    async def __acall__(self, request):
+        rejected, limit = self._admit(request)
+        if rejected is not None:
+            return rejected
+        try:
+            return await self.get_response(request)
+        finally:
+            if limit:
+                _inflight.leave()
+
+    @staticmethod
+    def _admit(request):
+        """(respuesta de rechazo o None, límite de concurrencia aplicado o 0)."""
+        if not settings.ADMISSION_MAX_INFLIGHT:
+            return None, 0
+        view_name, level = classify(request)
+        if level == EXEMPT:
+            return None, 0
+        if level == LOW:
+            queued = request_queue_ms(request, time.time())
+            if queued is not None and queued > settings.ADMISSION_MAX_QUEUE_MS:
+                return AdmissionControlMiddleware._reject(request, view_name, "queue"), 0
+        if level == HIGH:
+            limit = settings.ADMISSION_MAX_INFLIGHT_HIGH
+        else:
+            limit = settings.ADMISSION_MAX_INFLIGHT
+        if not _inflight.try_enter(limit):
+            return AdmissionControlMiddleware._reject(request, view_name, "overload"), 0
+        return None, limit
+
+    @staticmethod
+    def _reject(request, view_name: str, reason: str):
+        REQUESTS_REJECTED.inc((view_name, f"admission_{reason}"))
+        logger.warning("Admisión: se descarta %s %s (%s)", request.method, request.path, reason)
+        return service_unavailable(settings.ADMISSION_RETRY_AFTER)
@@ -0,0 +1,81 @@
+# config/api.py
+"""
+Piezas comunes de la API REST (/api/v1/).
+
+- Paginación por cursor: coste constante por página (keyset), sin COUNT(*) ni OFFSET.
+- Sparse fieldsets: `?fields=id,name` devuelve solo esos campos en lecturas...
+- ...y el queryset se proyecta con `only()` a las columnas que esos campos necesitan.
+  Cada serializer declara en `Meta.only` las columnas de los campos que no son una columna
+  propia (p. ej. `"vehicle_plate": ("vehicle", "vehicle__plate")`).
+"""
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import CursorPagination
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "El recurso está en conflicto con el estado actual."
+    default_code = "conflict"
+
+
+class ApiCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+def requested_fields(request):
+    """Campos pedidos con `?fields=` (solo en lecturas). None = todos."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = request.query_params.get("fields", "")
+    fields = {f.strip() for f in raw.split(",") if f.strip()}
+    return fields or None
+
+
+class SparseFieldsetsMixin:
+    """Serializer: descarta los campos no pedidos en `?fields=` (los desconocidos se ignoran)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get("request"))
+        if fields:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class ProjectedQuerysetMixin:
+    """
+    ViewSet: en lecturas aplica `only()` con las columnas de los campos que se van a
+    serializar, más la PK y las columnas del orden (las usa el cursor).
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        meta = self.get_serializer_class().Meta
+        fields = requested_fields(self.request)
+        names = [f for f in meta.fields if fields is None or f in fields]
+        only_map = getattr(meta, "only", {})
+
+        model = queryset.model
+        columns = {model._meta.pk.name}
+        ordering = getattr(self, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        columns.update(o.lstrip("-") for o in ordering)
+        for name in names:
+            columns.update(only_map.get(name, (name,)))
+        # Solo los JOIN que piden los campos seleccionados (un FK diferido no puede recorrerse
+        # con select_related)
+        relations = {c.split("__", 1)[0] for c in columns if "__" in c}
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns)
@@ -0,0 +1,22 @@
+# config/api_urls.py
+"""Rutas de la API v1 (montadas en /api/v1/)."""
+
+from django.urls import path
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.routers import DefaultRouter
+
+from bookings.api import BookingViewSet
+from services.api import ServiceViewSet
+from vehicles.api import VehicleViewSet
+
+app_name = "api_v1"
+
+router = DefaultRouter()
+router.register("services", ServiceViewSet, basename="service")
+router.register("vehicles", VehicleViewSet, basename="vehicle")
+router.register("bookings", BookingViewSet, basename="booking")
+
+urlpatterns = [
+    path("schema/", SpectacularAPIView.as_view(), name="schema"),
+    *router.urls,
+]
@@ -5,6 +5,15 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Las vistas de larga duración (p. ej. el stream SSE `notifications:stream`) son async y
+deben servirse con este entrypoint (uvicorn/daphne) para no ocupar un hilo por conexión.
+
+También son async las lecturas de catálogo y reservas (`services:public_list`,
+`services:public_detail`, `bookings:list`, `bookings:availability`): bajo ASGI esperan a la
+BD sin bloquear el worker. El resto de vistas sync convive en el mismo proceso (Django las
+ejecuta en su pool de hilos). En producción: GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+con `config.asgi` (ver config/gunicorn.py).
 """
 
 import os
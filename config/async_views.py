@@ -0,0 +1,50 @@
+# config/async_views.py
+"""
+Apoyo para vistas async (servidas por config/asgi.py con uvicorn).
+
+Las lecturas usan el ORM async (`aget`, `acount`, `async for`). El HTML se devuelve como
+TemplateResponse: Django lo renderiza después en su hilo sync, así que los context
+processors (usuario, badge de notificaciones) pueden seguir tocando BD/cache sin
+SynchronousOnlyOperation.
+"""
+
+from django.contrib.auth.views import redirect_to_login
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+
+
+class AsyncLoginRequiredMixin:
+    """LoginRequiredMixin para vistas async: resuelve el usuario con `request.auser()`."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        # Ya resuelto: ni la vista ni el render vuelven a cargar sesión/usuario
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+async def apaginate(queryset, page_number, per_page: int) -> dict:
+    """
+    Equivalente async de la paginación de ListView: COUNT con `acount()` y la página con
+    `async for`. Devuelve las mismas claves de contexto (paginator, page_obj, is_paginated,
+    object_list). Con una lista ya cargada pagina en memoria.
+    """
+    paginator = Paginator(queryset, per_page)
+    if isinstance(queryset, list):  # ya en memoria (p. ej. sacada de la cache)
+        paginator.count = len(queryset)
+    else:
+        paginator.count = await queryset.acount()  # cached_property: evita el COUNT sync
+    try:
+        page = paginator.page(page_number or 1)
+    except InvalidPage as exc:
+        raise Http404("Página inválida.") from exc
+    if not isinstance(queryset, list):
+        page.object_list = [obj async for obj in page.object_list]
+    return {
+        "paginator": paginator,
+        "page_obj": page,
+        "is_paginated": page.has_other_pages(),
+        "object_list": page.object_list,
+    }
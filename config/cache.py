@@ -0,0 +1,318 @@
+# config/cache.py
+"""
+Cache de dos niveles: LRU en memoria del proceso (L1) delante de la cache compartida (L2:
+Redis con REDIS_URL, locmem si no).
+
+- Lecturas: L1 si la entrada no caducó (L1_TIMEOUT, acotado por el timeout de la clave);
+  si no, L2, y lo que se encuentra se copia a L1. Sin red en los aciertos de L1.
+- Escrituras (set/delete/incr/...): van a L2, se quitan de L1 y se avisa al resto de
+  procesos para que también las quiten de su L1. Solo se avisa si otro proceso puede tener
+  la clave: un `set` de una clave nueva en L2 (p. ej. los fragmentos inmutables de
+  config/fragments.py, o el relleno tras un fallo) entra con `add` y no genera NOTIFY.
+- Aviso entre workers: `NOTIFY` de PostgreSQL (canal CHANNEL) tras el commit de la
+  transacción en curso. Cada proceso tiene un hilo con `LISTEN`; si pierde la conexión,
+  vacía su L1 (pudo perder avisos) y se reconecta. Sin PostgreSQL no hay aviso y la
+  desactualización queda acotada por L1_TIMEOUT.
+
+Pensada para datos de lectura frecuente y escritura rara (catálogo, fragmentos, perfiles):
+contadores y marcas que cambian a cada rato (bandeja, sesiones) van directo a L2.
+
+Aciertos/fallos por nivel en /metrics: `lava2_cache_requests_total{cache,tier,result}`.
+"""
+
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from config.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Límite de payload de NOTIFY: 8000 bytes; se trocea por debajo
+NOTIFY_MAX_BYTES = 7000
+RECONNECT_DELAY = 5
+
+
+class _LocalLRU:
+    """LRU con TTL por entrada. Guarda los valores serializados (como locmem): nadie muta
+    el objeto cacheado por accidente."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # clave -> (expira, pickle)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+        return True, pickle.loads(entry[1])
+
+    def set(self, key, value, ttl: float):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def evict(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# LOCATION -> L1 del proceso. `caches[alias]` da una instancia por hilo: todas comparten
+# este L1 (como locmem comparte su almacén por LOCATION)
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _store_for(location: str, max_entries: int) -> _LocalLRU:
+    with _stores_lock:
+        store = _stores.get(location)
+        if store is None:
+            store = _stores[location] = _LocalLRU(max_entries)
+        return store
+
+
+class _Listener:
+    """Hilo (uno por proceso y canal) que hace LISTEN y quita de L1 las claves avisadas."""
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name=f"cache-{channel}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        import psycopg
+
+        while True:
+            try:
+                params = connections[DEFAULT_DB_ALIAS].get_connection_params()
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {self.channel}")
+                    for notify in conn.notifies():
+                        self._dispatch(notify.payload)
+            except Exception:
+                logger.exception("Listener de cache %s caído; se reintenta", self.channel)
+            # Pudimos perder avisos mientras no había conexión: L1 fuera
+            for store in list(_stores.values()):
+                store.clear()
+            time.sleep(RECONNECT_DELAY)
+
+    def _dispatch(self, payload: str):
+        location, _, keys = payload.partition("\n")
+        store = _stores.get(location)
+        if store is None:
+            return
+        if keys == "*":
+            store.clear()
+        else:
+            store.evict(keys.split("\n"))
+
+
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    """
+    Backend de CACHES. LOCATION nombra el L1 (y va en los avisos). OPTIONS:
+    - SHARED: alias de la cache compartida (L2). Por defecto "default".
+    - L1_MAX_ENTRIES (1000) y L1_TIMEOUT (segundos en L1, 30).
+    - CHANNEL: canal de LISTEN/NOTIFY (por defecto "lava2_cache").
+    """
+
+    def __init__(self, location, params):
+        options = params.get("OPTIONS", {})
+        super().__init__(params)
+        self.location = location or "tiered"
+        self.shared_alias = options.get("SHARED", "default")
+        self.l1_timeout = options.get("L1_TIMEOUT", 30)
+        self.channel = options.get("CHANNEL", "lava2_cache")
+        self.local = _store_for(self.location, options.get("L1_MAX_ENTRIES", 1000))
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self.shared_alias]
+
+    # --- infraestructura --------------------------------------------------------------
+
+    def _notify_enabled(self) -> bool:
+        return connections[DEFAULT_DB_ALIAS].vendor == "postgresql"
+
+    def _ensure_listener(self):
+        # Por pid: con preload_app el master no debe dejar un hilo "heredado" (no sobrevive
+        # al fork); cada worker arranca el suyo en su primer uso de la cache
+        listener = _listeners.get(self.channel)
+        if listener is not None and listener.pid == os.getpid():
+            return
+        if not self._notify_enabled():
+            return
+        with _listeners_lock:
+            listener = _listeners.get(self.channel)
+            if listener is None or listener.pid != os.getpid():
+                self.local.clear()
+                _listeners[self.channel] = _Listener(self.channel)
+
+    def _broadcast(self, local_keys):
+        local_keys = list(local_keys)
+        self.local.evict(local_keys)
+        if not local_keys or not self._notify_enabled():
+            return
+        transaction.on_commit(lambda: self._publish(local_keys))
+
+    def _publish(self, local_keys):
+        chunks, current, size = [], [], 0
+        for key in local_keys:
+            if current and size + len(key) + 1 > NOTIFY_MAX_BYTES:
+                chunks.append(current)
+                current, size = [], 0
+            current.append(key)
+            size += len(key) + 1
+        chunks.append(current)
+        try:
+            with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                for chunk in chunks:
+                    payload = "\n".join([self.location, *chunk])
+                    cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+        except Exception:
+            # Sin aviso, los demás workers ven el valor viejo hasta L1_TIMEOUT
+            logger.exception("No se pudo avisar la invalidación de %s claves", len(local_keys))
+
+    def _local_key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def _ttl(self, timeout) -> float:
+        timeout = self._shared_timeout(timeout)
+        return self.l1_timeout if timeout is None else min(timeout, self.l1_timeout)
+
+    def _count(self, tier: str, result: str, amount: int = 1):
+        if amount:
+            CACHE_REQUESTS.inc((self.location, tier, result), amount)
+
+    # --- API de cache ---------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        self._ensure_listener()
+        local_key = self._local_key(key, version)
+        found, value = self.local.get(local_key)
+        if found:
+            self._count("l1", "hit")
+            return value
+        self._count("l1", "miss")
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            self._count("shared", "miss")
+            return default
+        self._count("shared", "hit")
+        self.local.set(local_key, value, self.l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._ensure_listener()
+        found, missing = {}, {}
+        for key in keys:
+            local_key = self._local_key(key, version)
+            hit, value = self.local.get(local_key)
+            if hit:
+                found[key] = value
+            else:
+                missing[key] = local_key
+        self._count("l1", "hit", len(found))
+        self._count("l1", "miss", len(missing))
+        if missing:
+            shared = self.shared.get_many(list(missing), version=version)
+            self._count("shared", "hit", len(shared))
+            self._count("shared", "miss", len(missing) - len(shared))
+            for key, value in shared.items():
+                self.local.set(missing[key], value, self.l1_timeout)
+            found.update(shared)
+        return found
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version=version) is not self
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+        shared_timeout = self._shared_timeout(timeout)
+        local_key = self._local_key(key, version)
+        # Clave nueva en L2: ningún otro L1 puede tenerla, no hace falta avisar
+        if not self.shared.add(key, value, timeout=shared_timeout, version=version):
+            self.shared.set(key, value, timeout=shared_timeout, version=version)
+            self._broadcast([local_key])
+        self.local.set(local_key, value, self._ttl(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+        added = self.shared.add(key, value, timeout=self._shared_timeout(timeout), version=version)
+        if added:
+            self._broadcast([self._local_key(key, version)])
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+        existing = self.shared.get_many(list(data), version=version)
+        failed = self.shared.set_many(data, timeout=self._shared_timeout(timeout), version=version)
+        local_keys = {key: self._local_key(key, version) for key in data}
+        # Solo las que se sobrescribieron pueden estar en el L1 de otros procesos
+        self._broadcast(local_keys[key] for key in existing)
+        ttl = self._ttl(timeout)
+        for key, value in data.items():
+            if key not in failed:
+                self.local.set(local_keys[key], value, ttl)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout=self._shared_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self._ensure_listener()
+        deleted = self.shared.delete(key, version=version)
+        self._broadcast([self._local_key(key, version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self._ensure_listener()
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        self._broadcast(self._local_key(key, version) for key in keys)
+
+    def incr(self, key, delta=1, version=None):
+        self._ensure_listener()
+        value = self.shared.incr(key, delta, version=version)
+        self._broadcast([self._local_key(key, version)])
+        return value
+
+    def clear(self):
+        # Solo L1 (en todos los procesos): L2 es compartida con sesiones y demás usos
+        self.local.clear()
+        if self._notify_enabled():
+            transaction.on_commit(lambda: self._publish_all())
+
+    def _publish_all(self):
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, f"{self.location}\n*"])
+
+    def _shared_timeout(self, timeout):
+        # DEFAULT_TIMEOUT de este backend, no el de L2
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
@@ -0,0 +1,37 @@
+# config/db.py
+"""
+Perfil de conexiones a PostgreSQL.
+
+Con `OPTIONS["pool"]` (Django 5.1+, psycopg3 + psycopg_pool) cada proceso mantiene un pool
+de conexiones ya autenticadas: un request toma una prestada y la devuelve al terminar, sin
+pagar TLS + auth + arranque del backend en cada petición.
+
+Dimensionamiento (DB_POOL_MAX_SIZE, por worker):
+- WSGI con gthread: cada hilo usa como mucho una conexión a la vez, así que basta con
+  `threads` conexiones (el valor por defecto).
+- ASGI con UvicornWorker: no hay tope de hilos. Cada petición en curso ejecuta el ORM en su
+  propio hilo de `sync_to_async` y retiene una conexión del pool mientras dura; con un pool
+  de `threads` la concurrencia real quedaría en 4 y el resto acabaría en PoolTimeout. Ahí el
+  pool debe cubrir las peticiones en curso que deja pasar el control de admisión
+  (ADMISSION_MAX_INFLIGHT_HIGH, config/admission.py), que es el valor por defecto con ese
+  worker.
+En total la app abre `workers × max_size` conexiones como máximo: debe quedar por debajo de
+`max_connections` de PostgreSQL (o del límite de pgbouncer) contando workers de colas y admin.
+
+La verificación al prestar una conexión no va aquí: Django ya pasa
+`check=ConnectionPool.check_connection` al pool cuando el alias tiene
+`CONN_HEALTH_CHECKS = True` (config/settings/base.py), y repetir `check` rompe el pool.
+"""
+
+
+def pool_options(max_size: int, min_size: int = 0, timeout: float = 10.0) -> dict:
+    """Argumentos de psycopg_pool.ConnectionPool para un worker de hasta `max_size` conexiones."""
+    return {
+        "min_size": min(min_size or 2, max_size),
+        "max_size": max_size,
+        # Espera máxima para obtener conexión; luego PoolTimeout (mejor fallar que colgarse)
+        "timeout": timeout,
+        # Recicla conexiones ociosas y viejas (failover, balanceo, fugas de memoria del backend)
+        "max_idle": 300,
+        "max_lifetime": 1800,
+    }
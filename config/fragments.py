@@ -0,0 +1,75 @@
+# config/fragments.py
+"""
+Cache de fragmentos por fila (tarjetas de servicio, filas de reservas y de vehículos).
+
+Cada fila se guarda con una clave derivada de:
+- la plantilla del fragmento (nombre + hash de su fuente: un deploy que la cambia invalida),
+- el `pk` y `updated_at` del objeto (TimeStampedModel),
+- los `updated_at` de los objetos relacionados que la fila muestra (p. ej. el servicio de
+  una reserva), para que renombrar un servicio regenere sus filas.
+
+Nunca hay que borrar claves: si el objeto cambia, cambia la clave y la vieja expira sola.
+Todas las filas de una página se piden con un único `get_many` y solo se renderizan (y se
+guardan con `set_many`) las que faltan.
+
+Ojo: `QuerySet.update()` no toca `updated_at`; quien actualice en bloque filas que se
+muestran aquí debe incluir `updated_at=timezone.now()`.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+KEY_PREFIX = "fragment"
+
+
+def _template_version(template) -> str:
+    source = getattr(template.template, "source", template.template.name)
+    return hashlib.sha1(source.encode()).hexdigest()[:12]
+
+
+def _stamp(obj) -> str:
+    return f"{obj.pk}.{obj.updated_at.timestamp():.6f}"
+
+
+def fragment_key(template_name: str, version: str, obj, related=()) -> str:
+    parts = [_stamp(obj), *(_stamp(r) for r in related if r is not None)]
+    return f"{KEY_PREFIX}:{template_name}:{version}:{':'.join(parts)}"
+
+
+def render_rows(template_name: str, objects, context_name: str, related=None) -> list:
+    """
+    Devuelve el HTML (seguro) de cada objeto, en el mismo orden, usando la cache.
+
+    - `context_name`: nombre de la variable con el objeto dentro del fragmento.
+    - `related`: función obj -> objetos relacionados que aparecen en la fila (ya cargados
+      con select_related); sus `updated_at` entran en la clave.
+
+    El fragmento solo ve el objeto: no debe depender del request (CSRF, usuario, mensajes).
+    """
+    objects = list(objects)
+    if not objects:
+        return []
+    cache = caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+    template = get_template(template_name)
+    version = _template_version(template)
+    keys = [
+        fragment_key(template_name, version, obj, related(obj) if related else ())
+        for obj in objects
+    ]
+
+    cached = cache.get_many(keys)
+    missing = {}
+    rows = []
+    for key, obj in zip(keys, objects):
+        html = cached.get(key)
+        if html is None:
+            html = template.render({context_name: obj})
+            missing[key] = html
+        rows.append(mark_safe(html))
+    if missing:
+        cache.set_many(missing, timeout=getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 86400))
+    return rows
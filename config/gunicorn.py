@@ -0,0 +1,40 @@
+# config/gunicorn.py
+# Uso: gunicorn -c config/gunicorn.py config.wsgi  (o config.asgi con UvicornWorker)
+# WEB_CONCURRENCY × DB_POOL_MAX_SIZE acota las conexiones a la BD (por defecto GUNICORN_THREADS;
+# con UvicornWorker, el tope de admisión: ver config/db.py y config/settings/production.py).
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# gthread para WSGI (config.wsgi); uvicorn.workers.UvicornWorker para ASGI (config.asgi)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+keepalive = 5
+# Recicla workers periódicamente (con jitter para no reiniciarlos todos a la vez)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+# Carga Django en el master antes del fork (memoria compartida copy-on-write) y calienta
+# cada worker antes de aceptar peticiones (config/warmup.py). Ojo: con preload, un cambio de
+# código exige reiniciar el master (HUP no basta).
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+WARMUP = os.environ.get("GUNICORN_WARMUP", "true").lower() == "true"
+
+
+def when_ready(server):
+    # Master, tras cargar la app con preload_app: plantillas y URLs quedan para todos
+    if WARMUP and preload_app:
+        from config import warmup
+
+        server.log.info("Warm-up (master): %s", warmup.summary(warmup.run(warmup.PRELOAD_STEPS)))
+
+
+def post_worker_init(worker):
+    # Worker ya con la app cargada, antes de aceptar conexiones
+    if WARMUP:
+        from config import warmup
+
+        timings = warmup.run(warmup.WORKER_STEPS if preload_app else warmup.STEPS)
+        worker.log.info("Warm-up (worker %s): %s", worker.pid, warmup.summary(timings))
@@ -0,0 +1,92 @@
+# config/health.py
+"""
+Endpoints para el balanceador:
+- /health/: liveness (el proceso responde), estático.
+- /ready/: readiness; comprueba BD y cache con timeouts cortos y devuelve 503 si algo falla,
+  para que el balanceador deje de enviar tráfico a ese worker.
+
+Las comprobaciones corren en paralelo en un pool propio y la respuesta espera como mucho
+READINESS_TIMEOUT_SECONDS: un connect() colgado (connect_timeout) o una cache que no
+contesta se informan como error a tiempo, sin bloquear el hilo que atiende la sonda. Si la
+comprobación anterior sigue colgada no se lanza otra: las sondas no acumulan hilos.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import JsonResponse
+
+
+def health(request):
+    return JsonResponse({"status": "ok", "app": "LAVA2"})
+
+
+def _check_database():
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Solo afecta a esta transacción
+            cursor.execute(
+                "SET LOCAL statement_timeout = %s", [f"{settings.READINESS_DB_TIMEOUT_MS}ms"]
+            )
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def _check_cache():
+    key, value = "readiness:probe", uuid.uuid4().hex
+    cache.set(key, value, 10)
+    if cache.get(key) != value:
+        raise RuntimeError("la cache no devolvió el valor escrito")
+
+
+CHECKS = {"database": _check_database, "cache": _check_cache}
+
+_executor = ThreadPoolExecutor(max_workers=len(CHECKS), thread_name_prefix="readiness")
+_running = {}  # nombre -> Future de la última comprobación lanzada
+_lock = threading.Lock()
+
+
+def _timed(check):
+    """Ejecuta una comprobación y devuelve (error o None, ms); nunca lanza."""
+    started = time.perf_counter()
+    error = None
+    try:
+        check()
+    except Exception as exc:
+        error = str(exc)[:200]
+    finally:
+        # Este hilo no pasa por request_finished: la conexión se suelta aquí
+        connection.close()
+    return error, round((time.perf_counter() - started) * 1000, 1)
+
+
+def ready(request):
+    timeout = settings.READINESS_TIMEOUT_SECONDS
+    results, futures = {}, {}
+    with _lock:
+        for name, check in CHECKS.items():
+            previous = _running.get(name)
+            if previous is not None and not previous.done():
+                results[name] = {"status": "error", "error": "la comprobación anterior no terminó"}
+            else:
+                futures[name] = _running[name] = _executor.submit(_timed, check)
+
+    wait(futures.values(), timeout=timeout)
+    for name, future in futures.items():
+        if not future.done():
+            results[name] = {"status": "error", "error": f"sin respuesta en {timeout}s"}
+            continue
+        error, ms = future.result()
+        results[name] = {"status": "error", "error": error} if error else {"status": "ok"}
+        results[name]["ms"] = ms
+
+    healthy = all(result["status"] == "ok" for result in results.values())
+    return JsonResponse(
+        {"status": "ok" if healthy else "unavailable", "checks": results},
+        status=200 if healthy else 503,
+    )
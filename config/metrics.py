@@ -0,0 +1,275 @@
+# config/metrics.py
+"""
+Métricas en formato de texto de Prometheus, sin dependencias externas.
+
+- `MetricsMiddleware` mide cada request (latencia por nombre de URL, nº y duración de
+  queries) con un par de perf_counter y un execute_wrapper: coste de microsegundos.
+- `metrics_view` (/metrics) expone los contadores del proceso y, en el momento del scrape,
+  la profundidad de las colas (QUEUED / PENDING) e info del worker.
+
+/metrics exige `Authorization: Bearer <METRICS_TOKEN>`; sin token configurado solo responde
+a IPs de METRICS_ALLOWED_NETWORKS (por defecto, loopback). Nunca queda abierto a Internet.
+
+Los valores son por proceso: con varios workers de gunicorn, cada scrape ve el worker que
+lo atiende (etiqueta `pid` en `lava2_worker_info`).
+"""
+
+import ipaddress
+import os
+import platform
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack
+
+import django
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROCESS_STARTED = time.time()
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name, self.help = name, help_text
+        self.values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1.0):
+        with self._lock:
+            self.values[labels] += amount
+
+    def collect(self, label_names):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self.values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(label_names, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.buckets = name, help_text, buckets
+        # labels -> [contadores por bucket..., +Inf], suma
+        self.counts = {}
+        self.sums = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.counts.get(labels)
+            if counts is None:
+                counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self.sums[labels] += value
+
+    def collect(self, label_names):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [
+                (labels, list(counts), self.sums[labels]) for labels, counts in self.counts.items()
+            ]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _labels(label_names + ("le",), labels + (str(bound),))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            cumulative += counts[-1]
+            inf = _labels(label_names + ("le",), labels + ("+Inf",))
+            yield f"{self.name}_bucket{inf} {cumulative}"
+            yield f"{self.name}_sum{_labels(label_names, labels)} {total}"
+            yield f"{self.name}_count{_labels(label_names, labels)} {cumulative}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+REQUEST_LABELS = ("view", "method", "status")
+VIEW_LABELS = ("view",)
+
+REQUEST_LATENCY = Histogram(
+    "lava2_http_request_duration_seconds", "Latencia de las peticiones HTTP por nombre de URL."
+)
+DB_QUERIES = Counter("lava2_db_queries_total", "Queries SQL ejecutadas, por vista.")
+DB_QUERY_SECONDS = Counter(
+    "lava2_db_query_duration_seconds_total", "Tiempo total en queries SQL, por vista."
+)
+REQUESTS_REJECTED = Counter(
+    "lava2_requests_rejected_total",
+    "Peticiones rechazadas antes de la vista (rate limit, control de admisión).",
+)
+REJECTED_LABELS = ("view", "reason")
+CACHE_REQUESTS = Counter(
+    "lava2_cache_requests_total", "Lecturas de la cache de dos niveles, por nivel y resultado."
+)
+CACHE_LABELS = ("cache", "tier", "result")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "lava2_db_queries_per_request",
+    "Queries SQL por petición.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+
+class _QueryTimer:
+    """execute_wrapper que solo acumula contador y tiempo (sin guardar el SQL)."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Sync y async: bajo ASGI no obliga a adaptar a sync la cadena de las vistas async."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with self._wrapped(timer):
+            response = self.get_response(request)
+        self._observe(request, response, timer, started)
+        return response
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        # Las conexiones son por hilo y el ORM async corre en el hilo sync_to_async de la
+        # petición: el execute_wrapper se instala (y se quita) en ese hilo.
+        stack = await sync_to_async(self._wrapped)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self._observe(request, response, timer, started)
+        return response
+
+    @staticmethod
+    def _wrapped(timer) -> ExitStack:
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(timer))
+        return stack
+
+    @staticmethod
+    def _observe(request, response, timer, started):
+        elapsed = time.perf_counter() - started
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        REQUEST_LATENCY.observe((view, request.method, f"{response.status_code // 100}xx"), elapsed)
+        DB_QUERIES.inc((view,), timer.count)
+        DB_QUERY_SECONDS.inc((view,), timer.seconds)
+        DB_QUERIES_PER_REQUEST.observe((view,), timer.count)
+
+
+def queue_depths():
+    """Profundidad de colas: COUNT sobre índices (parcial en notificaciones)."""
+    from notifications.models import Notification, NotificationStatus
+    from payments.models import Payment, PaymentStatus
+
+    return {
+        "notifications_queued": Notification.objects.filter(
+            status=NotificationStatus.QUEUED
+        ).count(),
+        "payments_pending": Payment.objects.filter(status=PaymentStatus.PENDING).count(),
+    }
+
+
+def render_metrics() -> str:
+    lines = []
+    lines += REQUEST_LATENCY.collect(REQUEST_LABELS)
+    lines += DB_QUERIES.collect(VIEW_LABELS)
+    lines += DB_QUERY_SECONDS.collect(VIEW_LABELS)
+    lines += DB_QUERIES_PER_REQUEST.collect(VIEW_LABELS)
+    lines += CACHE_REQUESTS.collect(CACHE_LABELS)
+    lines += REQUESTS_REJECTED.collect(REJECTED_LABELS)
+
+    lines += [
+        "# HELP lava2_queue_depth Elementos pendientes por cola.",
+        "# TYPE lava2_queue_depth gauge",
+    ]
+    for queue, depth in queue_depths().items():
+        lines.append(f'lava2_queue_depth{{queue="{queue}"}} {depth}')
+
+    from config.warmup import TIMINGS
+
+    if TIMINGS:
+        lines += [
+            "# HELP lava2_warmup_step_seconds Duración de cada paso del warm-up del worker.",
+            "# TYPE lava2_warmup_step_seconds gauge",
+        ]
+        lines += [
+            f'lava2_warmup_step_seconds{{step="{step}"}} {seconds}'
+            for step, seconds in TIMINGS.items()
+        ]
+
+    info = _labels(
+        ("pid", "python", "django"),
+        (os.getpid(), platform.python_version(), django.get_version()),
+    )
+    lines += [
+        "# HELP lava2_worker_info Información del proceso que responde.",
+        "# TYPE lava2_worker_info gauge",
+        f"lava2_worker_info{info} 1",
+        "# HELP lava2_process_start_time_seconds Inicio del proceso (epoch).",
+        "# TYPE lava2_process_start_time_seconds gauge",
+        f"lava2_process_start_time_seconds {PROCESS_STARTED}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _allowed_network(request) -> bool:
+    from config.ratelimit import client_ip  # ratelimit importa este módulo
+
+    try:
+        address = ipaddress.ip_address(client_ip(request))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = request.headers.get("Authorization") == f"Bearer {token}"
+    else:
+        allowed = _allowed_network(request)
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
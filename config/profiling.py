@@ -0,0 +1,248 @@
+# config/profiling.py
+"""
+Perfilado bajo demanda de una sola petición (solo staff).
+
+Se activa con la cabecera `X-Profile: 1` o con `?_profile=1` ("0" o vacío no cuentan). Sin
+la marca, el middleware solo mira la cabecera y la query string y pasa la petición tal cual.
+
+Hay una sola captura a la vez por proceso: desde Python 3.12 cProfile usa sys.monitoring,
+que es global (ve todos los hilos y `enable()` lanza ValueError si ya hay otro profiler).
+Si hay otra captura en curso, o cProfile no puede arrancar, la petición se atiende sin
+perfilar y se deja constancia en el log.
+
+Con la marca, y si el usuario es staff, guarda en PROFILING_DIR/<id>/:
+- `profile.prof`: cProfile (pstats) → `snakeviz profile.prof`
+- `sql.json`: línea de tiempo de queries (inicio y duración relativos al request, SQL)
+- `summary.json`: ruta, vista, status, tiempos totales (request, SQL, plantillas)
+
+y añade `Server-Timing` (visible en las DevTools del navegador) y `X-Profile-Id`.
+Solo se conservan los últimos PROFILING_KEEP perfiles.
+
+Bajo ASGI cProfile solo ve el hilo del event loop: lo que corre en sync_to_async (ORM,
+vistas sync) aparece como espera, pero la línea de tiempo SQL sí lo incluye.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import shutil
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HEADER = "HTTP_X_PROFILE"
+QUERY_PARAM = "_profile"
+OFF_VALUES = ("", "0", "false", "no")
+SQL_MAX_CHARS = 2000
+
+# Template.render (nivel superior): su tiempo acumulado es el render total de plantillas
+_TEMPLATE_RENDER = (
+    Template.render.__code__.co_filename,
+    Template.render.__code__.co_firstlineno,
+    "render",
+)
+
+
+# cProfile (sys.monitoring en 3.12+) es de todo el proceso: una captura a la vez
+_capture_lock = threading.Lock()
+
+
+def _flag(value) -> bool:
+    return value is not None and value.strip().lower() not in OFF_VALUES
+
+
+def is_requested(request) -> bool:
+    """Si la petición pide perfilado; GET solo se parsea si la query string lo menciona."""
+    if _flag(request.META.get(HEADER)):
+        return True
+    if f"{QUERY_PARAM}=" not in request.META.get("QUERY_STRING", ""):
+        return False
+    return _flag(request.GET.get(QUERY_PARAM))
+
+
+class _SQLTimeline:
+    """execute_wrapper que anota cada query con su inicio relativo y duración."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            self.entries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "start_ms": round((start - self.started) * 1000, 3),
+                    "duration_ms": round((end - start) * 1000, 3),
+                    "many": many,
+                    "sql": sql[:SQL_MAX_CHARS],
+                }
+            )
+
+    @property
+    def total_ms(self) -> float:
+        return sum(e["duration_ms"] for e in self.entries)
+
+
+class _Capture:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timeline = _SQLTimeline(self.started)
+        self.profiler = cProfile.Profile()
+        self.elapsed_ms = 0.0
+
+    def wrap_queries(self) -> ExitStack:
+        # Las conexiones son por hilo: se llama en el hilo que va a ejecutar las queries
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(self.timeline))
+        return stack
+
+    def stop(self):
+        try:
+            self.profiler.disable()
+        finally:
+            _capture_lock.release()
+        self.elapsed_ms = (time.perf_counter() - self.started) * 1000
+
+
+def _begin(request):
+    """Arranca una captura si el proceso no tiene otra en curso; si no, devuelve None."""
+    if not _capture_lock.acquire(blocking=False):
+        logger.info("Perfilado omitido en %s: ya hay una captura en curso", request.path)
+        return None
+    capture = _Capture()
+    try:
+        capture.profiler.enable()
+    except ValueError:  # 3.12+: otra herramienta tiene el perfilado de sys.monitoring
+        _capture_lock.release()
+        logger.warning("Perfilado omitido en %s: hay otro profiler activo", request.path)
+        return None
+    return capture
+
+
+def _template_ms(stats: pstats.Stats) -> float:
+    entry = stats.stats.get(_TEMPLATE_RENDER)
+    return round(entry[3] * 1000, 3) if entry else 0.0  # (cc, nc, tt, ct, callers)
+
+
+def _rotate(directory: str, keep: int):
+    entries = sorted(e for e in os.listdir(directory) if not e.startswith("."))
+    for name in entries[: max(len(entries) - keep, 0)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def save_capture(request, response, capture: _Capture):
+    """Escribe los archivos del perfil. Devuelve (id, resumen); el id es el directorio."""
+    profile_id = f"{timezone.now():%Y%m%dT%H%M%S.%f}-{uuid.uuid4().hex[:6]}"
+    base = settings.PROFILING_DIR
+    path = os.path.join(base, profile_id)
+    os.makedirs(path, exist_ok=True)
+
+    capture.profiler.dump_stats(os.path.join(path, "profile.prof"))
+    stats = pstats.Stats(capture.profiler)
+    match = getattr(request, "resolver_match", None)
+    summary = {
+        "id": profile_id,
+        "path": request.path,
+        "method": request.method,
+        "view": match.view_name if match else "",
+        "status": response.status_code,
+        "total_ms": round(capture.elapsed_ms, 3),
+        "sql_ms": round(capture.timeline.total_ms, 3),
+        "sql_queries": len(capture.timeline.entries),
+        "template_ms": _template_ms(stats),
+    }
+    with open(os.path.join(path, "sql.json"), "w", encoding="utf-8") as fh:
+        json.dump(capture.timeline.entries, fh, indent=1)
+    with open(os.path.join(path, "summary.json"), "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=1)
+
+    _rotate(base, settings.PROFILING_KEEP)
+    logger.info("Perfil %s guardado: %s %s", profile_id, request.method, request.path)
+    return profile_id, summary
+
+
+def _annotate(response, profile_id: str, summary: dict):
+    response["Server-Timing"] = ", ".join(
+        [
+            f"total;dur={summary['total_ms']}",
+            f'db;dur={summary["sql_ms"]};desc="{summary["sql_queries"]} queries"',
+            f"tpl;dur={summary['template_ms']}",
+        ]
+    )
+    response["X-Profile-Id"] = profile_id
+
+
+class ProfilingMiddleware:
+    """Va después de AuthenticationMiddleware (necesita saber si el usuario es staff)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not is_requested(request) or not request.user.is_staff:
+            return self.get_response(request)
+        capture = _begin(request)
+        if capture is None:
+            return self.get_response(request)
+        try:
+            with capture.wrap_queries():
+                response = self.get_response(request)
+        finally:
+            capture.stop()
+        self._finish(request, response, capture)
+        return response
+
+    async def __acall__(self, request):
+        if not is_requested(request):
+            return await self.get_response(request)
+        user = await request.auser()
+        if not user.is_staff:
+            return await self.get_response(request)
+        capture = _begin(request)
+        if capture is None:
+            return await self.get_response(request)
+        # El ORM async corre en el hilo sync_to_async de la petición: el wrapper va allí
+        try:
+            stack = await sync_to_async(capture.wrap_queries)()
+        except BaseException:
+            capture.stop()
+            raise
+        try:
+            response = await self.get_response(request)
+        finally:
+            capture.stop()
+            await sync_to_async(stack.close)()
+        self._finish(request, response, capture)
+        return response
+
+    def _finish(self, request, response, capture):
+        try:
+            profile_id, summary = save_capture(request, response, capture)
+        except OSError:
+            logger.exception("No se pudo guardar el perfil de %s", request.path)
+            return
+        _annotate(response, profile_id, summary)
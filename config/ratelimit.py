@@ -0,0 +1,171 @@
+# config/ratelimit.py
+"""
+Rate limiting por endpoint y por usuario/IP, con ventana deslizante en la cache compartida.
+
+RATE_LIMITS mapea nombres de URL a reglas "ámbito:cantidad/periodo":
+- ámbito `user` (usuario autenticado; anónimos cuentan por IP) o `ip`,
+- periodo `s`, `m`, `h` o `d` (p. ej. "ip:10/m", "user:100/h").
+
+Solo cuentan los métodos de RATE_LIMIT_METHODS (mostrar el formulario de login no gasta
+intentos). Ventana deslizante aproximada: contador de la ventana actual + el de la anterior
+ponderado por lo que aún se solapa; dos claves por regla e identidad, `incr` atómico en
+Redis. Los intentos rechazados también cuentan: quien insiste sigue bloqueado.
+
+Se responde 429 con `Retry-After` antes de llegar a la vista (sin transacción, sin locks
+ni hash Argon2). Si la cache falla, se deja pasar (fail open).
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse
+
+from config.metrics import REQUESTS_REJECTED
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+KEY_PREFIX = "rl"
+
+
+@dataclass(frozen=True)
+class Rule:
+    scope: str
+    limit: int
+    window: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Rule":
+        scope, _, rate = spec.partition(":")
+        count, _, period = rate.partition("/")
+        if scope not in ("user", "ip") or period not in PERIODS:
+            raise ValueError(f"Regla de rate limit inválida: {spec!r}")
+        return cls(scope, int(count), PERIODS[period])
+
+
+@lru_cache(maxsize=None)
+def rules_for(view_name: str) -> tuple:
+    return tuple(Rule.parse(spec) for spec in settings.RATE_LIMITS.get(view_name, ()))
+
+
+@receiver(setting_changed)
+def _reset_rules(*, setting, **kwargs):
+    if setting == "RATE_LIMITS":  # override_settings en tests
+        rules_for.cache_clear()
+
+
+def client_ip(request) -> str:
+    """IP del cliente; con RATE_LIMIT_PROXY_COUNT proxies de confianza, desde X-Forwarded-For."""
+    proxies = settings.RATE_LIMIT_PROXY_COUNT
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if proxies and forwarded:
+        hops = [h.strip() for h in forwarded.split(",") if h.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _identity(request, rule: Rule) -> str:
+    user = getattr(request, "user", None)
+    if rule.scope == "user" and user is not None and user.is_authenticated:
+        return f"u{user.pk}"
+    return f"ip{client_ip(request)}"
+
+
+def hit(cache, key: str, rule: Rule, now: float):
+    """Cuenta un intento. Devuelve (permitido, segundos hasta poder reintentar)."""
+    current = int(now // rule.window)
+    elapsed = now - current * rule.window
+    current_key, previous_key = f"{key}:{current}", f"{key}:{current - 1}"
+
+    cache.add(current_key, 0, timeout=rule.window * 2)
+    count = cache.incr(current_key)
+    previous = cache.get(previous_key) or 0
+    weight = (rule.window - elapsed) / rule.window
+    if previous * weight + count <= rule.limit:
+        return True, 0
+    if count > rule.limit or not previous:
+        retry = rule.window - elapsed  # hasta la próxima ventana
+    else:
+        # Hasta que el peso de la ventana anterior baje lo suficiente
+        retry = rule.window - elapsed - (rule.limit - count) * rule.window / previous
+    return False, max(1, math.ceil(retry))
+
+
+def check(request, view_name: str):
+    """None si la petición pasa; si no, (regla, retry_after) de la primera regla excedida."""
+    if request.method not in settings.RATE_LIMIT_METHODS:
+        return None
+    rules = rules_for(view_name)
+    if not rules:
+        return None
+    cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+    now = time.time()
+    try:
+        for rule in rules:
+            key = f"{KEY_PREFIX}:{view_name}:{rule.scope}:{rule.window}:{_identity(request, rule)}"
+            allowed, retry_after = hit(cache, key, rule, now)
+            if not allowed:
+                return rule, retry_after
+    except Exception:
+        logger.exception("Rate limit no disponible para %s; se deja pasar", view_name)
+    return None
+
+
+def too_many_requests(request, retry_after: int):
+    message = "Demasiados intentos. Vuelve a intentarlo en unos segundos."
+    if request.path.startswith("/api/"):
+        response = JsonResponse({"detail": message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type="text/plain; charset=utf-8")
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+class RateLimitMiddleware:
+    """
+    Va después de AuthenticationMiddleware: las reglas `user` necesitan request.user.
+    El chequeo está en process_view (ya se conoce el nombre de URL); bajo ASGI Django lo
+    ejecuta en el hilo sync de la petición.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        limited = check(request, view_name)
+        if limited is None:
+            return None
+        rule, retry_after = limited
+        REQUESTS_REJECTED.inc((view_name, "rate_limit"))
+        logger.info(
+            "Rate limit %s (%s:%s/%ss) para %s",
+            view_name,
+            rule.scope,
+            rule.limit,
+            rule.window,
+            _identity(request, rule),
+        )
+        return too_many_requests(request, retry_after)
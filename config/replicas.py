@@ -0,0 +1,139 @@
+# config/replicas.py
+"""
+Réplicas de lectura con "read-your-writes".
+
+- `ReplicaRouter`: las escrituras siempre van a `default` (primario). Las lecturas van a
+  una réplica (DATABASE_REPLICAS) solo dentro de una petición elegible; fuera de una
+  petición (comandos, colas, shell) todo va al primario salvo `with use_replicas():`.
+- Dentro de un `transaction.atomic()` sobre el primario (reservas, pagos) las lecturas
+  también van al primario: ven lo que la transacción acaba de escribir.
+- `ReplicaPinningMiddleware`: una petición GET/HEAD/OPTIONS sin la cookie de anclaje lee de
+  réplicas; cualquier otra, o si el router vio una escritura, lee del primario y deja una
+  cookie corta (REPLICA_STICKY_SECONDS) para que las siguientes peticiones del usuario
+  también lean del primario mientras la réplica se pone al día (ve su nueva reserva).
+
+Sin réplicas configuradas el router devuelve siempre `default`.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class _State:
+    """Estado de la petición/bloque actual. Mutable: los hilos de sync_to_async lo comparten."""
+
+    __slots__ = ("replicas", "wrote")
+
+    def __init__(self, replicas: bool):
+        self.replicas = replicas
+        self.wrote = False
+
+
+_state: ContextVar = ContextVar("lava2_replica_state", default=None)
+
+
+def _replicas_allowed() -> bool:
+    state = _state.get()
+    if state is None or not state.replicas or not settings.DATABASE_REPLICAS:
+        return False
+    # Lecturas dentro de una transacción del primario: deben ver sus propias escrituras
+    return not connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+@contextmanager
+def use_replicas():
+    """Lecturas a réplicas fuera de una petición (informes, exportaciones pesadas)."""
+    token = _state.set(_State(replicas=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Fuerza el primario (p. ej. leer justo después de escribir en una vista GET)."""
+    token = _state.set(_State(replicas=False))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replicas_allowed():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Incluye select_for_update: la petición ya no debe leer de réplicas
+            state.wrote = True
+            state.replicas = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Las réplicas reciben el esquema por replicación
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinningMiddleware:
+    """Va antes de SessionMiddleware: la carga de la sesión también sigue el anclaje."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(request, response, state)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(request, response, state)
+
+    @staticmethod
+    def _start(request):
+        pinned = settings.REPLICA_PIN_COOKIE in request.COOKIES
+        state = _State(replicas=request.method in SAFE_METHODS and not pinned)
+        return state, _state.set(state)
+
+    @staticmethod
+    def _finish(request, response, state):
+        if settings.DATABASE_REPLICAS and (state.wrote or request.method not in SAFE_METHODS):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
@@ -0,0 +1,86 @@
+# config/sessions.py
+"""
+Backend de sesiones para LAVA2: cache primero con escritura a la BD.
+
+- Lecturas: se sirven desde la cache; solo se consulta `django_session` si falta la entrada.
+- Escrituras: write-through (BD + cache), pero se omiten si el contenido no cambió
+  respecto a lo que se cargó (evita UPDATEs por sesiones "modificadas" con los mismos datos).
+- Limpieza: `clear_expired` borra por lotes (lo usa `manage.py clearsessions`),
+  así no hay un DELETE gigante bloqueando la tabla.
+"""
+
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(data) -> str:
+    payload = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class SessionStore(CachedDBStore):
+    """
+    Igual que `cached_db`, pero recuerda el hash de lo que cargó y no vuelve a
+    escribir si al final de la petición el contenido es idéntico.
+    """
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._loaded_digest = None
+
+    def load(self):
+        data = super().load()
+        self._loaded_digest = _digest(data)
+        return data
+
+    async def aload(self):
+        data = await super().aload()
+        self._loaded_digest = _digest(data)
+        return data
+
+    def _is_unchanged(self, must_create: bool) -> bool:
+        if must_create or self._loaded_digest is None or self.session_key is None:
+            return False
+        return _digest(self._get_session(no_load=True)) == self._loaded_digest
+
+    def save(self, must_create=False):
+        if self._is_unchanged(must_create):
+            return
+        super().save(must_create=must_create)
+        self._loaded_digest = _digest(self._session)
+
+    async def asave(self, must_create=False):
+        if self._is_unchanged(must_create):
+            return
+        await super().asave(must_create=must_create)
+        self._loaded_digest = _digest(self._session)
+
+    @classmethod
+    def clear_expired(cls):
+        """
+        Borra sesiones expiradas en lotes de `SESSION_CLEANUP_BATCH_SIZE`.
+        Cada lote es su propia sentencia (autocommit), así los locks duran poco.
+        """
+        model = cls.get_model_class()
+        batch_size = getattr(settings, "SESSION_CLEANUP_BATCH_SIZE", 5000)
+        now = timezone.now()
+        total = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=now).values_list("session_key", flat=True)[
+                    :batch_size
+                ]
+            )
+            if not keys:
+                break
+            deleted, _ = model.objects.filter(session_key__in=keys).delete()
+            total += deleted
+        logger.info("Sesiones expiradas eliminadas: %s", total)
+        return total
@@ -37,6 +37,7 @@ DJANGO_APPS = [
 THIRD_PARTY_APPS = [
     "rest_framework",
     "django_filters",
+    "drf_spectacular",
     "corsheaders",
     # "allauth", "allauth.account",  # (lo integraremos cuando armemos el registro/verificación)
 ]
@@ -49,17 +50,24 @@ LOCAL_APPS = [
     "bookings",
     "payments",
     "notifications",
+    "monitoring",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "config.metrics.MetricsMiddleware",  # primero: mide la petición completa
+    "config.admission.AdmissionControlMiddleware",  # sobrecarga: descarta baja prioridad
+    "config.replicas.ReplicaPinningMiddleware",  # antes de sesiones: réplica o primario
+    "monitoring.slow_queries.SlowQueryMiddleware",  # queries > SLOW_QUERY_MS → admin
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "config.profiling.ProfilingMiddleware",  # opt-in: X-Profile / ?_profile=1, solo staff
+    "config.ratelimit.RateLimitMiddleware",  # RATE_LIMITS por nombre de URL → 429
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -77,6 +85,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "notifications.context_processors.unread_notifications",
             ],
         },
     },
@@ -94,6 +103,13 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD", default="lava2_password"),
         "HOST": config("DB_HOST", default="localhost"),
         "PORT": config("DB_PORT", default="5432"),
+        # Sin pool (dev): conexiones persistentes opcionales, verificadas antes de reutilizarse
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=0, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Un PostgreSQL caído no debe colgar los workers (ni el chequeo de /ready/)
+            "connect_timeout": config("DB_CONNECT_TIMEOUT", default=5, cast=int),
+        },
         # DB_NAME=lava2_dev
         # DB_USER=lava2_user
         # DB_PASSWORD=lava2_password
@@ -102,6 +118,24 @@ DATABASES = {
     }
 }
 
+# Réplicas de lectura (config/replicas.py). Con DB_REPLICA_HOST se añade el alias "replica";
+# en tests es un espejo de `default` (misma BD de test), así el enrutado se ejerce igual.
+DB_REPLICA_HOST = config("DB_REPLICA_HOST", default="")
+if DB_REPLICA_HOST:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": config("DB_REPLICA_NAME", default=DATABASES["default"]["NAME"]),
+        "HOST": DB_REPLICA_HOST,
+        "PORT": config("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["config.replicas.ReplicaRouter"]
+# Segundos que un usuario lee del primario tras escribir (cookie de anclaje)
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=5, cast=int)
+REPLICA_PIN_COOKIE = "lava2_primary"
+
 # Hash de contraseñas: Argon2id (según tus reglas)
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.Argon2PasswordHasher",
@@ -129,7 +163,173 @@ MEDIA_ROOT = BASE_DIR / "media"
 # DRF (de momento básico; afinaremos al crear APIs)
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    # Solo JSON: el renderer navegable (HTML) es caro; development.py lo reactiva
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+    "DEFAULT_PAGINATION_CLASS": "config.api.ApiCursorPagination",
+    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+}
+
+# Pagos: proveedores por nombre (Payment.provider) y el usado para pagos nuevos
+PAYMENTS_PROVIDERS = {
+    "fake": "payments.providers.FakePaymentProvider",
+    "stripe": "payments.providers.StripePaymentProvider",
+}
+PAYMENTS_DEFAULT_PROVIDER = config("PAYMENTS_DEFAULT_PROVIDER", default="fake")
+PAYMENTS_CURRENCY = config("PAYMENTS_CURRENCY", default="USD")
+PAYMENTS_MAX_ATTEMPTS = config("PAYMENTS_MAX_ATTEMPTS", default=5, cast=int)
+PAYMENTS_RETRY_DELAY = config("PAYMENTS_RETRY_DELAY", default=60, cast=int)  # segundos
+STRIPE_SECRET_KEY = config("STRIPE_SECRET_KEY", default="")
+PAYMENTS_WEBHOOK_SECRETS = {
+    "fake": config("FAKE_WEBHOOK_SECRET", default="dev-webhook-secret"),
+    "stripe": config("STRIPE_WEBHOOK_SECRET", default=""),
+}
+# Segundos que un webhook espera a que aparezca su Payment antes de descartarse
+PAYMENTS_WEBHOOK_ORPHAN_TTL = config("PAYMENTS_WEBHOOK_ORPHAN_TTL", default=3600, cast=int)
+# Segundos entre reintentos de un webhook huérfano (mientras, no ocupa sitio en los lotes)
+PAYMENTS_WEBHOOK_ORPHAN_RETRY = config("PAYMENTS_WEBHOOK_ORPHAN_RETRY", default=30, cast=int)
+
+# Notificaciones: backend de envío por canal y concurrencia del dispatcher
+NOTIFICATION_BACKENDS = {
+    "EMAIL": "notifications.backends.EmailBackend",
+    "SMS": "notifications.providers.SMSBackend",
+    "PUSH": "notifications.providers.PushBackend",
+    "IN_APP": "notifications.backends.InAppBackend",
+}
+# Proveedores SMS/push: cliente, rate limit (envíos/s + ráfaga), concurrencia y circuit breaker
+NOTIFICATION_PROVIDERS = {
+    "SMS": {
+        "client": config("SMS_PROVIDER_CLIENT", default="notifications.providers.FakeSMSProvider"),
+        "rate": config("SMS_PROVIDER_RATE", default=10, cast=float),
+        "burst": 20,
+        "concurrency": 4,
+        "failure_threshold": 5,
+        "reset_timeout": 30,
+    },
+    "PUSH": {
+        "client": config(
+            "PUSH_PROVIDER_CLIENT", default="notifications.providers.FakePushProvider"
+        ),
+        "rate": config("PUSH_PROVIDER_RATE", default=50, cast=float),
+        "burst": 100,
+        "concurrency": 8,
+        "failure_threshold": 5,
+        "reset_timeout": 30,
+    },
+}
+NOTIFICATION_DISPATCH_WORKERS = config("NOTIFICATION_DISPATCH_WORKERS", default=8, cast=int)
+# Segundos que un lote reclamado queda reservado a su worker (debe cubrir el envío del lote)
+NOTIFICATION_CLAIM_TIMEOUT = config("NOTIFICATION_CLAIM_TIMEOUT", default=300, cast=int)
+# Backoff exponencial de los envíos aplazados: base × 2^(aplazamientos - 1), hasta el máximo
+NOTIFICATION_RETRY_BASE_SECONDS = config("NOTIFICATION_RETRY_BASE_SECONDS", default=15, cast=int)
+NOTIFICATION_RETRY_MAX_SECONDS = config("NOTIFICATION_RETRY_MAX_SECONDS", default=1800, cast=int)
+# Stream SSE de la bandeja: intervalo de chequeo (cache) y duración máxima de cada conexión
+NOTIFICATIONS_SSE_POLL_SECONDS = config("NOTIFICATIONS_SSE_POLL_SECONDS", default=2, cast=float)
+NOTIFICATIONS_SSE_MAX_SECONDS = config("NOTIFICATIONS_SSE_MAX_SECONDS", default=300, cast=int)
+# Días que se conservan las notificaciones SENT/FAILED (`manage.py purge_notifications`)
+NOTIFICATION_RETENTION_DAYS = config("NOTIFICATION_RETENTION_DAYS", default=90, cast=int)
+# Emails por llamada a send_messages sobre la misma conexión SMTP
+NOTIFICATION_EMAIL_BATCH_SIZE = config("NOTIFICATION_EMAIL_BATCH_SIZE", default=50, cast=int)
+DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="LAVA2 <no-reply@lava2.local>")
+
+# Observabilidad: timeout del chequeo de BD en /ready/ y espera máxima de toda la sonda
+READINESS_DB_TIMEOUT_MS = config("READINESS_DB_TIMEOUT_MS", default=500, cast=int)
+READINESS_TIMEOUT_SECONDS = config("READINESS_TIMEOUT_SECONDS", default=2, cast=float)
+# /metrics: con METRICS_TOKEN exige "Authorization: Bearer <token>"; sin él, solo desde estas redes
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_ALLOWED_NETWORKS = config(
+    "METRICS_ALLOWED_NETWORKS",
+    default="127.0.0.0/8,::1/128",
+    cast=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+)
+
+# Reservas: horario de atención y paso entre huecos (bookings:availability)
+BOOKINGS_OPENING_HOUR = config("BOOKINGS_OPENING_HOUR", default=8, cast=int)
+BOOKINGS_CLOSING_HOUR = config("BOOKINGS_CLOSING_HOUR", default=18, cast=int)
+BOOKINGS_SLOT_MINUTES = config("BOOKINGS_SLOT_MINUTES", default=30, cast=int)
+
+# Rate limiting (config/ratelimit.py): reglas "ámbito:cantidad/periodo" por nombre de URL,
+# contadas en la cache compartida. RATE_LIMIT_PROXY_COUNT: proxies de confianza delante
+# (la IP del cliente sale de X-Forwarded-For); 0 = usar REMOTE_ADDR.
+RATE_LIMITS = {
+    "bookings:create": ["user:10/m", "ip:30/m"],
+    "api_v1:booking-list": ["user:10/m", "ip:30/m"],  # POST = crear reserva
+    "users:login": ["ip:10/m", "ip:100/h"],
+    "users:register_step1": ["ip:5/h"],
 }
+RATE_LIMIT_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+RATE_LIMIT_CACHE_ALIAS = "default"
+RATE_LIMIT_PROXY_COUNT = config("RATE_LIMIT_PROXY_COUNT", default=0, cast=int)
+
+# Control de admisión (config/admission.py): máximo de peticiones en curso por proceso
+# (0 = apagado; las de alta prioridad tienen margen extra) y espera máxima en la cola del
+# proxy (X-Request-Start) para las de baja prioridad
+ADMISSION_MAX_INFLIGHT = config("ADMISSION_MAX_INFLIGHT", default=64, cast=int)
+ADMISSION_MAX_INFLIGHT_HIGH = config("ADMISSION_MAX_INFLIGHT_HIGH", default=96, cast=int)
+ADMISSION_MAX_QUEUE_MS = config("ADMISSION_MAX_QUEUE_MS", default=2000, cast=int)
+ADMISSION_RETRY_AFTER = 5
+ADMISSION_HIGH_PRIORITY = {
+    "bookings:create",
+    "bookings:edit",
+    "bookings:cancel",
+    "api_v1:booking-list",
+    "api_v1:booking-detail",
+    "api_v1:booking-cancel",
+    "payments:webhook",
+}
+ADMISSION_EXEMPT = {"health", "ready", "metrics"}
+
+# Perfilado por petición (config/profiling.py): destino y nº de perfiles que se conservan
+PROFILING_DIR = config("PROFILING_DIR", default=str(BASE_DIR / "var" / "profiles"))
+PROFILING_KEEP = config("PROFILING_KEEP", default=50, cast=int)
+
+# Log de queries lentas (monitoring): umbral (0 = apagado), fracción de SELECTs lentos con
+# EXPLAIN (ANALYZE, BUFFERS) y máximo de registros pendientes de guardar por proceso
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=200, cast=float)
+SLOW_QUERY_EXPLAIN_SAMPLE = config("SLOW_QUERY_EXPLAIN_SAMPLE", default=0.1, cast=float)
+SLOW_QUERY_MAX_PENDING = config("SLOW_QUERY_MAX_PENDING", default=100, cast=int)
+
+# Warm-up de workers (config/warmup.py): espera máxima a que el pool tenga min_size conexiones
+WARMUP_POOL_TIMEOUT = config("WARMUP_POOL_TIMEOUT", default=10.0, cast=float)
+
+# Caches: "default" es la compartida entre workers (Redis con REDIS_URL; locmem por proceso
+# si no) y "tiered" pone delante un LRU en memoria del proceso (config/cache.py) con
+# invalidación entre workers por LISTEN/NOTIFY. Sesiones y contadores usan "default".
+REDIS_URL = config("REDIS_URL", default="")
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+        if REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "lava2"}
+    ),
+    "tiered": {
+        "BACKEND": "config.cache.TwoTierCache",
+        "LOCATION": "tiered",
+        "OPTIONS": {
+            "SHARED": "default",
+            "L1_MAX_ENTRIES": config("CACHE_L1_MAX_ENTRIES", default=5000, cast=int),
+            "L1_TIMEOUT": config("CACHE_L1_TIMEOUT", default=30, cast=int),
+        },
+    },
+}
+# Contador de no leídas y marca del stream SSE (notifications/inbox.py) en "default": solo
+# sirven si la cache es compartida entre procesos. Con locmem se cuenta en la BD.
+NOTIFICATIONS_SHARED_CACHE = config(
+    "NOTIFICATIONS_SHARED_CACHE", default=bool(REDIS_URL), cast=bool
+)
+# Catálogo público (services/catalog.py) y perfiles (users/profiles.py) en "tiered"
+CATALOG_CACHE_TIMEOUT = config("CATALOG_CACHE_TIMEOUT", default=3600, cast=int)
+PROFILE_CACHE_TIMEOUT = config("PROFILE_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Cache de fragmentos por fila en los listados (config/fragments.py): claves inmutables,
+# ideales para el L1
+FRAGMENT_CACHE_ALIAS = "tiered"
+FRAGMENT_CACHE_TIMEOUT = config("FRAGMENT_CACHE_TIMEOUT", default=86400, cast=int)
+
+# Historial de reservas (bookings/audit.py): se escribe en diferido, en lotes, cada
+# BOOKING_AUDIT_FLUSH_INTERVAL segundos (0 = en el propio commit)
+BOOKING_AUDIT_FLUSH_INTERVAL = config("BOOKING_AUDIT_FLUSH_INTERVAL", default=1.0, cast=float)
+BOOKING_AUDIT_BATCH_SIZE = 500
+BOOKING_AUDIT_BUFFER_MAX = config("BOOKING_AUDIT_BUFFER_MAX", default=10000, cast=int)
 
 # CORS (abrimos en dev; en prod, dominios específicos)
 CORS_ALLOW_ALL_ORIGINS = config("CORS_ALLOW_ALL_ORIGINS", default="true").lower() == "true"
@@ -138,6 +338,12 @@ CORS_ALLOW_ALL_ORIGINS = config("CORS_ALLOW_ALL_ORIGINS", default="true").lower(
 CSRF_COOKIE_HTTPONLY = True  # dificulta CSRF via JS
 SESSION_COOKIE_HTTPONLY = True
 
+# Sesiones cache-first con escritura a BD; solo escribe si la sesión cambió (config/sessions.py)
+SESSION_ENGINE = "config.sessions"
+SESSION_CACHE_ALIAS = "default"
+# Tamaño de lote para `manage.py clearsessions` (borra expiradas sin locks largos)
+SESSION_CLEANUP_BATCH_SIZE = config("SESSION_CLEANUP_BATCH_SIZE", default=5000, cast=int)
+
 
 AUTH_USER_MODEL = "users.User"
 
@@ -157,3 +363,10 @@ MESSAGE_TAGS = {
     messages.WARNING: "warning",
     messages.ERROR: "error",
 }
+
+# Almacenamiento de mensajes flash: cookie por defecto para no forzar escrituras de sesión.
+# Usa "django.contrib.messages.storage.session.SessionStorage" o "...fallback.FallbackStorage"
+# si los mensajes no caben en la cookie.
+MESSAGE_STORAGE = config(
+    "MESSAGE_STORAGE", default="django.contrib.messages.storage.cookie.CookieStorage"
+)
@@ -5,3 +5,9 @@ ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
 
 # Emails a consola en dev (luego configuramos SMTP para notificaciones)
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+
+# API navegable solo en desarrollo
+REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+    "rest_framework.renderers.JSONRenderer",
+    "rest_framework.renderers.BrowsableAPIRenderer",
+]
@@ -1,3 +1,5 @@
+from config.db import pool_options
+
 from .base import *
 
 DEBUG = False
@@ -11,5 +13,39 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = "DENY"
 
 # WhiteNoise para estáticos (cuando montemos Docker/proxy)
-MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+MIDDLEWARE.insert(  # justo tras SecurityMiddleware
+    MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+)
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+
+# Pagos reales en producción
+PAYMENTS_DEFAULT_PROVIDER = config("PAYMENTS_DEFAULT_PROVIDER", default="stripe")
+
+# Email por SMTP (el canal EMAIL de notificaciones reutiliza la conexión por lote)
+EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_HOST = config("EMAIL_HOST", default="localhost")
+EMAIL_PORT = config("EMAIL_PORT", default=587, cast=int)
+EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="")
+EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="")
+EMAIL_USE_TLS = config("EMAIL_USE_TLS", default=True, cast=bool)
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=10, cast=int)
+
+# Pool de conexiones PostgreSQL (psycopg_pool), uno por worker de gunicorn: máximo
+# WEB_CONCURRENCY × DB_POOL_MAX_SIZE conexiones en total. Con gthread, una por hilo; con
+# UvicornWorker (ASGI) una por petición en curso, hasta el tope de admisión (config/db.py).
+GUNICORN_THREADS = config("GUNICORN_THREADS", default=4, cast=int)
+ASGI_WORKER = "uvicorn" in config("GUNICORN_WORKER_CLASS", default="gthread").lower()
+DB_POOL_MAX_SIZE = config(
+    "DB_POOL_MAX_SIZE",
+    default=ADMISSION_MAX_INFLIGHT_HIGH if ASGI_WORKER else GUNICORN_THREADS,
+    cast=int,
+)
+if config("DB_POOL", default=True, cast=bool):
+    for alias in DATABASES:  # primario y réplicas: un pool por alias
+        DATABASES[alias]["CONN_MAX_AGE"] = 0  # el pool gestiona la vida de las conexiones
+        DATABASES[alias]["OPTIONS"]["pool"] = pool_options(
+            max_size=DB_POOL_MAX_SIZE,
+            min_size=config("DB_POOL_MIN_SIZE", default=0, cast=int),
+            timeout=config("DB_POOL_TIMEOUT", default=10.0, cast=float),
+        )
@@ -0,0 +1,664 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.http import HttpResponse
+from django.template import engines
+from django.template.loader import get_template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Booking, BookingStatus
+from services.catalog import active_services
+from services.models import Service
+from users.models import User
+from vehicles.models import Vehicle
+
+from . import admission
+from . import gunicorn as gunicorn_conf
+from . import health, profiling, ratelimit, warmup
+from .cache import TwoTierCache, _Listener
+from .db import pool_options
+from .fragments import render_rows
+from .metrics import metrics_view
+from .replicas import ReplicaPinningMiddleware, ReplicaRouter, use_primary, use_replicas
+from .sessions import SessionStore
+
+router = ReplicaRouter()
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica"], REPLICA_PIN_COOKIE="pin", REPLICA_STICKY_SECONDS=5
+)
+class ReplicaPinningTests(SimpleTestCase):
+    def run_request(self, method="get", cookies=None, write=False):
+        """Pasa una petición por el middleware y devuelve (alias leídos, respuesta)."""
+        reads = []
+
+        def view(request):
+            reads.append(router.db_for_read(Booking))
+            if write:
+                router.db_for_write(Booking)
+                reads.append(router.db_for_read(Booking))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)("/")
+        request.COOKIES.update(cookies or {})
+        response = ReplicaPinningMiddleware(view)(request)
+        return reads, response
+
+    def test_safe_request_reads_from_replica(self):
+        reads, response = self.run_request()
+        self.assertEqual(reads, ["replica"])
+        self.assertNotIn("pin", response.cookies)
+
+    def test_unsafe_request_reads_primary_and_pins(self):
+        reads, response = self.run_request("post")
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS])
+        self.assertEqual(response.cookies["pin"]["max-age"], 5)
+
+    def test_pinned_request_reads_primary(self):
+        reads, response = self.run_request(cookies={"pin": "1"})
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS])
+
+    def test_write_during_get_switches_to_primary_and_pins(self):
+        reads, response = self.run_request(write=True)
+        self.assertEqual(reads, ["replica", DEFAULT_DB_ALIAS])
+        self.assertIn("pin", response.cookies)
+
+    def test_reads_inside_primary_transaction_stay_on_primary(self):
+        with use_replicas(), mock.patch.object(connection, "in_atomic_block", True):
+            self.assertEqual(router.db_for_read(Booking), DEFAULT_DB_ALIAS)
+
+    def test_outside_requests_default_to_primary(self):
+        self.assertEqual(router.db_for_read(Booking), DEFAULT_DB_ALIAS)
+        with use_replicas():
+            self.assertEqual(router.db_for_read(Booking), "replica")
+            with use_primary():
+                self.assertEqual(router.db_for_read(Booking), DEFAULT_DB_ALIAS)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate("replica", "bookings"))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, "bookings"))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_primary(self):
+        reads, response = self.run_request("post")
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS])
+        self.assertNotIn("pin", response.cookies)
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches["tiered"]
+        self.shared = self.cache.shared
+        self.cache.local.clear()
+        self.shared.clear()
+        self.published = []
+        for name, value in [
+            ("_notify_enabled", mock.Mock(return_value=True)),
+            ("_ensure_listener", mock.Mock()),
+            ("_publish", lambda _, keys: self.published.append(keys)),
+        ]:
+            patcher = mock.patch.object(TwoTierCache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Sin transacción abierta on_commit corre enseguida; aquí sin tocar la BD
+        patcher = mock.patch("config.cache.transaction.on_commit", side_effect=lambda f: f())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def local_key(self, key):
+        return self.cache.make_and_validate_key(key)
+
+    def test_l1_hit_skips_shared_tier(self):
+        self.cache.set("k", [1])
+        self.shared.delete("k")
+        self.assertEqual(self.cache.get("k"), [1])
+
+    def test_cached_values_are_copies(self):
+        self.cache.set("k", [1])
+        self.cache.get("k").append(2)
+        self.assertEqual(self.cache.get("k"), [1])
+
+    def test_new_key_is_not_broadcast(self):
+        self.cache.set("fragment", "<li>")
+        self.cache.set_many({"a": 1, "b": 2})
+        self.assertEqual(self.published, [])
+
+    def test_overwrite_and_delete_are_broadcast(self):
+        self.cache.set("k", 1)
+        self.cache.set("k", 2)
+        self.cache.set_many({"k": 3, "new": 4})
+        self.cache.delete("k")
+        key = self.local_key("k")
+        self.assertEqual(self.published, [[key], [key], [key]])
+        self.assertIsNone(self.cache.get("k"))
+
+    def test_notification_evicts_other_workers_l1(self):
+        self.cache.set("k", 1)
+        self.shared.set("k", 2)  # otro worker escribió en L2
+        self.assertEqual(self.cache.get("k"), 1)
+        listener = _Listener.__new__(_Listener)
+        listener._dispatch(f"{self.cache.location}\n{self.local_key('k')}")
+        self.assertEqual(self.cache.get("k"), 2)
+
+    def test_clear_notification_empties_l1(self):
+        self.cache.set("k", 1)
+        self.shared.delete("k")
+        _Listener.__new__(_Listener)._dispatch(f"{self.cache.location}\n*")
+        self.assertIsNone(self.cache.get("k"))
+
+
+class PoolOptionsTests(SimpleTestCase):
+    def test_sized_from_max_size(self):
+        options = pool_options(max_size=96, timeout=5.0)
+        self.assertEqual((options["min_size"], options["max_size"]), (2, 96))
+        self.assertEqual(options["timeout"], 5.0)
+
+    def test_min_size_never_exceeds_max_size(self):
+        self.assertEqual(pool_options(max_size=1)["min_size"], 1)
+        self.assertEqual(pool_options(max_size=4, min_size=8)["min_size"], 4)
+
+    def test_check_is_left_to_django(self):
+        # Django ya pasa `check` con CONN_HEALTH_CHECKS; repetirlo rompe ConnectionPool
+        self.assertNotIn("check", pool_options(max_size=4))
+
+
+@override_settings(READINESS_TIMEOUT_SECONDS=0.2)
+class ReadinessTests(TestCase):
+    def ready(self, **checks):
+        with mock.patch.dict(health.CHECKS, checks):
+            response = health.ready(RequestFactory().get("/ready/"))
+        return response.status_code, json.loads(response.content)["checks"]
+
+    def hanging(self):
+        release = threading.Event()
+        # Al terminar: soltar la comprobación colgada y esperarla, para no afectar a otros tests
+        self.addCleanup(lambda: [f.result(5) for f in list(health._running.values())])
+        self.addCleanup(release.set)
+        return lambda: release.wait(5)
+
+    def test_real_checks_pass(self):
+        status, checks = self.ready()
+        self.assertEqual(status, 200)
+        self.assertEqual({c["status"] for c in checks.values()}, {"ok"})
+
+    def test_failing_check_returns_503(self):
+        def broken():
+            raise RuntimeError("cache caída")
+
+        status, checks = self.ready(cache=broken)
+        self.assertEqual(status, 503)
+        self.assertEqual(checks["cache"]["error"], "cache caída")
+        self.assertEqual(checks["database"]["status"], "ok")
+
+    def test_hanging_check_is_bounded(self):
+        hang = self.hanging()
+        started = time.monotonic()
+        status, checks = self.ready(database=hang)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(status, 503)
+        self.assertIn("sin respuesta", checks["database"]["error"])
+        self.assertEqual(checks["cache"]["status"], "ok")
+
+        # La sonda siguiente no lanza otra comprobación mientras la anterior siga colgada
+        with mock.patch.object(health._executor, "submit", wraps=health._executor.submit) as submit:
+            status, checks = self.ready(database=hang)
+        self.assertEqual(status, 503)
+        self.assertEqual(submit.call_count, 1)  # solo la cache
+        self.assertIn("no terminó", checks["database"]["error"])
+
+
+class MetricsAccessTests(TestCase):
+    def get(self, remote_addr="127.0.0.1", **headers):
+        request = RequestFactory().get("/metrics", REMOTE_ADDR=remote_addr, headers=headers)
+        return metrics_view(request)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_without_token_only_allowed_networks(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"lava2_worker_info", response.content)
+        self.assertEqual(self.get("203.0.113.7").status_code, 403)
+        self.assertEqual(self.get("no-es-una-ip").status_code, 403)
+
+    @override_settings(
+        METRICS_TOKEN="", METRICS_ALLOWED_NETWORKS=["10.0.0.0/8"], RATE_LIMIT_PROXY_COUNT=1
+    )
+    def test_networks_use_the_client_ip_behind_the_proxy(self):
+        self.assertEqual(self.get("127.0.0.1", x_forwarded_for="10.1.2.3").status_code, 200)
+        self.assertEqual(self.get("10.0.0.1", x_forwarded_for="203.0.113.7").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secreto")
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(authorization="Bearer otro").status_code, 403)
+        self.assertEqual(self.get(authorization="Bearer secreto").status_code, 200)
+
+
+class ProfilingTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(PROFILING_DIR=tmp.name, PROFILING_KEEP=5))
+        self.dir = tmp.name
+        self.calls = 0
+
+    def view(self, request):
+        self.calls += 1
+        return HttpResponse("ok")
+
+    def request(self, query="_profile=1", staff=True, **extra):
+        request = RequestFactory().get(f"/?{query}", **extra)
+        request.user = SimpleNamespace(is_staff=staff)
+        return request
+
+    def run_request(self, request):
+        return profiling.ProfilingMiddleware(self.view)(request)
+
+    def test_is_requested_parses_the_query_string(self):
+        for query, expected in [
+            ("_profile=1", True),
+            ("a=1&_profile=yes", True),
+            ("_profile=0", False),
+            ("_profile=", False),
+            ("x_profile=1", False),
+            ("q=_profile%3D1", False),
+        ]:
+            with self.subTest(query=query):
+                self.assertIs(profiling.is_requested(self.request(query)), expected)
+        self.assertTrue(profiling.is_requested(self.request("", HTTP_X_PROFILE="1")))
+        self.assertFalse(profiling.is_requested(self.request("", HTTP_X_PROFILE="0")))
+
+    def test_staff_request_is_captured(self):
+        response = self.run_request(self.request())
+        profile_id = response["X-Profile-Id"]
+        self.assertIn("total;dur=", response["Server-Timing"])
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.dir, profile_id))),
+            ["profile.prof", "sql.json", "summary.json"],
+        )
+        self.assertFalse(profiling._capture_lock.locked())
+
+    def test_non_staff_is_not_profiled(self):
+        response = self.run_request(self.request(staff=False))
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_concurrent_capture_is_skipped(self):
+        with profiling._capture_lock, self.assertLogs("config.profiling", "INFO"):
+            response = self.run_request(self.request())
+        self.assertEqual(self.calls, 1)
+        self.assertNotIn("X-Profile-Id", response)
+
+    def test_active_profiler_is_skipped(self):
+        with mock.patch(
+            "cProfile.Profile.enable", side_effect=ValueError("Another profiling tool is active")
+        ), self.assertLogs("config.profiling", "WARNING"):
+            response = self.run_request(self.request())
+        self.assertEqual(self.calls, 1)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(profiling._capture_lock.locked())
+
+    def test_lock_is_released_when_the_view_raises(self):
+        def broken(request):
+            raise RuntimeError("fallo")
+
+        with self.assertRaises(RuntimeError):
+            profiling.ProfilingMiddleware(broken)(self.request())
+        self.assertFalse(profiling._capture_lock.locked())
+
+    def test_async_request_is_captured(self):
+        async def view(request):
+            return HttpResponse("ok")
+
+        async def auser():
+            return SimpleNamespace(is_staff=True)
+
+        request = self.request()
+        request.auser = auser
+        response = async_to_sync(profiling.ProfilingMiddleware(view))(request)
+        self.assertIn("X-Profile-Id", response)
+        self.assertFalse(profiling._capture_lock.locked())
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        store = SessionStore()
+        store["cart"] = [1, 2]
+        store.save(must_create=True)
+        self.key = store.session_key
+
+    def loaded(self):
+        store = SessionStore(self.key)
+        store.load()
+        return store
+
+    def test_unchanged_session_is_not_written(self):
+        store = self.loaded()
+        store["cart"] = [1, 2]  # marcada como modificada, mismos datos
+        self.assertTrue(store.modified)
+        with self.assertNumQueries(0), mock.patch.object(store._cache, "set") as cache_set:
+            store.save()
+        cache_set.assert_not_called()
+
+    def test_modified_session_is_written_to_db_and_cache(self):
+        store = self.loaded()
+        store["cart"] = [1, 2, 3]
+        with CaptureQueriesContext(connection) as queries:
+            store.save()
+        self.assertTrue(queries.captured_queries)
+        self.assertEqual(Session.objects.get(pk=self.key).get_decoded()["cart"], [1, 2, 3])
+        self.assertEqual(caches["default"].get(store.cache_key)["cart"], [1, 2, 3])
+
+        # El hash se renueva: guardar otra vez lo mismo ya no escribe
+        with self.assertNumQueries(0):
+            store.save()
+
+    def test_unchanged_session_is_not_written_async(self):
+        async def save_unchanged():
+            store = SessionStore(self.key)
+            await store.aload()
+            store["cart"] = [1, 2]
+            with mock.patch.object(store._cache, "aset") as cache_set:
+                await store.asave()
+            return cache_set
+
+        with self.assertNumQueries(0):
+            cache_set = async_to_sync(save_unchanged)()
+        cache_set.assert_not_called()
+
+    @override_settings(SESSION_CLEANUP_BATCH_SIZE=2)
+    def test_clear_expired_deletes_in_batches(self):
+        expired = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(session_key=f"expirada{i}", session_data="", expire_date=expired)
+            for i in range(5)
+        )
+        with CaptureQueriesContext(connection) as queries, self.assertLogs("config.sessions"):
+            self.assertEqual(SessionStore.clear_expired(), 5)
+
+        deletes = [q for q in queries.captured_queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(list(Session.objects.values_list("pk", flat=True)), [self.key])
+
+
+@override_settings(FRAGMENT_CACHE_ALIAS="default")
+class FragmentCacheTests(TestCase):
+    template = "bookings/_booking_row.html"
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email="cliente@example.com", password="x")
+        vehicle = Vehicle.objects.create(
+            owner=user, plate="ABC123", make="Mazda", model="3", year=2020
+        )
+        cls.wash = Service.objects.create(name="Lavado", price=10, duration_minutes=30)
+        cls.wax = Service.objects.create(name="Encerado", price=20, duration_minutes=60)
+        cls.bookings = [
+            Booking.objects.create(
+                user=user,
+                vehicle=vehicle,
+                service=service,
+                scheduled_at=timezone.now() + timedelta(days=i + 1),
+            )
+            for i, service in enumerate([cls.wash, cls.wax])
+        ]
+
+    def setUp(self):
+        self.cache = caches["default"]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+    def render(self):
+        bookings = Booking.objects.select_related("vehicle", "service").order_by("scheduled_at")
+        with mock.patch.object(
+            self.cache, "get_many", wraps=self.cache.get_many
+        ) as get_many, mock.patch.object(
+            self.cache, "set_many", wraps=self.cache.set_many
+        ) as set_many:
+            rows = render_rows(
+                self.template, bookings, "b", related=lambda b: (b.vehicle, b.service)
+            )
+        self.assertEqual(get_many.call_count, 1)  # una sola lectura por página
+        stored = set_many.call_args.args[0] if set_many.called else {}
+        return rows, stored
+
+    def test_missing_rows_are_rendered_and_stored_together(self):
+        rows, stored = self.render()
+        self.assertEqual(len(stored), 2)
+        self.assertIn("Lavado", rows[0])
+        self.assertIn("Encerado", rows[1])
+
+        with mock.patch("django.template.backends.django.Template.render") as render:
+            again, stored = self.render()
+        render.assert_not_called()
+        self.assertEqual((again, stored), (rows, {}))
+
+    def test_related_object_change_invalidates_only_its_rows(self):
+        self.render()
+        self.wash.name = "Lavado premium"
+        self.wash.save()
+
+        rows, stored = self.render()
+        self.assertEqual(len(stored), 1)
+        self.assertIn("Lavado premium", rows[0])
+        self.assertIn("Encerado", rows[1])
+
+    def test_own_change_invalidates_the_row(self):
+        self.render()
+        booking = self.bookings[1]
+        booking.notes = "Con aspirado"
+        booking.status = BookingStatus.CONFIRMED
+        booking.save()
+
+        rows, stored = self.render()
+        self.assertEqual(len(stored), 1)
+        self.assertIn("CONFIRMED", rows[1])
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        caches["tiered"].clear()
+        caches["default"].clear()
+        for name in ("Lavado", "Encerado", "Pulido"):
+            Service.objects.create(name=name, price=10, duration_minutes=30)
+
+    def test_catalog_step_primes_catalog_and_cards_with_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(warmup.prime_catalog_cache(), "3 servicios")
+
+        # La primera petición del worker ya no va a la BD ni renderiza tarjetas
+        with self.assertNumQueries(0), mock.patch(
+            "django.template.backends.django.Template.render"
+        ) as render:
+            services = active_services()
+            render_rows("services/_service_card.html", services, "s")
+        render.assert_not_called()
+
+    def test_templates_step_fills_the_cached_loader(self):
+        for loader in engines["django"].engine.template_loaders:
+            loader.reset()  # en frío, como un worker recién arrancado
+        detail = warmup.compile_templates()
+        self.assertGreater(int(detail.split()[0]), 0)
+        with mock.patch("django.template.loaders.filesystem.Loader.get_contents") as get_contents:
+            get_template("bookings/_booking_row.html")
+        get_contents.assert_not_called()
+
+
+class WarmupRunTests(SimpleTestCase):
+    def test_failed_step_is_logged_and_the_rest_run(self):
+        def broken():
+            raise RuntimeError("sin BD")
+
+        conn = mock.Mock()
+        steps = [("broken", broken), ("ok", lambda: "listo")]
+        with mock.patch.object(warmup.connections, "all", return_value=[conn]), self.assertLogs(
+            "config.warmup"
+        ) as logs:
+            timings = warmup.run(steps)
+
+        self.assertEqual(list(timings), ["broken", "ok"])
+        self.assertIn("falló el paso broken", logs.output[0])
+        conn.close.assert_called_once()  # nada abierto antes del fork
+
+    def test_gunicorn_hooks_pick_steps_by_preload(self):
+        worker, server = mock.Mock(pid=1), mock.Mock()
+        with mock.patch("config.warmup.run", return_value={}) as run:
+            gunicorn_conf.when_ready(server)
+            gunicorn_conf.post_worker_init(worker)
+            with mock.patch.object(gunicorn_conf, "preload_app", False):
+                gunicorn_conf.when_ready(server)
+                gunicorn_conf.post_worker_init(worker)
+            with mock.patch.object(gunicorn_conf, "WARMUP", False):
+                gunicorn_conf.post_worker_init(worker)
+
+        self.assertEqual(
+            [c.args[0] for c in run.call_args_list],
+            [warmup.PRELOAD_STEPS, warmup.WORKER_STEPS, warmup.STEPS],
+        )
+
+
+class SlidingWindowTests(SimpleTestCase):
+    rule = ratelimit.Rule("ip", 10, 60)
+    start = 6000.0  # inicio de una ventana de 60 s
+
+    def setUp(self):
+        self.cache = caches["default"]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+    def hit(self, now):
+        return ratelimit.hit(self.cache, "rl:test", self.rule, now)
+
+    def test_limit_within_a_window(self):
+        for _ in range(10):
+            self.assertEqual(self.hit(self.start + 59), (True, 0))
+        self.assertEqual(self.hit(self.start + 59), (False, 1))  # hasta la ventana siguiente
+
+    def test_previous_window_weighs_at_the_boundary(self):
+        for _ in range(11):  # el rechazado también cuenta
+            self.hit(self.start + 59)
+        # Recién empezada la ventana siguiente la anterior pesa entera: 11 + 1 > 10
+        allowed, retry_after = self.hit(self.start + 60)
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 11)  # 60 - 9 × 60 / 11 ≈ 10,9
+        # A mitad de ventana pesa la mitad: 5,5 + 2 <= 10
+        self.assertEqual(self.hit(self.start + 90), (True, 0))
+
+    def test_window_after_next_forgets_the_burst(self):
+        for _ in range(11):
+            self.hit(self.start)
+        self.assertEqual(self.hit(self.start + 120), (True, 0))
+
+
+class RateLimitMiddlewareTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.addCleanup(caches["default"].clear)
+
+    @override_settings(RATE_LIMITS={"users:login": ["ip:2/m"]})
+    def test_html_endpoint_answers_429_with_retry_after(self):
+        url = reverse("users:login")
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)  # GET no cuenta
+        for _ in range(2):
+            self.assertNotEqual(self.client.post(url, {}).status_code, 429)
+        with self.assertLogs("config.ratelimit", "INFO"):
+            response = self.client.post(url, {})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        # Otra IP tiene su propio contador
+        self.assertNotEqual(self.client.post(url, {}, REMOTE_ADDR="10.0.0.9").status_code, 429)
+
+    @override_settings(RATE_LIMITS={"api_v1:booking-list": ["ip:1/m"]})
+    def test_api_endpoint_answers_json(self):
+        url = reverse("api_v1:booking-list")
+        self.client.post(url, {}, "application/json")
+        with self.assertLogs("config.ratelimit", "INFO"):
+            response = self.client.post(url, {}, "application/json")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("detail", response.json())
+        self.assertIn("Retry-After", response)
+
+    @override_settings(RATE_LIMITS={"users:login": ["ip:1/m"]})
+    def test_cache_failure_lets_requests_through(self):
+        url = reverse("users:login")
+        with mock.patch(
+            "config.ratelimit.hit", side_effect=ConnectionError("redis caído")
+        ), self.assertLogs("config.ratelimit", "ERROR"):
+            for _ in range(3):
+                self.assertNotEqual(self.client.post(url, {}).status_code, 429)
+
+
+@override_settings(ADMISSION_MAX_INFLIGHT=1, ADMISSION_MAX_INFLIGHT_HIGH=2, ADMISSION_RETRY_AFTER=5)
+class AdmissionControlTests(SimpleTestCase):
+    low = "/services/"
+    high = "/bookings/create/"
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.nested = []
+
+    def middleware(self, inner=None):
+        """Middleware cuya vista, si se indica, atiende otra petición mientras sigue en curso."""
+
+        def view(request):
+            if inner is not None:
+                self.nested.append(self.middleware()(inner))
+            return HttpResponse()
+
+        return admission.AdmissionControlMiddleware(view)
+
+    def test_saturated_worker_rejects_low_priority_with_503(self):
+        with self.assertLogs("config.admission", "WARNING"):
+            response = self.middleware(inner=self.factory.get(self.low))(self.factory.get(self.low))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.nested[0].status_code, 503)
+        self.assertEqual(self.nested[0]["Retry-After"], "5")
+        self.assertEqual(admission._inflight.count, 0)
+
+    def test_high_priority_and_exempt_use_their_own_margin(self):
+        for inner in (self.factory.post(self.high), self.factory.get("/health/")):
+            with self.subTest(path=inner.path):
+                self.nested.clear()
+                self.middleware(inner=inner)(self.factory.get(self.low))
+                self.assertEqual(self.nested[0].status_code, 200)
+
+    def test_slot_is_released_when_the_view_raises(self):
+        def broken(request):
+            raise RuntimeError("fallo")
+
+        with self.assertRaises(RuntimeError):
+            admission.AdmissionControlMiddleware(broken)(self.factory.get(self.low))
+        self.assertEqual(admission._inflight.count, 0)
+
+        async def abroken(request):
+            raise RuntimeError("fallo")
+
+        with self.assertRaises(RuntimeError):
+            async_to_sync(admission.AdmissionControlMiddleware(abroken))(self.factory.get(self.low))
+        self.assertEqual(admission._inflight.count, 0)
+
+    def test_requests_queued_too_long_are_shed_unless_high_priority(self):
+        started = f"t={time.time() - 5:.3f}"  # 5 s en la cola del proxy
+        middleware = self.middleware()
+        with self.assertLogs("config.admission", "WARNING"):
+            response = middleware(self.factory.get(self.low, HTTP_X_REQUEST_START=started))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+        response = middleware(self.factory.post(self.high, HTTP_X_REQUEST_START=started))
+        self.assertEqual(response.status_code, 200)
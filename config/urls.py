@@ -1,17 +1,19 @@
 from django.contrib import admin
-from django.http import JsonResponse
 from django.urls import include, path
 
-
-def health(request):
-    return JsonResponse({"status": "ok", "app": "LAVA2"})
-
+from .health import health, ready
+from .metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("health/", health),
+    path("health/", health, name="health"),
+    path("ready/", ready, name="ready"),
+    path("metrics", metrics_view, name="metrics"),
     path("users/", include("users.urls")),
     path("vehicles/", include("vehicles.urls")),
     path("services/", include("services.urls")),
     path("bookings/", include("bookings.urls")),
+    path("payments/", include("payments.urls")),
+    path("notifications/", include("notifications.urls")),
+    path("api/v1/", include("config.api_urls")),
 ]
@@ -0,0 +1,134 @@
+# config/warmup.py
+"""
+Calentamiento de workers: que la primera petición tras un deploy (o tras reciclar un worker
+por max_requests) cueste lo mismo que las siguientes.
+
+Pasos, cada uno cronometrado (log `config.warmup` y `lava2_warmup_step_seconds` en /metrics):
+- `imports`: clases de DRF/drf_spectacular referenciadas en settings y catálogo de traducción.
+- `templates`: compila todas las plantillas de TEMPLATES["DIRS"] (quedan en el loader cacheado).
+- `urls`: puebla los resolvers de todos los namespaces (reverse/resolve ya no los construyen).
+- `connections`: abre la conexión de cada alias (con pool: espera a tener `min_size`).
+- `catalog`: carga el catálogo público y sus tarjetas en la cache (services/catalog.py).
+
+Con `preload_app` (config/gunicorn.py) los tres primeros corren una vez en el master antes
+del fork y los workers los heredan; los que tocan BD o cache por proceso (`WORKER_STEPS`)
+corren en cada worker. Un paso que falla se registra y no impide arrancar.
+"""
+
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+# Resultado del último calentamiento de este proceso: paso -> segundos
+TIMINGS = {}
+
+
+def import_modules() -> str:
+    from rest_framework.settings import api_settings
+
+    names = [
+        "DEFAULT_RENDERER_CLASSES",
+        "DEFAULT_PARSER_CLASSES",
+        "DEFAULT_AUTHENTICATION_CLASSES",
+        "DEFAULT_PERMISSION_CLASSES",
+        "DEFAULT_FILTER_BACKENDS",
+        "DEFAULT_PAGINATION_CLASS",
+        "DEFAULT_SCHEMA_CLASS",
+    ]
+    for name in names:
+        getattr(api_settings, name)  # perform_import: importa y cachea la clase
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+    return f"{len(names)} ajustes DRF"
+
+
+def compile_templates() -> str:
+    compiled = 0
+    for directory in settings.TEMPLATES[0]["DIRS"]:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith((".html", ".txt")):
+                    continue
+                name = os.path.relpath(os.path.join(root, filename), directory)
+                get_template(name.replace(os.sep, "/"))
+                compiled += 1
+    return f"{compiled} plantillas"
+
+
+def _populate(resolver: URLResolver) -> int:
+    # reverse_dict construye (y cachea) el índice del resolver; se recorre cada namespace
+    names = sum(1 for key in resolver.reverse_dict if isinstance(key, str))
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            names += _populate(pattern)
+    return names
+
+
+def resolve_urls() -> str:
+    return f"{_populate(get_resolver())} nombres de URL"
+
+
+def open_connections() -> str:
+    for alias in connections:
+        conn = connections[alias]
+        conn.ensure_connection()
+        pool = getattr(conn, "pool", None)
+        if pool is not None:
+            pool.wait(timeout=settings.WARMUP_POOL_TIMEOUT)
+        # Sin pool la conexión es de este hilo y los hilos del worker no la usan: fuera
+        conn.close()
+    return ", ".join(connections)
+
+
+def prime_catalog_cache() -> str:
+    from config.fragments import render_rows
+    from services.catalog import active_services
+
+    services = active_services()
+    render_rows("services/_service_card.html", services, "s")
+    return f"{len(services)} servicios"
+
+
+PRELOAD_STEPS = [
+    ("imports", import_modules),
+    ("templates", compile_templates),
+    ("urls", resolve_urls),
+]
+WORKER_STEPS = [
+    ("connections", open_connections),
+    ("catalog", prime_catalog_cache),
+]
+STEPS = PRELOAD_STEPS + WORKER_STEPS
+
+
+def summary(timings: dict) -> str:
+    return ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items())
+
+
+def run(steps=STEPS) -> dict:
+    """Ejecuta los pasos en orden y devuelve sus tiempos (segundos)."""
+    started = time.perf_counter()
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            detail = step()
+        except Exception:
+            logger.exception("Warm-up: falló el paso %s", name)
+            detail = "error"
+        TIMINGS[name] = time.perf_counter() - step_started
+        logger.info("Warm-up %s: %.1f ms (%s)", name, TIMINGS[name] * 1000, detail)
+    # Nada de conexiones abiertas en este hilo (ni, en el master, antes del fork)
+    for conn in connections.all(initialized_only=True):
+        conn.close()
+    logger.info(
+        "Warm-up completo en %.1f ms (pid %s)", (time.perf_counter() - started) * 1000, os.getpid()
+    )
+    return {name: TIMINGS[name] for name, _ in steps}
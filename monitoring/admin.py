@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+from .models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Log de queries lentas: solo lectura para staff (lo escribe monitoring/slow_queries.py)."""
+
+    list_display = ("created_at", "fingerprint", "duration_ms", "view", "alias", "has_plan")
+    list_filter = ("view", "alias")
+    search_fields = ("fingerprint", "normalized_sql", "view")
+    date_hierarchy = "created_at"
+    readonly_fields = [f.name for f in SlowQuery._meta.fields]
+
+    @admin.display(boolean=True, description="Plan")
+    def has_plan(self, obj):
+        return bool(obj.plan)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, db_index=True)),
+                ("fingerprint", models.CharField(db_index=True, max_length=16)),
+                ("normalized_sql", models.TextField()),
+                ("sql", models.TextField()),
+                ("alias", models.CharField(default="default", max_length=30)),
+                ("duration_ms", models.FloatField()),
+                ("view", models.CharField(blank=True, max_length=120)),
+                ("path", models.CharField(blank=True, max_length=255)),
+                ("stack", models.TextField(blank=True)),
+                ("plan", models.TextField(blank=True)),
+                ("plan_error", models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                "verbose_name": "Query lenta",
+                "verbose_name_plural": "Queries lentas",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import models
+
+from config.models import TimeStampedModel
+
+
+class SlowQuery(TimeStampedModel):
+    """
+    Query que superó SLOW_QUERY_MS en una petición (monitoring/slow_queries.py).
+    `plan` solo está en las muestreadas: EXPLAIN (ANALYZE, BUFFERS) en segundo plano.
+    """
+
+    fingerprint = models.CharField(max_length=16, db_index=True)  # hash del SQL normalizado
+    normalized_sql = models.TextField()
+    sql = models.TextField()  # SQL con placeholders; los parámetros no se guardan
+    alias = models.CharField(max_length=30, default="default")
+    duration_ms = models.FloatField()
+    view = models.CharField(max_length=120, blank=True)
+    path = models.CharField(max_length=255, blank=True)
+    stack = models.TextField(blank=True)  # frames del proyecto, del más externo al más interno
+    plan = models.TextField(blank=True)
+    plan_error = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        verbose_name = "Query lenta"
+        verbose_name_plural = "Queries lentas"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.fingerprint} ({self.duration_ms:.0f} ms) - {self.view or 'sin vista'}"
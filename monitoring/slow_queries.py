@@ -0,0 +1,220 @@
+# monitoring/slow_queries.py
+"""
+Log de queries lentas con captura de plan.
+
+`SlowQueryMiddleware` instala un execute_wrapper por petición (como MetricsMiddleware). Si
+una query tarda más de SLOW_QUERY_MS se registra su fingerprint (SQL normalizado: literales,
+listas IN y espacios colapsados), la vista que la lanzó y los frames del proyecto en la pila.
+
+El guardado va a un hilo aparte: la petición solo paga el perf_counter y, para las lentas,
+recorrer la pila. Una fracción (SLOW_QUERY_EXPLAIN_SAMPLE) de los SELECT lentos se repite
+allí con `EXPLAIN (ANALYZE, BUFFERS)` (solo PostgreSQL) y el plan queda en el admin.
+ANALYZE ejecuta la query de nuevo, así que solo se usa con lecturas puras; un SELECT con
+efectos (FOR UPDATE, pg_notify, nextval, locks consultivos...) se explica sin ANALYZE.
+Si el hilo se atrasa (SLOW_QUERY_MAX_PENDING) las nuevas se descartan.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+STACK_FRAMES = 8
+# Middlewares y execute_wrappers: aparecen en todas las pilas y no dicen quién lanzó la query
+IGNORED_FRAMES = ("config/metrics.py", "config/profiling.py", "config/replicas.py", "monitoring/")
+SQL_MAX_CHARS = 10000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+# SELECT que no son solo lectura: re-ejecutarlos con ANALYZE tendría efectos
+_SIDE_EFFECTS = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b|\bINTO\b"
+    r"|\b(?:pg_notify|nextval|setval|set_config|pg_sleep|pg_(?:try_)?advisory\w*"
+    r"|pg_cancel_backend|pg_terminate_backend|lo_\w+|dblink\w*)\s*\(",
+    re.IGNORECASE,
+)
+
+
+def normalize(sql: str) -> str:
+    """SQL sin valores: `IN (%s, %s, %s)` y `IN (1, 2)` quedan igual que `IN (?)`."""
+    sql = _STRING.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def is_plain_read(sql: str) -> bool:
+    """SELECT sin locks ni funciones con efectos: se puede repetir con EXPLAIN ANALYZE."""
+    return sql.lstrip()[:6].upper() == "SELECT" and not _SIDE_EFFECTS.search(sql)
+
+
+def fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def stack_summary() -> str:
+    """Frames del proyecto (sin Django, librerías ni middlewares), del externo al interno."""
+    base = os.path.join(settings.BASE_DIR, "")
+    frames = []
+    for frame in traceback.extract_stack():
+        if not frame.filename.startswith(base) or "site-packages" in frame.filename:
+            continue
+        path = frame.filename.removeprefix(base)
+        if not path.startswith(IGNORED_FRAMES):
+            frames.append(f"{path}:{frame.lineno} in {frame.name}")
+    return "\n".join(frames[-STACK_FRAMES:])
+
+
+class _Recorder:
+    """Hilo único que guarda las queries lentas y lanza los EXPLAIN muestreados."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-queries")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, entry: dict, params, analyze: bool = False):
+        with self._lock:
+            if self._pending >= settings.SLOW_QUERY_MAX_PENDING:
+                logger.warning(
+                    "Log de queries lentas saturado: se descarta %s", entry["fingerprint"]
+                )
+                return
+            self._pending += 1
+        self._executor.submit(self._run, entry, params, analyze)
+
+    def _run(self, entry, params, analyze):
+        from .models import SlowQuery
+
+        try:
+            if params is not None:
+                entry["plan"], entry["plan_error"] = _explain(
+                    entry["alias"], entry["sql"], params, analyze
+                )
+            SlowQuery.objects.create(**entry)
+        except Exception:
+            logger.exception("No se pudo guardar la query lenta %s", entry["fingerprint"])
+        finally:
+            # Conexiones por hilo: las de este hilo no las cierra ningún request_finished
+            for conn in connections.all(initialized_only=True):
+                conn.close()
+            with self._lock:
+                self._pending -= 1
+
+
+def _explain(alias: str, sql: str, params, analyze: bool):
+    conn = connections[alias]
+    if conn.vendor != "postgresql":
+        return "", f"EXPLAIN no disponible en {conn.vendor}"
+    # ANALYZE vuelve a ejecutar la query: solo con lecturas puras (is_plain_read)
+    options = "(ANALYZE, BUFFERS) " if analyze else ""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {options}{sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall()), ""
+    except Exception as exc:
+        return "", str(exc)[:255]
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> _Recorder:
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = _Recorder()
+    return _recorder
+
+
+class _SlowQueryWrapper:
+    """execute_wrapper: mide cada query y, si es lenta, la encola con su contexto."""
+
+    def __init__(self, request):
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= settings.SLOW_QUERY_MS:
+                self.record(sql, params, many, context, elapsed_ms)
+
+    def record(self, sql, params, many, context, elapsed_ms):
+        normalized = normalize(sql)
+        match = getattr(self.request, "resolver_match", None)
+        entry = {
+            "fingerprint": fingerprint(normalized),
+            "normalized_sql": normalized[:SQL_MAX_CHARS],
+            "sql": sql[:SQL_MAX_CHARS],
+            "alias": context["connection"].alias,
+            "duration_ms": round(elapsed_ms, 3),
+            "view": match.view_name if match else "",
+            "path": self.request.path[:255],
+            "stack": stack_summary(),
+        }
+        explain = (
+            not many
+            and sql.lstrip()[:6].upper() == "SELECT"
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE
+        )
+        get_recorder().submit(
+            entry, list(params or ()) if explain else None, explain and is_plain_read(sql)
+        )
+
+
+class SlowQueryMiddleware:
+    """Sync y async; sin SLOW_QUERY_MS (0) no instala nada."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.SLOW_QUERY_MS:
+            return self.get_response(request)
+        with self._wrapped(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not settings.SLOW_QUERY_MS:
+            return await self.get_response(request)
+        # Como en MetricsMiddleware: el wrapper va en el hilo sync_to_async de la petición
+        stack = await sync_to_async(self._wrapped)(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+    @staticmethod
+    def _wrapped(request) -> ExitStack:
+        stack = ExitStack()
+        wrapper = _SlowQueryWrapper(request)
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(wrapper))
+        return stack
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .slow_queries import _SlowQueryWrapper, fingerprint, is_plain_read, normalize
+
+
+class NormalizeTests(SimpleTestCase):
+    def test_literals_and_in_lists_collapse(self):
+        a = normalize("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'x'")
+        b = normalize("SELECT  *  FROM t WHERE id IN (%s, %s) AND name = %s")
+        self.assertEqual(a, "SELECT * FROM t WHERE id IN (...) AND name = ?")
+        self.assertEqual(a, b)
+        self.assertEqual(fingerprint(a), fingerprint(b))
+
+
+class PlainReadTests(SimpleTestCase):
+    def test_plain_select(self):
+        self.assertTrue(is_plain_read('SELECT "into_x" FROM t WHERE id = %s'))
+
+    def test_side_effects_are_not_plain_reads(self):
+        for sql in [
+            "SELECT pg_notify(%s, %s)",
+            "SELECT nextval('seq')",
+            "SELECT pg_advisory_lock(1)",
+            "SELECT * FROM t FOR UPDATE SKIP LOCKED",
+            "SELECT * FROM t FOR NO KEY UPDATE",
+            "SELECT a INTO b FROM t",
+            "UPDATE t SET a = 1",
+        ]:
+            with self.subTest(sql=sql):
+                self.assertFalse(is_plain_read(sql))
+
+
+@override_settings(SLOW_QUERY_EXPLAIN_SAMPLE=1.0)
+class RecordTests(SimpleTestCase):
+    def record(self, sql, params=()):
+        recorder = mock.Mock()
+        wrapper = _SlowQueryWrapper(RequestFactory().get("/x/"))
+        with mock.patch("monitoring.slow_queries.get_recorder", return_value=recorder):
+            wrapper.record(sql, params, False, {"connection": connection}, 500.0)
+        return recorder.submit.call_args.args
+
+    def test_plain_select_is_analyzed(self):
+        entry, params, analyze = self.record("SELECT * FROM t WHERE id = %s", [7])
+        self.assertEqual(entry["normalized_sql"], "SELECT * FROM t WHERE id = ?")
+        self.assertEqual(params, [7])
+        self.assertTrue(analyze)
+
+    def test_side_effect_select_is_explained_without_analyze(self):
+        _, params, analyze = self.record("SELECT pg_notify(%s, %s)", ["c", "k"])
+        self.assertEqual(params, ["c", "k"])
+        self.assertFalse(analyze)
+
+    def test_writes_are_not_explained(self):
+        _, params, analyze = self.record("UPDATE t SET a = %s", [1])
+        self.assertIsNone(params)
+        self.assertFalse(analyze)
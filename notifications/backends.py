@@ -0,0 +1,197 @@
+# notifications/backends.py
+"""
+Backends de envío por canal (settings.NOTIFICATION_BACKENDS).
+
+Un backend implementa `send(notification) -> SendResult`. `send_batch` envía un lote en
+paralelo con un pool de hilos; los backends que puedan agrupar (p. ej. una sola conexión
+SMTP) lo sobrescriben. Los backends no tocan la BD: el dispatcher persiste los resultados.
+"""
+
+import logging
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.message import make_msgid
+from django.template.loader import select_template
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SendResult:
+    ok: bool
+    provider_id: str = ""
+    error: str = ""
+    meta: dict = field(default_factory=dict)
+    # No se intentó (proveedor caído/limitado): la notificación sigue QUEUED
+    deferred: bool = False
+
+
+class BaseNotificationBackend:
+    def __init__(self, max_workers: int = 0):
+        self.max_workers = max_workers or settings.NOTIFICATION_DISPATCH_WORKERS
+
+    def send(self, notification) -> SendResult:
+        raise NotImplementedError
+
+    def is_available(self) -> bool:
+        """False mientras el proveedor está marcado como caído: no se reclaman sus filas."""
+        return True
+
+    def _safe_send(self, notification) -> SendResult:
+        try:
+            return self.send(notification)
+        except Exception as exc:  # un fallo de un envío no tumba el lote
+            logger.exception("Error enviando notificación #%s", notification.pk)
+            return SendResult(ok=False, error=str(exc))
+
+    def send_batch(self, notifications) -> list:
+        """Devuelve un SendResult por notificación, en el mismo orden."""
+        if len(notifications) <= 1 or self.max_workers <= 1:
+            return [self._safe_send(n) for n in notifications]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(notifications))) as pool:
+            return list(pool.map(self._safe_send, notifications))
+
+
+class ConsoleBackend(BaseNotificationBackend):
+    """Escribe las notificaciones en stdout (desarrollo)."""
+
+    _lock = threading.Lock()
+
+    def send(self, notification):
+        with self._lock:
+            sys.stdout.write(
+                f"[{notification.channel}] → user #{notification.user_id}: "
+                f"{notification.subject}\n{notification.message}\n\n"
+            )
+        return SendResult(ok=True, provider_id=f"console_{uuid.uuid4().hex}")
+
+
+class InMemoryBackend(BaseNotificationBackend):
+    """Guarda lo enviado en `InMemoryBackend.outbox` (tests), como el backend locmem de email."""
+
+    outbox = []
+    _lock = threading.Lock()
+
+    def send(self, notification):
+        with self._lock:
+            self.outbox.append(notification)
+        return SendResult(ok=True, provider_id=f"mem_{uuid.uuid4().hex}")
+
+
+@lru_cache(maxsize=64)
+def email_templates(kind: str):
+    """
+    (subject, body) compilados una sola vez por proceso worker para cada tipo de mensaje.
+    Busca notifications/email/<kind>_{subject,body}.txt y cae en default_*.
+    """
+    return tuple(
+        select_template(
+            [f"notifications/email/{kind}_{part}.txt", f"notifications/email/default_{part}.txt"]
+        )
+        for part in ("subject", "body")
+    )
+
+
+class EmailBackend(BaseNotificationBackend):
+    """
+    Canal EMAIL: renderiza con plantillas precompiladas y envía en lotes de
+    NOTIFICATION_EMAIL_BATCH_SIZE por una única conexión (EMAIL_BACKEND de Django:
+    SMTP en producción, console/locmem en desarrollo y tests).
+
+    Dentro del lote, `send_messages` va mensaje a mensaje sobre esa conexión y se usa lo que
+    devuelve: si el SMTP falla a mitad de lote, los ya entregados quedan SENT y solo los
+    demás se marcan FAILED (sin duplicados al reintentar).
+    """
+
+    def __init__(self, batch_size: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.batch_size = batch_size or settings.NOTIFICATION_EMAIL_BATCH_SIZE
+        # Métricas acumuladas del proceso (lotes, mensajes, segundos de envío)
+        self.stats = {"batches": 0, "messages": 0, "seconds": 0.0}
+
+    def render(self, notification) -> EmailMessage:
+        meta = notification.meta or {}
+        subject_tpl, body_tpl = email_templates(meta.get("kind", "default"))
+        context = {**meta, "notification": notification, "user": notification.user}
+        subject = " ".join(subject_tpl.render(context).split())  # sin saltos de línea
+        message = EmailMessage(
+            subject=subject,
+            body=body_tpl.render(context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[notification.user.email],
+            headers={"Message-ID": make_msgid(domain="lava2")},
+        )
+        return message
+
+    def send(self, notification):
+        return self.send_batch([notification])[0]
+
+    def send_batch(self, notifications):
+        results = [None] * len(notifications)
+        prepared = []
+        for i, notification in enumerate(notifications):
+            try:
+                prepared.append((i, self.render(notification)))
+            except Exception as exc:
+                logger.exception("No se pudo renderizar el email #%s", notification.pk)
+                results[i] = SendResult(ok=False, error=f"render: {exc}")
+
+        if prepared:
+            # Una conexión abierta para todos los lotes de esta pasada
+            with get_connection(fail_silently=False) as connection:
+                for start in range(0, len(prepared), self.batch_size):
+                    end = start + self.batch_size
+                    self._send_chunk(connection, prepared[start:end], results)
+        return results
+
+    def _send_chunk(self, connection, chunk, results):
+        started = time.perf_counter()
+        failed = 0
+        for i, message in chunk:
+            try:
+                sent = connection.send_messages([message])
+            except Exception as exc:
+                logger.exception("Falló el email %s", message.extra_headers["Message-ID"])
+                results[i] = SendResult(ok=False, error=str(exc))
+                failed += 1
+                continue
+            if sent:
+                results[i] = SendResult(ok=True, provider_id=message.extra_headers["Message-ID"])
+            else:
+                results[i] = SendResult(ok=False, error="el servidor no aceptó el mensaje")
+                failed += 1
+        if failed:
+            logger.warning("Lote de email: %s de %s mensajes fallaron", failed, len(chunk))
+        elapsed = time.perf_counter() - started
+        self.stats["batches"] += 1
+        self.stats["messages"] += len(chunk)
+        self.stats["seconds"] += elapsed
+        logger.info("Lote de email: %s mensajes en %.1f ms", len(chunk), elapsed * 1000)
+
+
+class InAppBackend(BaseNotificationBackend):
+    """IN_APP: la notificación ya está en la bandeja; "enviarla" es solo marcarla."""
+
+    def send(self, notification):
+        return SendResult(ok=True)
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(channel: str) -> BaseNotificationBackend:
+    """Instancia (cacheada por proceso) del backend configurado para `channel`."""
+    with _instances_lock:
+        if channel not in _instances:
+            _instances[channel] = import_string(settings.NOTIFICATION_BACKENDS[channel])()
+        return _instances[channel]
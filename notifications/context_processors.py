@@ -0,0 +1,10 @@
+# notifications/context_processors.py
+from .inbox import unread_count
+
+
+def unread_notifications(request):
+    """Badge de no leídas para base.html: lectura de cache, sin COUNT por página."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {"unread_notifications": unread_count(user.pk)}
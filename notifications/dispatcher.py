@@ -0,0 +1,123 @@
+# notifications/dispatcher.py
+"""
+Dispatcher de notificaciones en cola.
+
+Cada pasada:
+1. reclama un lote de QUEUED con `SELECT ... FOR UPDATE SKIP LOCKED` en una transacción
+   corta que lo reserva (`next_attempt_at` = ahora + NOTIFICATION_CLAIM_TIMEOUT): otros
+   workers se saltan esas filas, así que no hay doble envío;
+2. envía el lote agrupado por canal, en paralelo (ver backends.send_batch), sin ninguna
+   transacción abierta ni locks durante las llamadas al proveedor;
+3. marca SENT/FAILED con un único UPDATE en bloque (bulk_update). Si un canal entero falla
+   (excepción del backend), sus filas se aplazan y las de los demás canales se guardan.
+
+Los canales cuyo proveedor está caído (circuito abierto) no se reclaman; si un envío se
+aplaza, la notificación queda QUEUED ("aparcada") con backoff exponencial en
+`next_attempt_at`. Si el worker muere con un lote reclamado, otro lo retoma al vencer la
+reserva (entrega al menos una vez).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .backends import SendResult, get_backend
+from .models import Notification, NotificationChannel, NotificationStatus
+
+logger = logging.getLogger(__name__)
+
+
+STATUS_COUNTER = {
+    NotificationStatus.SENT: "sent",
+    NotificationStatus.FAILED: "failed",
+    NotificationStatus.QUEUED: "deferred",
+}
+
+
+def available_channels():
+    return [c for c in NotificationChannel.values if get_backend(c).is_available()]
+
+
+def claim_batch(batch_size: int, channels=None):
+    """Reclama y reserva un lote en su propia transacción corta."""
+    now = timezone.now()
+    qs = (
+        Notification.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(status=NotificationStatus.QUEUED)
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+    )
+    if channels is not None:
+        qs = qs.filter(channel__in=channels)
+    with transaction.atomic():
+        batch = list(qs.select_related("user__profile").order_by("created_at")[:batch_size])
+        lease = now + timedelta(seconds=settings.NOTIFICATION_CLAIM_TIMEOUT)
+        for notification in batch:
+            notification.next_attempt_at = lease
+        Notification.objects.bulk_update(batch, ["next_attempt_at"])
+    return batch
+
+
+def retry_delay(deferrals: int) -> timedelta:
+    seconds = settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** max(deferrals - 1, 0)
+    return timedelta(seconds=min(seconds, settings.NOTIFICATION_RETRY_MAX_SECONDS))
+
+
+def apply_results(notifications, results):
+    now = timezone.now()
+    for notification, result in zip(notifications, results):
+        meta = dict(notification.meta or {})
+        if result.provider_id:
+            meta["provider_id"] = result.provider_id
+        if result.error:
+            meta["error"] = result.error
+        elif result.ok:
+            meta.pop("error", None)
+        meta.update(result.meta)
+        notification.meta = meta
+        notification.updated_at = now
+        if result.deferred:
+            meta["deferrals"] = meta.get("deferrals", 0) + 1
+            notification.next_attempt_at = now + retry_delay(meta["deferrals"])
+            continue
+        notification.status = NotificationStatus.SENT if result.ok else NotificationStatus.FAILED
+        notification.sent_at = now if result.ok else None
+        notification.next_attempt_at = None
+
+
+def dispatch_batch(batch_size: int = 100) -> dict:
+    """Procesa un lote. Devuelve contadores {"sent": n, "failed": n, "deferred": n}."""
+    counts = {"sent": 0, "failed": 0, "deferred": 0}
+    channels = available_channels()
+    if not channels:
+        return counts
+    batch = claim_batch(batch_size, channels=channels)
+    if not batch:
+        return counts
+
+    by_channel = defaultdict(list)
+    for notification in batch:
+        by_channel[notification.channel].append(notification)
+
+    for channel, notifications in by_channel.items():
+        try:
+            results = get_backend(channel).send_batch(notifications)
+        except Exception as exc:
+            # p. ej. el SMTP no acepta la conexión: este canal se reintenta con backoff y
+            # lo ya enviado por los demás canales se guarda igual (no se reenvía)
+            logger.exception("Falló el envío del canal %s", channel)
+            results = [SendResult(ok=False, deferred=True, error=str(exc))] * len(notifications)
+        apply_results(notifications, results)
+
+    Notification.objects.bulk_update(
+        batch, ["status", "sent_at", "meta", "next_attempt_at", "updated_at"]
+    )
+
+    for notification in batch:
+        counts[STATUS_COUNTER[notification.status]] += 1
+    logger.info("Lote de notificaciones: %s", counts)
+    return counts
@@ -0,0 +1,130 @@
+# notifications/inbox.py
+"""
+Bandeja in-app: contador de no leídas en cache y helpers de paginación keyset.
+
+- El contador (`notifications:unread:<user>`) se calcula con un COUNT solo si falta en
+  cache; después se mantiene con incr/decr al crear y al leer.
+- Las altas masivas (bulk_create) invalidan la clave y el siguiente acceso recalcula.
+- `notifications:latest:<user>` guarda la marca de la última novedad: el stream SSE la
+  consulta en cache y solo va a la BD cuando cambia.
+
+Ambas claves necesitan una cache compartida por todos los procesos (Redis): con locmem,
+cada worker tendría su propio contador y el stream (ASGI) nunca vería las altas hechas en
+los workers WSGI. Sin NOTIFICATIONS_SHARED_CACHE el contador es un COUNT y el stream
+consulta la BD en cada intervalo.
+"""
+
+import base64
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Notification, NotificationChannel
+
+UNREAD_KEY = "notifications:unread:{}"
+LATEST_KEY = "notifications:latest:{}"
+UNREAD_TTL = 60 * 60  # el recálculo periódico corrige cualquier deriva
+LATEST_TTL = 60 * 60  # si caduca, el stream solo hace una consulta de más
+
+
+def inbox_queryset(user_id):
+    return Notification.objects.filter(user_id=user_id, channel=NotificationChannel.IN_APP)
+
+
+def shared_cache() -> bool:
+    return settings.NOTIFICATIONS_SHARED_CACHE
+
+
+def unread_count(user_id) -> int:
+    if not shared_cache():
+        return inbox_queryset(user_id).filter(read_at__isnull=True).count()
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = inbox_queryset(user_id).filter(read_at__isnull=True).count()
+        cache.set(key, count, UNREAD_TTL)
+    return count
+
+
+def _touch_latest(user_ids):
+    stamp = time.time()
+    cache.set_many({LATEST_KEY.format(uid): stamp for uid in user_ids}, LATEST_TTL)
+
+
+def _incr(user_id, delta: int):
+    try:
+        cache.incr(UNREAD_KEY.format(user_id), delta)
+    except ValueError:
+        pass  # no estaba en cache: se recalcula al leerlo
+
+
+def notify_created(user_id):
+    """Una notificación IN_APP nueva (tras el commit)."""
+    if not shared_cache():
+        return
+
+    def _apply():
+        _incr(user_id, 1)
+        _touch_latest([user_id])
+
+    transaction.on_commit(_apply)
+
+
+def notify_bulk_created(user_ids):
+    """Altas masivas (solo usuarios con filas insertadas): invalida sus contadores."""
+    user_ids = set(user_ids)
+    if not user_ids or not shared_cache():
+        return
+
+    def _apply():
+        cache.delete_many([UNREAD_KEY.format(uid) for uid in user_ids])
+        _touch_latest(user_ids)
+
+    transaction.on_commit(_apply)
+
+
+def mark_read(user_id, ids=None) -> int:
+    qs = inbox_queryset(user_id).filter(read_at__isnull=True)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    updated = qs.update(read_at=timezone.now(), updated_at=timezone.now())
+    if updated and shared_cache():
+        if ids is None:
+            cache.set(UNREAD_KEY.format(user_id), 0, UNREAD_TTL)
+        else:
+            _incr(user_id, -updated)
+    return updated
+
+
+# --- Paginación keyset sobre (created_at, id) descendente ---
+
+
+def encode_cursor(notification) -> str:
+    raw = f"{notification.created_at.isoformat()}|{notification.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def inbox_page(user_id, cursor: str = "", page_size: int = 20):
+    """Devuelve (notificaciones, cursor_siguiente o None)."""
+    qs = inbox_queryset(user_id).order_by("-created_at", "-id")
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    items = list(qs.only("id", "subject", "message", "created_at", "read_at")[: page_size + 1])
+    has_next = len(items) > page_size
+    items = items[:page_size]
+    return items, (encode_cursor(items[-1]) if has_next else None)
@@ -0,0 +1,39 @@
+# notifications/management/commands/dispatch_notifications.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.dispatcher import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía las notificaciones QUEUED por lotes. Se pueden lanzar varios procesos "
+        "en paralelo: cada uno reclama filas distintas (SKIP LOCKED)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop", action="store_true", help="Sigue corriendo y espera nuevas notificaciones."
+        )
+        parser.add_argument("--sleep", type=float, default=1.0, help="Espera con cola vacía (s).")
+
+    def handle(self, *args, **opts):
+        sent = failed = deferred = 0
+        while True:
+            counts = dispatch_batch(batch_size=opts["batch_size"])
+            sent += counts["sent"]
+            failed += counts["failed"]
+            deferred += counts["deferred"]
+            # Si todo el lote se aplazó (proveedor caído), esperar en vez de reintentar ya
+            if counts["sent"] or counts["failed"]:
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Notificaciones enviadas: {sent}, fallidas: {failed}, aplazadas: {deferred}"
+            )
+        )
@@ -0,0 +1,29 @@
+# notifications/management/commands/generate_booking_reminders.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.reminders import generate_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Encola recordatorios (24h y 2h) de las próximas reservas según las preferencias "
+        "del perfil. Es idempotente: se puede ejecutar cada pocos minutos (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Revisa todas las reservas de las próximas 24h, no solo las novedades.",
+        )
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        total = generate_reminders(full=opts["full"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recordatorios creados: {total} en {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,39 @@
+# notifications/management/commands/purge_notifications.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.retention import open_archive, purge_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra en lotes las notificaciones SENT/FAILED más antiguas que --days "
+        "(opcionalmente archivándolas en JSONL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.NOTIFICATION_RETENTION_DAYS)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--archive", default="", help="Archivo .jsonl o .jsonl.gz donde guardar lo borrado."
+        )
+        parser.add_argument(
+            "--pause", type=float, default=0.0, help="Pausa entre lotes (s) para no saturar."
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Solo cuenta las candidatas.")
+
+    def handle(self, *args, **opts):
+        archive = open_archive(opts["archive"]) if opts["archive"] else None
+        try:
+            total = purge_notifications(
+                days=opts["days"],
+                chunk_size=opts["chunk_size"],
+                archive=archive,
+                pause=opts["pause"],
+                dry_run=opts["dry_run"],
+            )
+        finally:
+            if archive is not None:
+                archive.close()
+        verb = "a borrar" if opts["dry_run"] else "borradas"
+        self.stdout.write(self.style.SUCCESS(f"Notificaciones {verb}: {total}"))
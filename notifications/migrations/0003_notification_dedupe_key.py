@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="dedupe_key",
+            field=models.CharField(blank=True, max_length=120, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_notification_dedupe_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="read_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="channel",
+            field=models.CharField(
+                choices=[
+                    ("EMAIL", "Email"),
+                    ("SMS", "SMS"),
+                    ("PUSH", "Push"),
+                    ("IN_APP", "En la app"),
+                ],
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="notif_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:21
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY: sin bloquear escrituras, fuera de transacción
+    atomic = False
+
+    dependencies = [
+        ("notifications", "0004_notification_inbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name="notification",
+            name="notificatio_status_d92267_idx",
+        ),
+        RemoveIndexConcurrently(
+            model_name="notification",
+            name="notificatio_channel_1d6e5f_idx",
+        ),
+        AddIndexConcurrently(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("status", "QUEUED")),
+                fields=["created_at"],
+                name="notif_queued_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("channel", "IN_APP"), ("read_at__isnull", True)),
+                fields=["user"],
+                name="notif_unread_user_idx",
+            ),
+        ),
+    ]
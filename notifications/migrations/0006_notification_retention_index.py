@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:53
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY: sin bloquear escrituras, fuera de transacción
+    atomic = False
+
+    dependencies = [
+        ("notifications", "0005_notification_partial_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("status__in", ["SENT", "FAILED"])),
+                fields=["created_at"],
+                name="notif_done_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0006_notification_retention_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
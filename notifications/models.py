@@ -9,6 +9,7 @@ class NotificationChannel(models.TextChoices):
     EMAIL = "EMAIL", "Email"
     SMS = "SMS", "SMS"
     PUSH = "PUSH", "Push"
+    IN_APP = "IN_APP", "En la app"  # bandeja de la web; no requiere envío
 
 
 class NotificationStatus(models.TextChoices):
@@ -27,17 +28,42 @@ class Notification(TimeStampedModel):
     )
     sent_at = models.DateTimeField(blank=True, null=True)
     meta = models.JSONField(blank=True, null=True)  # ids de proveedor, payload, etc.
+    # Clave de idempotencia opcional (p. ej. "reminder:<booking>:24h:EMAIL"): evita duplicados
+    dedupe_key = models.CharField(max_length=120, unique=True, blank=True, null=True)
+    read_at = models.DateTimeField(blank=True, null=True)  # solo para IN_APP (bandeja)
+    # QUEUED no se reclama antes de esta hora: reintentos con backoff y lotes ya reclamados
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         verbose_name = "Notificación"
         verbose_name_plural = "Notificaciones"
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["status"]),
-            models.Index(fields=["channel"]),
+            # Índices parciales: solo el conjunto "vivo", no todo el histórico SENT/FAILED.
+            # Cola del dispatcher: QUEUED por orden de llegada
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status="QUEUED"),
+                name="notif_queued_created_idx",
+            ),
+            # Retención: las SENT/FAILED más antiguas, por orden (notifications/retention.py)
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status__in=["SENT", "FAILED"]),
+                name="notif_done_created_idx",
+            ),
+            # Recalcular el contador de no leídas de la bandeja
+            models.Index(
+                fields=["user"],
+                condition=models.Q(channel="IN_APP", read_at__isnull=True),
+                name="notif_unread_user_idx",
+            ),
+            # Bandeja: paginación keyset por (user, -created_at, -id)
+            models.Index(fields=["user", "-created_at", "-id"], name="notif_user_created_idx"),
         ]
 
     def mark_sent(self):
+        # Para envíos en lote, el dispatcher usa bulk_update (notifications/dispatcher.py)
         self.status = NotificationStatus.SENT
         self.sent_at = timezone.now()
         self.save(update_fields=["status", "sent_at", "updated_at"])
@@ -0,0 +1,213 @@
+# notifications/providers.py
+"""
+Capa de adaptadores para proveedores de SMS y push.
+
+Cada canal tiene su cliente de proveedor y, delante, tres protecciones por proceso:
+- TokenBucket: respeta el rate limit del proveedor (envíos/segundo con ráfaga).
+- Concurrencia acotada: como mucho `concurrency` llamadas simultáneas al proveedor.
+- CircuitBreaker: tras `failure_threshold` fallos seguidos se abre y las notificaciones
+  quedan "aparcadas" (siguen QUEUED) hasta `reset_timeout`; luego pasa una sola llamada de
+  prueba y, según su resultado, se cierra o vuelve a abrirse.
+
+La configuración está en settings.NOTIFICATION_PROVIDERS, por canal.
+"""
+
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .backends import BaseNotificationBackend, SendResult
+
+
+class ProviderError(Exception):
+    """Fallo de la llamada al proveedor (timeout, 5xx, rechazo...)."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = 5.0) -> bool:
+        """Espera un token hasta `timeout` segundos. False si no llegó a tiempo."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            elif self.state == self.HALF_OPEN:
+                # Una sola prueba a la vez; si no informó en `reset_timeout`, se da por perdida
+                if now - self.probe_started < self.reset_timeout:
+                    return False
+            else:
+                return True
+            self.probe_started = now
+            return True
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return (
+                self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class BaseProviderClient:
+    name = ""
+
+    def send(self, *, to: str, subject: str, message: str) -> str:
+        """Envía y devuelve el id del mensaje en el proveedor. Lanza ProviderError si falla."""
+        raise NotImplementedError
+
+
+class FakeProviderClient(BaseProviderClient):
+    """
+    Proveedor simulado para desarrollo y tests: latencia y tasa de fallos configurables.
+    `down=True` simula una caída total.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.down = False
+        self.sent = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(self, *, to, subject, message):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self.down or self._random.random() < self.failure_rate:
+                raise ProviderError(f"{self.name}: fallo simulado")
+            message_id = f"{self.name}_{uuid.uuid4().hex}"
+            self.sent.append((to, subject, message))
+        return message_id
+
+
+class FakeSMSProvider(FakeProviderClient):
+    name = "fake-sms"
+
+
+class FakePushProvider(FakeProviderClient):
+    name = "fake-push"
+
+
+class ProviderBackend(BaseNotificationBackend):
+    """Backend de canal que envía a través de un proveedor con throttling y circuit breaker."""
+
+    channel = ""
+
+    def __init__(self, client=None, **kwargs):
+        conf = settings.NOTIFICATION_PROVIDERS[self.channel]
+        super().__init__(max_workers=conf.get("concurrency", 4), **kwargs)
+        self.client = client or import_string(conf["client"])(**conf.get("options", {}))
+        self.bucket = TokenBucket(rate=conf.get("rate", 10), capacity=conf.get("burst", 10))
+        self.breaker = CircuitBreaker(
+            failure_threshold=conf.get("failure_threshold", 5),
+            reset_timeout=conf.get("reset_timeout", 30),
+        )
+        self.acquire_timeout = conf.get("acquire_timeout", 5.0)
+        self.max_attempts = conf.get("max_attempts", 3)
+
+    def is_available(self) -> bool:
+        return not self.breaker.is_open()
+
+    def recipient(self, notification) -> str:
+        raise NotImplementedError
+
+    def send(self, notification):
+        try:
+            to = self.recipient(notification)
+        except ProviderError as exc:  # dato del usuario, no cuenta para el circuito
+            return SendResult(ok=False, error=str(exc))
+        if not self.breaker.allow():
+            return SendResult(ok=False, deferred=True, error="circuito abierto")
+        if not self.bucket.acquire(timeout=self.acquire_timeout):
+            return SendResult(ok=False, deferred=True, error="rate limit del proveedor")
+
+        attempts = (notification.meta or {}).get("attempts", 0) + 1
+        started = time.perf_counter()
+        meta = {"provider": self.client.name, "attempts": attempts}
+        try:
+            provider_id = self.client.send(
+                to=to,
+                subject=notification.subject,
+                message=notification.message,
+            )
+        except ProviderError as exc:
+            self.breaker.record_failure()
+            meta["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            # Se reintenta en otra pasada hasta `max_attempts`; luego queda FAILED
+            return SendResult(
+                ok=False, error=str(exc), meta=meta, deferred=attempts < self.max_attempts
+            )
+        self.breaker.record_success()
+        meta["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return SendResult(ok=True, provider_id=provider_id, meta=meta)
+
+
+class SMSBackend(ProviderBackend):
+    channel = "SMS"
+
+    def recipient(self, notification):
+        profile = getattr(notification.user, "profile", None)
+        if profile is None or not profile.phone:
+            raise ProviderError("el usuario no tiene teléfono")
+        return profile.phone
+
+
+class PushBackend(ProviderBackend):
+    channel = "PUSH"
+
+    def recipient(self, notification):
+        return f"user:{notification.user_id}"
@@ -0,0 +1,175 @@
+# notifications/reminders.py
+"""
+Generador de recordatorios de citas.
+
+Una sola consulta por rango sobre `Booking.scheduled_at` (indexado) trae las reservas
+activas de las próximas 24h junto con el perfil del usuario (preferencias y zona horaria).
+Por cada reserva se elige la ventana más próxima que ya alcanzó (24h o 2h) y se crea una
+Notification por canal preferido, más su copia IN_APP para la bandeja, con `bulk_create`.
+La `dedupe_key` única hace que volver a ejecutar el generador no duplique recordatorios.
+
+Pasadas incrementales: con la hora de la pasada anterior (en cache) solo se leen las
+reservas que desde entonces entraron en una ventana o se crearon/cambiaron. Las que ya
+tienen su recordatorio se descartan antes de insertar, así la bandeja (contador de no
+leídas, stream SSE) solo se entera de los usuarios con recordatorios nuevos.
+"""
+
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from bookings.models import Booking, BookingStatus
+
+from .inbox import notify_bulk_created
+from .models import Notification, NotificationChannel, NotificationStatus
+
+# (etiqueta, antelación), de la más cercana a la más lejana
+REMINDER_WINDOWS = [("2h", timedelta(hours=2)), ("24h", timedelta(hours=24))]
+
+SUBJECTS = {
+    "2h": "Recordatorio: tu lavado es en 2 horas",
+    "24h": "Recordatorio: tienes un lavado en las próximas 24 horas",
+}
+
+LAST_RUN_KEY = "notifications:reminders:last_run"
+LAST_RUN_TTL = 24 * 60 * 60  # sin pasadas en un día, la siguiente revisa todo
+# Solape con la pasada anterior: reservas cuyo commit llegó mientras esta corría
+RUN_OVERLAP = timedelta(minutes=10)
+
+CHANNEL_PREFS = [
+    (NotificationChannel.EMAIL, "wants_email"),
+    (NotificationChannel.SMS, "wants_sms"),
+    (NotificationChannel.PUSH, "wants_push"),
+]
+
+
+def _window_for(delta: timedelta):
+    for label, lead in REMINDER_WINDOWS:
+        if delta <= lead:
+            return label
+    return None
+
+
+def _local(dt, tz_name: str):
+    try:
+        return dt.astimezone(ZoneInfo(tz_name))
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.localtime(dt)
+
+
+def upcoming_bookings(now, since=None):
+    """Reservas activas en las próximas 24h; con `since`, solo las novedades desde entonces."""
+    horizon = now + max(lead for _, lead in REMINDER_WINDOWS)
+    qs = Booking.objects.filter(
+        scheduled_at__gt=now,
+        scheduled_at__lte=horizon,
+        status__in=[BookingStatus.PENDING, BookingStatus.CONFIRMED],
+    )
+    if since is not None:
+        # Creadas o cambiadas desde `since`, o que desde entonces entraron en una ventana
+        recent = Q(updated_at__gt=since)
+        for _, lead in REMINDER_WINDOWS:
+            recent |= Q(scheduled_at__gt=since + lead, scheduled_at__lte=now + lead)
+        qs = qs.filter(recent)
+    return (
+        qs.select_related("user__profile", "service", "vehicle")
+        .only(
+            "id",
+            "scheduled_at",
+            "user__id",
+            "user__profile__timezone",
+            "user__profile__wants_email",
+            "user__profile__wants_sms",
+            "user__profile__wants_push",
+            "service__name",
+            "vehicle__plate",
+        )
+        .order_by("scheduled_at")
+    )
+
+
+def build_reminders(booking, now):
+    window = _window_for(booking.scheduled_at - now)
+    profile = getattr(booking.user, "profile", None)
+    if window is None or profile is None:
+        return []
+
+    when = _local(booking.scheduled_at, profile.timezone)
+    message = (
+        f"Tu reserva de {booking.service.name} para el vehículo {booking.vehicle.plate} "
+        f"es el {when:%Y-%m-%d} a las {when:%H:%M}."
+    )
+    meta = {
+        "kind": "booking_reminder",
+        "booking_id": booking.id,
+        "window": window,
+        "scheduled_at": booking.scheduled_at.isoformat(),
+        "service": booking.service.name,
+        "plate": booking.vehicle.plate,
+        "local_time": when.strftime("%Y-%m-%d %H:%M"),
+    }
+    channels = [channel for channel, pref in CHANNEL_PREFS if getattr(profile, pref)]
+    reminders = [
+        Notification(
+            user_id=booking.user_id,
+            channel=channel,
+            subject=SUBJECTS[window],
+            message=message,
+            meta=meta,
+            dedupe_key=f"reminder:{booking.id}:{window}:{channel}",
+        )
+        for channel in channels
+    ]
+    # Copia para la bandeja web: siempre, ya entregada
+    reminders.append(
+        Notification(
+            user_id=booking.user_id,
+            channel=NotificationChannel.IN_APP,
+            subject=SUBJECTS[window],
+            message=message,
+            meta=meta,
+            status=NotificationStatus.SENT,
+            sent_at=now,
+            dedupe_key=f"reminder:{booking.id}:{window}:{NotificationChannel.IN_APP}",
+        )
+    )
+    return reminders
+
+
+def generate_reminders(now=None, chunk_size: int = 2000, full: bool = False) -> int:
+    """
+    Crea los recordatorios pendientes. Devuelve cuántas notificaciones creó.
+    Con `full` (o sin pasada anterior en cache) revisa todas las reservas de las próximas 24h.
+    """
+    now = now or timezone.now()
+    last_run = None if full else cache.get(LAST_RUN_KEY)
+    since = last_run - RUN_OVERLAP if last_run else None
+    batch_size = getattr(settings, "NOTIFICATION_BULK_BATCH_SIZE", 1000)
+    pending, total = [], 0
+    for booking in upcoming_bookings(now, since).iterator(chunk_size=chunk_size):
+        pending.extend(build_reminders(booking, now))
+        if len(pending) >= batch_size:
+            total += _flush(pending)
+            pending = []
+    if pending:
+        total += _flush(pending)
+    cache.set(LAST_RUN_KEY, now, LAST_RUN_TTL)
+    return total
+
+
+def _flush(notifications) -> int:
+    # Fuera las que ya existen (búsqueda por el índice único de dedupe_key): solo se avisa a
+    # la bandeja de filas insertadas de verdad
+    keys = [n.dedupe_key for n in notifications]
+    existing = set(
+        Notification.objects.filter(dedupe_key__in=keys).values_list("dedupe_key", flat=True)
+    )
+    new = [n for n in notifications if n.dedupe_key not in existing]
+    # ignore_conflicts: otra pasada concurrente pudo insertarlas entre medias
+    Notification.objects.bulk_create(new, ignore_conflicts=True)
+    notify_bulk_created(n.user_id for n in new if n.channel == NotificationChannel.IN_APP)
+    return len(new)
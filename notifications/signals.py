@@ -0,0 +1,13 @@
+# notifications/signals.py
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .inbox import notify_created
+from .models import Notification, NotificationChannel
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_counter(sender, instance: Notification, created: bool, **kwargs):
+    # Altas una a una; las masivas (bulk_create) llaman a inbox.notify_bulk_created
+    if created and instance.channel == NotificationChannel.IN_APP:
+        notify_created(instance.user_id)
@@ -1,3 +1,512 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Booking, BookingStatus
+from services.models import Service
+from users.models import User
+from vehicles.models import Vehicle
+
+from . import backends
+from .dispatcher import claim_batch, dispatch_batch, retry_delay
+from .inbox import decode_cursor, inbox_page, mark_read, notify_bulk_created, unread_count
+from .models import Notification, NotificationChannel, NotificationStatus
+from .providers import CircuitBreaker, PushBackend
+from .reminders import LAST_RUN_KEY, _flush, build_reminders, generate_reminders, upcoming_bookings
+from .retention import purge_notifications
+
+
+class EmailBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="cliente@example.com", password="x")
+
+    def setUp(self):
+        self.notifications = [
+            Notification.objects.create(
+                user=self.user,
+                channel=NotificationChannel.EMAIL,
+                subject=f"Aviso {i}",
+                message="Hola",
+            )
+            for i in range(4)
+        ]
+
+    def fail_on_call(self, failing):
+        """Parchea locmem para que la llamada número `failing` (desde 1) lance un error SMTP."""
+        calls = []
+        send_messages = LocmemEmailBackend.send_messages
+
+        def flaky(backend, messages):
+            calls.append(messages)
+            if len(calls) == failing:
+                raise OSError("conexión SMTP cerrada")
+            return send_messages(backend, messages)
+
+        return mock.patch.object(LocmemEmailBackend, "send_messages", flaky)
+
+    def test_batch_is_sent(self):
+        self.assertEqual(dispatch_batch()["sent"], 4)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(
+            set(Notification.objects.values_list("status", flat=True)), {NotificationStatus.SENT}
+        )
+
+    def test_failure_mid_chunk_keeps_delivered_messages_sent(self):
+        with self.fail_on_call(3), self.assertLogs("notifications.backends", "WARNING"):
+            counts = dispatch_batch()
+
+        self.assertEqual((counts["sent"], counts["failed"]), (3, 1))
+        self.assertEqual(len(mail.outbox), 3)
+        failed = Notification.objects.get(status=NotificationStatus.FAILED)
+        self.assertIn("SMTP", failed.meta["error"])
+        sent = Notification.objects.filter(status=NotificationStatus.SENT)
+        self.assertTrue(all(n.meta["provider_id"] for n in sent))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("notifications.providers.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        self.assertTrue(self.breaker.is_open())
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_lets_a_single_probe_through(self):
+        self.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())  # la prueba sigue en vuelo
+        self.breaker.record_success()
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        self.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open())
+        self.assertFalse(self.breaker.allow())
+
+    def test_lost_probe_is_replaced_after_timeout(self):
+        self.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.now += 31  # la prueba nunca informó
+        self.assertTrue(self.breaker.allow())
+
+
+@override_settings(
+    NOTIFICATION_CLAIM_TIMEOUT=300,
+    NOTIFICATION_RETRY_BASE_SECONDS=15,
+    NOTIFICATION_RETRY_MAX_SECONDS=60,
+)
+class DispatcherRetryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="cliente@example.com", password="x")
+
+    def setUp(self):
+        self.backend = PushBackend()
+        patcher = mock.patch.dict(backends._instances, {"PUSH": self.backend})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.notification = Notification.objects.create(
+            user=self.user, channel=NotificationChannel.PUSH, subject="Aviso", message="Hola"
+        )
+
+    def make_due(self):
+        Notification.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_claimed_batch_is_leased(self):
+        self.assertEqual(len(claim_batch(10)), 1)
+        self.assertEqual(claim_batch(10), [])
+
+    def test_backoff_is_exponential_and_capped(self):
+        self.assertEqual(
+            [retry_delay(n).total_seconds() for n in range(1, 6)], [15, 30, 60, 60, 60]
+        )
+
+    def test_provider_failure_defers_with_backoff(self):
+        self.backend.client.down = True
+        before = timezone.now()
+        self.assertEqual(dispatch_batch()["deferred"], 1)
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, NotificationStatus.QUEUED)
+        self.assertEqual(self.notification.meta["deferrals"], 1)
+        delay = self.notification.next_attempt_at - before
+        self.assertTrue(timedelta(seconds=15) <= delay < timedelta(seconds=20))
+        # Aparcada: no se vuelve a reclamar hasta que vence el backoff
+        self.assertEqual(dispatch_batch()["deferred"], 0)
+
+        self.make_due()
+        dispatch_batch()
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.meta["deferrals"], 2)
+        delay = self.notification.next_attempt_at - timezone.now()
+        self.assertGreater(delay, timedelta(seconds=25))
+
+    def test_sent_after_provider_recovers(self):
+        self.backend.client.down = True
+        dispatch_batch()
+        self.backend.client.down = False
+        self.make_due()
+
+        self.assertEqual(dispatch_batch()["sent"], 1)
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, NotificationStatus.SENT)
+        self.assertIsNone(self.notification.next_attempt_at)
+        self.assertNotIn("error", self.notification.meta)
+
+    def test_fails_after_max_attempts(self):
+        self.backend.client.down = True
+        for _ in range(self.backend.max_attempts):
+            self.make_due()
+            dispatch_batch()
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, NotificationStatus.FAILED)
+        self.assertIsNone(self.notification.next_attempt_at)
+
+    def test_failing_channel_does_not_resend_other_channels(self):
+        email = Notification.objects.create(
+            user=self.user, channel=NotificationChannel.EMAIL, subject="Aviso", message="Hola"
+        )
+        with mock.patch(
+            "notifications.backends.get_connection", side_effect=OSError("SMTP caído")
+        ), self.assertLogs("notifications.dispatcher", "ERROR"):
+            counts = dispatch_batch()
+        self.assertEqual((counts["sent"], counts["deferred"]), (1, 1))
+
+        email.refresh_from_db()
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, NotificationStatus.SENT)
+        self.assertEqual(email.status, NotificationStatus.QUEUED)
+        self.assertEqual(email.meta["deferrals"], 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        self.make_due()
+        self.assertEqual(dispatch_batch()["sent"], 1)  # solo el email
+        self.assertEqual(len(self.backend.client.sent), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class PurgeNotificationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="cliente@example.com", password="x")
+
+    def setUp(self):
+        statuses = [NotificationStatus.SENT, NotificationStatus.FAILED, NotificationStatus.QUEUED]
+        self.old = [self.add(status) for status in statuses]
+        self.recent = self.add(NotificationStatus.SENT)
+        Notification.objects.filter(pk__in=[n.pk for n in self.old]).update(
+            created_at=timezone.now() - timedelta(days=100)
+        )
+
+    def add(self, status):
+        return Notification.objects.create(
+            user=self.user,
+            channel=NotificationChannel.EMAIL,
+            subject="Aviso",
+            message="Hola",
+            status=status,
+        )
+
+    def remaining(self):
+        return set(Notification.objects.values_list("pk", flat=True))
+
+    def test_only_old_sent_and_failed_are_purged(self):
+        self.assertEqual(purge_notifications(days=90, dry_run=True), 2)
+        self.assertEqual(purge_notifications(days=90, chunk_size=1), 2)
+        self.assertEqual(self.remaining(), {self.old[2].pk, self.recent.pk})
+
+    def test_archive_receives_every_purged_row(self):
+        archive = io.StringIO()
+        purge_notifications(days=90, chunk_size=1, archive=archive)
+
+        rows = [json.loads(line) for line in archive.getvalue().splitlines()]
+        self.assertEqual({r["id"] for r in rows}, {self.old[0].pk, self.old[1].pk})
+        self.assertEqual(rows[0]["subject"], "Aviso")
+
+    def test_archive_failure_keeps_rows(self):
+        archive = mock.Mock()
+        archive.write.side_effect = OSError("disco lleno")
+        with self.assertRaises(OSError):
+            purge_notifications(days=90, archive=archive)
+        self.assertEqual(len(self.remaining()), 4)
+
+    def test_command_archives_to_gzip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "notificaciones.jsonl.gz")
+            out = io.StringIO()
+            call_command("purge_notifications", "--days=90", f"--archive={path}", stdout=out)
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                archived = {json.loads(line)["id"] for line in fh}
+
+        self.assertIn("borradas: 2", out.getvalue())
+        self.assertEqual(archived, {self.old[0].pk, self.old[1].pk})
+
+
+class InboxTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="cliente@example.com", password="x")
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def add(self, subject="Aviso"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                user=self.user, channel=NotificationChannel.IN_APP, subject=subject, message="Hola"
+            )
+
+
+@override_settings(NOTIFICATIONS_SHARED_CACHE=True)
+class UnreadCounterTests(InboxTestMixin, TestCase):
+    def test_counter_is_kept_in_cache(self):
+        self.add()
+        self.assertEqual(unread_count(self.user.pk), 1)  # COUNT y se guarda
+        second = self.add()
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 2)
+
+        mark_read(self.user.pk, [second.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 1)
+        mark_read(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 0)
+
+    def test_bulk_creation_invalidates_the_counter(self):
+        self.assertEqual(unread_count(self.user.pk), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.bulk_create(
+                Notification(user=self.user, channel=NotificationChannel.IN_APP, subject="Aviso")
+                for _ in range(3)
+            )
+            notify_bulk_created([self.user.pk])
+        self.assertEqual(unread_count(self.user.pk), 3)
+
+    def test_other_channels_do_not_count(self):
+        Notification.objects.create(user=self.user, channel=NotificationChannel.EMAIL)
+        self.assertEqual(unread_count(self.user.pk), 0)
+
+
+@override_settings(NOTIFICATIONS_SHARED_CACHE=False)
+class UnreadCounterWithoutSharedCacheTests(InboxTestMixin, TestCase):
+    def test_counter_is_read_from_the_database(self):
+        self.add()
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.user.pk), 1)
+        # Otro proceso (o un UPDATE directo) no deja un contador rancio
+        Notification.objects.update(read_at=timezone.now())
+        self.assertEqual(unread_count(self.user.pk), 0)
+        self.assertEqual(cache.get(f"notifications:unread:{self.user.pk}"), None)
+
+
+class InboxPaginationTests(InboxTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.notifications = [self.add(f"Aviso {i}") for i in range(5)]
+        # Empates en created_at: el id desempata
+        Notification.objects.filter(pk__in=[n.pk for n in self.notifications[1:4]]).update(
+            created_at=self.notifications[1].created_at
+        )
+
+    def test_pages_cover_every_row_once(self):
+        seen, cursor, pages = [], "", 0
+        while True:
+            items, cursor = inbox_page(self.user.pk, cursor=cursor, page_size=2)
+            seen += [n.pk for n in items]
+            pages += 1
+            if cursor is None:
+                break
+        expected = list(
+            Notification.objects.order_by("-created_at", "-id").values_list("pk", flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_invalid_cursor_starts_over(self):
+        self.assertIsNone(decode_cursor("no-es-un-cursor"))
+        items, _ = inbox_page(self.user.pk, cursor="no-es-un-cursor", page_size=2)
+        self.assertEqual(items, inbox_page(self.user.pk, page_size=2)[0])
+
+    def test_view_follows_the_cursor(self):
+        self.client.force_login(self.user)
+        url = reverse("notifications:inbox")
+        first = self.client.get(url)
+        self.assertEqual(len(first.context["notifications"]), 5)
+        self.assertIsNone(first.context["next_cursor"])
+
+        with mock.patch("notifications.views.NotificationInboxView.page_size", 3):
+            page = self.client.get(url)
+            rest = self.client.get(url, {"cursor": page.context["next_cursor"]})
+        self.assertEqual(
+            [n.pk for n in page.context["notifications"] + rest.context["notifications"]],
+            [n.pk for n in first.context["notifications"]],
+        )
+
+
+@override_settings(NOTIFICATIONS_SSE_POLL_SECONDS=0.01, NOTIFICATIONS_SSE_MAX_SECONDS=0.05)
+class NotificationStreamTests(InboxTestMixin, TestCase):
+    url = reverse("notifications:stream")
+
+    async def stream(self, **headers):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, headers=headers)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        return [
+            json.loads(line.removeprefix("data: "))
+            for line in body.splitlines()
+            if line.startswith("data: ")
+        ]
+
+    async def test_resumes_after_last_event_id(self):
+        first = await Notification.objects.acreate(
+            user=self.user, channel=NotificationChannel.IN_APP, subject="Uno"
+        )
+        await Notification.objects.acreate(
+            user=self.user, channel=NotificationChannel.IN_APP, subject="Dos"
+        )
+        events = await self.stream(last_event_id=str(first.pk))
+        self.assertEqual([e["subject"] for e in events], ["Dos"])
+
+    @override_settings(NOTIFICATIONS_SHARED_CACHE=True)
+    async def test_shared_cache_stream_catches_up_without_a_stamp(self):
+        # Tras reconectar, lo pendiente se envía aunque la marca `latest` haya caducado
+        first = await Notification.objects.acreate(
+            user=self.user, channel=NotificationChannel.IN_APP, subject="Uno"
+        )
+        await Notification.objects.acreate(
+            user=self.user, channel=NotificationChannel.IN_APP, subject="Dos"
+        )
+        await cache.aclear()
+        events = await self.stream(last_event_id=str(first.pk))
+        self.assertEqual([e["subject"] for e in events], ["Dos"])
+
+    async def test_new_connection_skips_existing_notifications(self):
+        await Notification.objects.acreate(
+            user=self.user, channel=NotificationChannel.IN_APP, subject="Vieja"
+        )
+        self.assertEqual(await self.stream(), [])
+
+    async def test_anonymous_is_forbidden(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+
+class ReminderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="cliente@example.com", password="x")
+        cls.service = Service.objects.create(name="Lavado", price=10, duration_minutes=30)
+        cls.vehicle = Vehicle.objects.create(
+            owner=cls.user, plate="ABC123", make="Mazda", model="3", year=2020
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.now = timezone.now()
+        self.soon = self.book(hours=1)
+        self.tomorrow = self.book(hours=10)
+        self.book(hours=30)  # fuera del horizonte
+        self.book(hours=1, minutes=30, status=BookingStatus.CANCELLED)
+        self.book(hours=-1)  # ya pasó
+
+    def book(self, status=BookingStatus.PENDING, **delta):
+        return Booking.objects.create(
+            user=self.user,
+            vehicle=self.vehicle,
+            service=self.service,
+            scheduled_at=self.now + timedelta(**delta),
+            status=status,
+        )
+
+    def keys(self):
+        return set(Notification.objects.values_list("dedupe_key", flat=True))
+
+    def test_range_query_loads_everything_in_one_query(self):
+        with self.assertNumQueries(1):
+            bookings = list(upcoming_bookings(self.now))
+            plates = [(b.vehicle.plate, b.service.name, b.user.profile.timezone) for b in bookings]
+        self.assertEqual([b.pk for b in bookings], [self.soon.pk, self.tomorrow.pk])
+        self.assertEqual(plates[0], ("ABC123", "Lavado", "America/Bogota"))
+
+    def test_incremental_pass_reads_only_news(self):
+        Booking.objects.update(updated_at=self.now - timedelta(days=1))
+        # Desde hace 90 min solo la de dentro de 1h cruzó una ventana (la de 2h)
+        since = self.now - timedelta(minutes=90)
+        self.assertEqual(list(upcoming_bookings(self.now, since)), [self.soon])
+
+        since = self.now - timedelta(minutes=1)
+        self.assertEqual(list(upcoming_bookings(self.now, since)), [])
+        Booking.objects.filter(pk=self.tomorrow.pk).update(updated_at=self.now)
+        self.assertEqual(list(upcoming_bookings(self.now, since)), [self.tomorrow])
+
+    def test_nearest_window_per_channel_plus_inbox_copy(self):
+        self.assertEqual(generate_reminders(now=self.now), 4)
+        self.assertEqual(
+            self.keys(),
+            {
+                f"reminder:{self.soon.pk}:2h:EMAIL",
+                f"reminder:{self.soon.pk}:2h:IN_APP",
+                f"reminder:{self.tomorrow.pk}:24h:EMAIL",
+                f"reminder:{self.tomorrow.pk}:24h:IN_APP",
+            },
+        )
+        inbox = Notification.objects.get(dedupe_key=f"reminder:{self.soon.pk}:2h:IN_APP")
+        self.assertEqual(inbox.status, NotificationStatus.SENT)
+        self.assertIn(" a las ", inbox.message)
+
+    def test_rerun_inserts_no_duplicates(self):
+        generate_reminders(now=self.now)
+        self.assertIsNotNone(cache.get(LAST_RUN_KEY))
+        self.assertEqual(generate_reminders(now=self.now), 0)
+        self.assertEqual(generate_reminders(now=self.now, full=True), 0)
+        self.assertEqual(Notification.objects.count(), 4)
+
+    def test_dedupe_key_is_unique(self):
+        generate_reminders(now=self.now)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                user=self.user,
+                channel=NotificationChannel.EMAIL,
+                dedupe_key=f"reminder:{self.soon.pk}:2h:EMAIL",
+            )
+
+    def test_flush_skips_existing_rows_and_notifies_only_new_ones(self):
+        booking = upcoming_bookings(self.now).get(pk=self.soon.pk)
+        _flush(build_reminders(booking, self.now)[:1])  # solo el EMAIL
+
+        calls = []
+        with mock.patch(
+            "notifications.reminders.notify_bulk_created",
+            side_effect=lambda user_ids: calls.append(list(user_ids)),
+        ):
+            self.assertEqual(_flush(build_reminders(booking, self.now)), 1)
+            self.assertEqual(_flush(build_reminders(booking, self.now)), 0)
+        self.assertEqual(calls, [[self.user.pk], []])
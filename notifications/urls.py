@@ -0,0 +1,12 @@
+# notifications/urls.py
+from django.urls import path
+
+from .views import NotificationInboxView, NotificationMarkReadView, notification_stream
+
+app_name = "notifications"
+
+urlpatterns = [
+    path("", NotificationInboxView.as_view(), name="inbox"),
+    path("read/", NotificationMarkReadView.as_view(), name="mark_read"),
+    path("stream/", notification_stream, name="stream"),
+]
@@ -1,3 +1,95 @@
-from django.shortcuts import render
+# notifications/views.py
+import asyncio
+import json
+import time
 
-# Create your views here.
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.http import HttpResponseForbidden, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.views import View
+
+from .inbox import LATEST_KEY, inbox_page, inbox_queryset, mark_read, shared_cache
+
+
+class NotificationInboxView(LoginRequiredMixin, View):
+    """
+    Bandeja de notificaciones in-app con paginación keyset (?cursor=...),
+    sin OFFSET ni COUNT: cada página es un rango sobre el índice (user, -created_at, -id).
+    """
+
+    template_name = "notifications/inbox.html"
+    page_size = 20
+
+    def get(self, request):
+        items, next_cursor = inbox_page(
+            request.user.pk, cursor=request.GET.get("cursor", ""), page_size=self.page_size
+        )
+        return render(
+            request, self.template_name, {"notifications": items, "next_cursor": next_cursor}
+        )
+
+
+class NotificationMarkReadView(LoginRequiredMixin, View):
+    """Marca como leídas las notificaciones indicadas (`ids`) o todas si no se indica ninguna."""
+
+    def post(self, request):
+        ids = [int(pk) for pk in request.POST.getlist("ids") if pk.isdigit()] or None
+        updated = mark_read(request.user.pk, ids)
+        if updated:
+            messages.success(request, f"{updated} notificación(es) marcada(s) como leída(s).")
+        return redirect("notifications:inbox")
+
+
+async def notification_stream(request):
+    """
+    Server-sent events con las notificaciones nuevas del usuario (servir con config.asgi).
+    Cada `NOTIFICATIONS_SSE_POLL_SECONDS` se mira la marca `latest` en cache; solo si cambió
+    se consulta la BD (id > último enviado); sin cache compartida, en cada intervalo. La
+    conexión se cierra tras `NOTIFICATIONS_SSE_MAX_SECONDS` y el navegador reconecta con
+    Last-Event-ID.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden()
+
+    poll = settings.NOTIFICATIONS_SSE_POLL_SECONDS
+    max_seconds = settings.NOTIFICATIONS_SSE_MAX_SECONDS
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    use_stamp = shared_cache()
+
+    async def events():
+        if last_event_id.isdigit():
+            last_id = int(last_event_id)
+        else:
+            latest = await inbox_queryset(user.pk).order_by("-id").values_list("id").afirst()
+            last_id = latest[0] if latest else 0
+        seen_stamp = object()  # la primera vuelta siempre consulta: puede haber pendientes
+        started = last_ping = time.monotonic()
+        yield f"retry: {int(poll * 1000)}\n\n"
+
+        while time.monotonic() - started < max_seconds:
+            stamp = await cache.aget(LATEST_KEY.format(user.pk)) if use_stamp else None
+            if not use_stamp or stamp != seen_stamp:
+                seen_stamp = stamp
+                qs = (
+                    inbox_queryset(user.pk)
+                    .filter(id__gt=last_id)
+                    .order_by("id")
+                    .values("id", "subject", "message", "created_at")
+                )
+                async for item in qs:
+                    last_id = item["id"]
+                    data = json.dumps(item, default=str)
+                    yield f"id: {item['id']}\nevent: notification\ndata: {data}\n\n"
+            if time.monotonic() - last_ping >= 15:
+                last_ping = time.monotonic()
+                yield ": ping\n\n"
+            await asyncio.sleep(poll)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # que nginx no acumule el stream
+    return response
@@ -1,3 +1,51 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Payment, RevenueRollup
+from .rollups import merge_deltas
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ("id", "booking", "amount", "currency", "status", "provider", "created_at")
+    list_filter = ("status", "provider")
+    search_fields = ("transaction_id",)
+    list_select_related = ("booking__vehicle",)
+    raw_id_fields = ("booking",)
+    # Estado, monto y moneda los cambia payments/services.py (que mantiene los rollups)
+    readonly_fields = (
+        "booking",
+        "amount",
+        "currency",
+        "status",
+        "idempotency_key",
+        "attempts",
+        "processed_at",
+    )
+
+
+@admin.register(RevenueRollup)
+class RevenueRollupAdmin(admin.ModelAdmin):
+    """
+    Reporte de ingresos diarios: lee los buckets pre-agregados, no la tabla de pagos.
+    Solo lectura (los mantiene payments/rollups.py). Antes de listar suma los deltas
+    pendientes para no mostrar cifras atrasadas.
+    """
+
+    list_display = ("day", "service", "currency", "status", "total_amount", "payment_count")
+    list_filter = ("status", "currency", "service")
+    date_hierarchy = "day"
+    list_select_related = ("service",)
+
+    def changelist_view(self, request, extra_context=None):
+        while merge_deltas():
+            pass
+        return super().changelist_view(request, extra_context)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
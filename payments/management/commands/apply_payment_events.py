@@ -0,0 +1,29 @@
+# payments/management/commands/apply_payment_events.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.services import apply_webhook_events
+
+
+class Command(BaseCommand):
+    help = "Aplica por lotes los webhooks de pago pendientes (bandeja PaymentWebhookEvent)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--loop", action="store_true", help="Sigue corriendo y espera nuevos eventos."
+        )
+        parser.add_argument("--sleep", type=float, default=1.0, help="Espera con cola vacía (s).")
+
+    def handle(self, *args, **opts):
+        total = 0
+        while True:
+            taken = apply_webhook_events(batch_size=opts["batch_size"])
+            total += taken
+            if taken:
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Eventos revisados: {total}"))
@@ -0,0 +1,29 @@
+# payments/management/commands/merge_revenue_deltas.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.rollups import merge_deltas
+
+
+class Command(BaseCommand):
+    help = "Suma a RevenueRollup los deltas pendientes de los cambios de pago (por lotes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--loop", action="store_true", help="Sigue corriendo y espera nuevos deltas."
+        )
+        parser.add_argument("--sleep", type=float, default=5.0, help="Espera sin deltas (s).")
+
+    def handle(self, *args, **opts):
+        total = 0
+        while True:
+            merged = merge_deltas(batch_size=opts["batch_size"])
+            total += merged
+            if merged:
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Deltas de ingresos sumados: {total}"))
@@ -0,0 +1,29 @@
+# payments/management/commands/process_payments.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.services import process_pending_payments
+
+
+class Command(BaseCommand):
+    help = "Cobra los pagos PENDING en lotes (se pueden lanzar varios workers en paralelo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--loop", action="store_true", help="Sigue corriendo y espera nuevos pagos."
+        )
+        parser.add_argument("--sleep", type=float, default=2.0, help="Espera con cola vacía (s).")
+
+    def handle(self, *args, **opts):
+        total = 0
+        while True:
+            processed = process_pending_payments(batch_size=opts["batch_size"])
+            total += processed
+            if processed:
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Pagos procesados: {total}"))
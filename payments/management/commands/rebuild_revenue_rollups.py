@@ -0,0 +1,23 @@
+# payments/management/commands/rebuild_revenue_rollups.py
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from payments.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla RevenueRollup a partir de Payment (por lotes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=10000)
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            default=None,
+            help="Solo reconstruye días >= YYYY-MM-DD (por defecto, todo).",
+        )
+
+    def handle(self, *args, **opts):
+        buckets = rebuild(chunk_size=opts["chunk_size"], since=opts["since"])
+        self.stdout.write(self.style.SUCCESS(f"Buckets de ingresos escritos: {buckets}"))
@@ -0,0 +1,36 @@
+import uuid
+
+from django.db import migrations, models
+
+
+def fill_idempotency_keys(apps, schema_editor):
+    Payment = apps.get_model("payments", "Payment")
+    for payment in Payment.objects.filter(idempotency_key__isnull=True).only("pk"):
+        payment.idempotency_key = uuid.uuid4()
+        payment.save(update_fields=["idempotency_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="idempotency_key",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_idempotency_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="payment",
+            name="idempotency_key",
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0002_payment_idempotency_key_attempts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentWebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, db_index=True)),
+                ("provider", models.CharField(max_length=30)),
+                ("event_id", models.CharField(max_length=255)),
+                ("event_type", models.CharField(blank=True, max_length=100)),
+                ("transaction_id", models.CharField(blank=True, max_length=120)),
+                (
+                    "status",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("PENDING", "Pendiente"),
+                            ("PAID", "Pagado"),
+                            ("FAILED", "Fallido"),
+                            ("REFUNDED", "Reembolsado"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("error_message", models.TextField(blank=True)),
+                ("payload", models.JSONField()),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Evento de webhook",
+                "verbose_name_plural": "Eventos de webhook",
+                "ordering": ["created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("processed_at__isnull", True)),
+                        fields=["created_at"],
+                        name="payments_webhook_pending_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("provider", "event_id"),
+                        name="unique_provider_webhook_event",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:15
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0003_payment_webhook_event"),
+        ("services", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevenueRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, db_index=True)),
+                ("day", models.DateField()),
+                ("currency", models.CharField(max_length=10)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pendiente"),
+                            ("PAID", "Pagado"),
+                            ("FAILED", "Fallido"),
+                            ("REFUNDED", "Reembolsado"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=14),
+                ),
+                ("payment_count", models.IntegerField(default=0)),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="revenue_rollups",
+                        to="services.service",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ingreso diario",
+                "verbose_name_plural": "Ingresos diarios",
+                "ordering": ["-day", "service"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "service", "currency", "status"),
+                        name="unique_revenue_rollup_key",
+                    )
+                ],
+            },
+        ),
+    ]
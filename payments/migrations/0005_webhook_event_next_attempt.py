@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0004_revenue_rollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paymentwebhookevent",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
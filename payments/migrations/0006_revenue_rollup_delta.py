@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0005_webhook_event_next_attempt"),
+        ("services", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevenueRollupDelta",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("currency", models.CharField(max_length=10)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pendiente"),
+                            ("PAID", "Pagado"),
+                            ("FAILED", "Fallido"),
+                            ("REFUNDED", "Reembolsado"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("count", models.IntegerField()),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="services.service",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Delta de ingresos",
+                "verbose_name_plural": "Deltas de ingresos",
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
+import uuid
 from decimal import Decimal
 
 from django.core.validators import MinValueValidator
@@ -5,6 +6,7 @@ from django.db import models
 
 from bookings.models import Booking
 from config.models import TimeStampedModel
+from services.models import Service
 
 
 class PaymentStatus(models.TextChoices):
@@ -25,6 +27,9 @@ class Payment(TimeStampedModel):
         max_length=10, choices=PaymentStatus.choices, default=PaymentStatus.PENDING
     )
     transaction_id = models.CharField(max_length=120, blank=True, db_index=True)
+    # Clave estable enviada al proveedor en cada intento: los reintentos no duplican cobros
+    idempotency_key = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
     error_message = models.TextField(blank=True)
 
     processed_at = models.DateTimeField(blank=True, null=True)
@@ -40,3 +45,91 @@ class Payment(TimeStampedModel):
 
     def __str__(self):
         return f"Pago #{self.id} - Booking #{self.booking_id} - {self.status}"
+
+
+class PaymentWebhookEvent(TimeStampedModel):
+    """
+    Bandeja de entrada (append-only) de webhooks de proveedores.
+    El endpoint solo inserta aquí y responde 200; `apply_payment_events` los aplica luego.
+    La unicidad (provider, event_id) descarta los reintentos del proveedor.
+    """
+
+    provider = models.CharField(max_length=30)
+    event_id = models.CharField(max_length=255)
+    event_type = models.CharField(max_length=100, blank=True)
+    transaction_id = models.CharField(max_length=120, blank=True)
+    status = models.CharField(max_length=10, choices=PaymentStatus.choices, blank=True)
+    error_message = models.TextField(blank=True)
+    payload = models.JSONField()
+    processed_at = models.DateTimeField(blank=True, null=True)
+    # Huérfano (su Payment aún no existe): no se vuelve a tomar antes de esta hora
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Evento de webhook"
+        verbose_name_plural = "Eventos de webhook"
+        ordering = ["created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["provider", "event_id"], name="unique_provider_webhook_event"
+            )
+        ]
+        indexes = [
+            # Solo los pendientes: el worker no recorre el histórico ya aplicado
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(processed_at__isnull=True),
+                name="payments_webhook_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.event_id} ({self.event_type})"
+
+
+class RevenueRollup(TimeStampedModel):
+    """
+    Ingresos pre-agregados por (día, servicio, moneda, estado).
+    Se mantiene incrementalmente: cada cambio de estado de Payment deja un RevenueRollupDelta
+    que `merge_revenue_deltas` suma aquí (payments/rollups.py). Se puede reconstruir con
+    `manage.py rebuild_revenue_rollups`.
+    """
+
+    day = models.DateField()
+    service = models.ForeignKey(Service, on_delete=models.PROTECT, related_name="revenue_rollups")
+    currency = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=PaymentStatus.choices)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    payment_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Ingreso diario"
+        verbose_name_plural = "Ingresos diarios"
+        ordering = ["-day", "service"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "service", "currency", "status"], name="unique_revenue_rollup_key"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.day} - servicio #{self.service_id} - {self.currency} {self.status}"
+
+
+class RevenueRollupDelta(models.Model):
+    """
+    Cambio pendiente de sumar a un RevenueRollup (solo inserciones). Se escribe en la
+    transacción del cambio de Payment sin tocar la fila compartida del bucket, así dos
+    reservas simultáneas no se serializan sobre ella; luego se agrega por lotes.
+    """
+
+    day = models.DateField()
+    service = models.ForeignKey(Service, on_delete=models.PROTECT, related_name="+")
+    currency = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=PaymentStatus.choices)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    count = models.IntegerField()
+
+    class Meta:
+        verbose_name = "Delta de ingresos"
+        verbose_name_plural = "Deltas de ingresos"
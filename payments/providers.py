@@ -0,0 +1,267 @@
+# payments/providers.py
+"""
+Proveedores de pago intercambiables.
+
+Cada proveedor implementa `charge()` y recibe siempre la `idempotency_key` del Payment:
+si el worker reintenta un cobro (caída, timeout, reinicio), el proveedor devuelve el
+mismo resultado en lugar de cobrar dos veces.
+
+También validan y normalizan sus webhooks (`verify_webhook` / `parse_event`).
+
+El proveedor activo por nombre se configura en settings.PAYMENTS_PROVIDERS.
+"""
+
+import hashlib
+import hmac
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ChargeStatus:
+    SUCCEEDED = "succeeded"
+    PENDING = "pending"  # el proveedor confirmará luego (webhook)
+    FAILED = "failed"  # rechazo definitivo (tarjeta, fondos, etc.)
+
+
+@dataclass
+class ChargeResult:
+    status: str
+    transaction_id: str = ""
+    error_message: str = ""
+    raw: dict = field(default_factory=dict)
+
+
+@dataclass
+class WebhookEvent:
+    """Evento de proveedor normalizado. `status` es un PaymentStatus o "" si no aplica."""
+
+    event_id: str
+    event_type: str
+    transaction_id: str = ""
+    status: str = ""
+    error_message: str = ""
+
+
+class PaymentProviderError(Exception):
+    """Error transitorio del proveedor (red, 5xx...). El cobro se reintenta."""
+
+
+class BasePaymentProvider:
+    name = ""
+
+    def charge(
+        self, *, amount: Decimal, currency: str, idempotency_key: str, metadata: dict
+    ) -> ChargeResult:
+        raise NotImplementedError
+
+    @property
+    def webhook_secret(self) -> str:
+        return settings.PAYMENTS_WEBHOOK_SECRETS.get(self.name, "")
+
+    def verify_webhook(self, body: bytes, headers) -> bool:
+        raise NotImplementedError
+
+    def parse_event(self, payload: dict) -> WebhookEvent:
+        raise NotImplementedError
+
+
+class FakePaymentProvider(BasePaymentProvider):
+    """
+    Proveedor en memoria para desarrollo y tests.
+    - Recuerda los resultados por idempotency_key (reintentos no duplican cobros).
+    - `decline_amounts`: montos que se rechazan (para simular fallos).
+    - `fail_next`: número de llamadas que lanzan PaymentProviderError (fallo transitorio).
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, decline_amounts=None):
+        self.latency = latency
+        self.decline_amounts = {Decimal(str(a)) for a in (decline_amounts or [])}
+        self.fail_next = 0
+        self.charges = {}  # idempotency_key -> ChargeResult
+        self._lock = threading.Lock()
+
+    def charge(self, *, amount, currency, idempotency_key, metadata):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                raise PaymentProviderError("Fallo simulado del proveedor.")
+            if idempotency_key in self.charges:
+                return self.charges[idempotency_key]
+            if Decimal(amount) in self.decline_amounts:
+                result = ChargeResult(
+                    status=ChargeStatus.FAILED,
+                    transaction_id=f"fake_{uuid.uuid4().hex}",
+                    error_message="Pago rechazado (simulado).",
+                )
+            else:
+                result = ChargeResult(
+                    status=ChargeStatus.SUCCEEDED, transaction_id=f"fake_{uuid.uuid4().hex}"
+                )
+            result.raw = {"amount": str(amount), "currency": currency, "metadata": metadata}
+            self.charges[idempotency_key] = result
+            return result
+
+    def sign(self, body: bytes) -> str:
+        return hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+
+    def verify_webhook(self, body, headers):
+        signature = headers.get("X-Fake-Signature", "")
+        return bool(self.webhook_secret) and hmac.compare_digest(self.sign(body), signature)
+
+    def parse_event(self, payload):
+        # Formato: {"id", "type", "transaction_id", "status", "error_message"}
+        return WebhookEvent(
+            event_id=str(payload["id"]),
+            event_type=payload.get("type", ""),
+            transaction_id=payload.get("transaction_id", ""),
+            status=payload.get("status", ""),
+            error_message=payload.get("error_message", ""),
+        )
+
+
+# Decimales de la unidad menor por moneda (ISO 4217); el resto usa 2
+CURRENCY_EXPONENTS = {
+    "BIF": 0,
+    "CLP": 0,
+    "JPY": 0,
+    "KRW": 0,
+    "PYG": 0,
+    "VND": 0,
+    "BHD": 3,
+    "JOD": 3,
+    "KWD": 3,
+    "OMR": 3,
+    "TND": 3,
+}
+
+
+def currency_exponent(currency: str) -> int:
+    return CURRENCY_EXPONENTS.get((currency or "").upper(), 2)
+
+
+def to_minor_units(amount, currency: str = "") -> int:
+    """Monto en la unidad menor, redondeado (no truncado): Decimal("10.005") USD -> 1001."""
+    scaled = Decimal(amount).scaleb(currency_exponent(currency))
+    return int(scaled.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(value, currency: str = "") -> Decimal:
+    """Inverso de to_minor_units: 1001 USD -> Decimal("10.01"), 1001 JPY -> Decimal("1001")."""
+    return Decimal(value).scaleb(-currency_exponent(currency))
+
+
+class StripePaymentProvider(BasePaymentProvider):
+    """
+    Stripe (PaymentIntents). No guardamos métodos de pago, así que el intent se crea sin
+    confirmar: queda en "requires_payment_method"/"requires_action" y el cliente lo completa
+    con Stripe.js (client_secret del intent, recuperable por su id). Mientras tanto el
+    Payment sigue PENDING con su transaction_id; el estado final llega solo por webhook.
+    Nunca se marca PAID por crear el intent: solo un intent "succeeded" cuenta como cobrado.
+    """
+
+    name = "stripe"
+
+    # Estado del PaymentIntent → ChargeStatus (lo no listado, p. ej. "requires_action",
+    # "requires_payment_method" o "processing", queda PENDING a la espera del webhook)
+    INTENT_STATUS = {
+        "succeeded": ChargeStatus.SUCCEEDED,
+        "canceled": ChargeStatus.FAILED,
+    }
+
+    def __init__(self, api_key: str = ""):
+        import stripe  # dependencia solo de producción
+
+        self.stripe = stripe
+        self.api_key = api_key or getattr(settings, "STRIPE_SECRET_KEY", "")
+
+    def charge(self, *, amount, currency, idempotency_key, metadata):
+        try:
+            intent = self.stripe.PaymentIntent.create(
+                amount=to_minor_units(amount, currency),
+                currency=currency.lower(),
+                metadata=metadata,
+                automatic_payment_methods={"enabled": True},
+                api_key=self.api_key,
+                idempotency_key=idempotency_key,
+            )
+        except self.stripe.error.CardError as exc:
+            return ChargeResult(status=ChargeStatus.FAILED, error_message=str(exc))
+        except self.stripe.error.StripeError as exc:
+            raise PaymentProviderError(str(exc)) from exc
+
+        status = self.INTENT_STATUS.get(intent.status, ChargeStatus.PENDING)
+        error = ""
+        if status == ChargeStatus.PENDING:
+            error = f"Pendiente de confirmación del cliente ({intent.status})"
+        return ChargeResult(
+            status=status,
+            transaction_id=intent.id,
+            error_message=error,
+            raw={"status": intent.status},
+        )
+
+    # Tipos de evento de Stripe → PaymentStatus
+    EVENT_STATUS = {
+        "payment_intent.succeeded": "PAID",
+        "payment_intent.payment_failed": "FAILED",
+        "payment_intent.canceled": "FAILED",
+        "charge.refunded": "REFUNDED",
+    }
+
+    def verify_webhook(self, body, headers):
+        try:
+            self.stripe.Webhook.construct_event(
+                body, headers.get("Stripe-Signature", ""), self.webhook_secret
+            )
+        except (ValueError, self.stripe.error.SignatureVerificationError):
+            return False
+        return True
+
+    def parse_event(self, payload):
+        obj = payload.get("data", {}).get("object", {})
+        if payload.get("type", "").startswith("charge."):
+            transaction_id = obj.get("payment_intent") or ""
+        else:
+            transaction_id = obj.get("id", "")
+        error = (obj.get("last_payment_error") or {}).get("message", "")
+        return WebhookEvent(
+            event_id=payload["id"],
+            event_type=payload.get("type", ""),
+            transaction_id=transaction_id,
+            status=self.EVENT_STATUS.get(payload.get("type", ""), ""),
+            error_message=error,
+        )
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_provider(name: str = "") -> BasePaymentProvider:
+    """
+    Devuelve (y cachea por proceso) la instancia del proveedor `name`.
+    Sin nombre, usa settings.PAYMENTS_DEFAULT_PROVIDER.
+    """
+    name = name or settings.PAYMENTS_DEFAULT_PROVIDER
+    with _instances_lock:
+        if name not in _instances:
+            try:
+                path = settings.PAYMENTS_PROVIDERS[name]
+            except KeyError as exc:
+                raise PaymentProviderError(f"Proveedor de pago desconocido: {name}") from exc
+            try:
+                _instances[name] = import_string(path)()
+            except ImportError as exc:
+                # p. ej. la librería `stripe` no está instalada en este entorno
+                raise PaymentProviderError(f"Proveedor de pago no disponible: {name}") from exc
+        return _instances[name]
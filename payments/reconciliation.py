@@ -0,0 +1,255 @@
+# payments/reconciliation.py
+"""
+Conciliación de pagos contra el archivo de liquidación del proveedor.
+
+Hash join particionado (en disco) para memoria acotada:
+1. Se recorre el archivo (CSV/JSONL) en streaming y cada fila va a una de N particiones
+   temporales según hash(transaction_id).
+2. Nuestros Payment se leen en lotes ordenados por pk (keyset) y se particionan igual.
+3. Cada partición se une en memoria: tabla hash con el lado del proveedor y se recorre el
+   nuestro. En memoria solo vive 1/N del archivo a la vez.
+
+Los montos se comparan en la unidad mayor: si el archivo trae unidades menores
+(`minor_units`), se convierten con los decimales de cada moneda (JPY 0, USD 2, KWD 3). Con
+monedas distintas no se comparan montos: se informa `currency_differs`.
+Si nuestro lado está filtrado (--since/--until/--provider), el archivo no lo está: las filas
+suyas sin pareja se contrastan con la BD (`exclude_known`) antes de darlas por
+`missing_locally`.
+"""
+
+import csv
+import json
+import os
+import tempfile
+import zlib
+from dataclasses import asdict, dataclass
+from decimal import Decimal, InvalidOperation
+
+from .models import Payment, PaymentStatus
+from .providers import from_minor_units
+from .services import STATUS_RANK
+
+# Estados de los archivos de liquidación → PaymentStatus
+SETTLEMENT_STATUS = {
+    "succeeded": PaymentStatus.PAID,
+    "paid": PaymentStatus.PAID,
+    "settled": PaymentStatus.PAID,
+    "captured": PaymentStatus.PAID,
+    "refunded": PaymentStatus.REFUNDED,
+    "refund": PaymentStatus.REFUNDED,
+    "failed": PaymentStatus.FAILED,
+    "declined": PaymentStatus.FAILED,
+    "canceled": PaymentStatus.FAILED,
+    "cancelled": PaymentStatus.FAILED,
+    "pending": PaymentStatus.PENDING,
+    "processing": PaymentStatus.PENDING,
+}
+
+
+class MismatchKind:
+    MISSING_IN_SETTLEMENT = "missing_in_settlement"
+    MISSING_LOCALLY = "missing_locally"
+    AMOUNT_DIFFERS = "amount_differs"
+    CURRENCY_DIFFERS = "currency_differs"
+    STATUS_DIFFERS = "status_differs"
+
+
+@dataclass
+class Mismatch:
+    kind: str
+    transaction_id: str
+    payment_id: str = ""
+    our_amount: str = ""
+    their_amount: str = ""
+    our_status: str = ""
+    their_status: str = ""
+    # Corrección sugerida: "mark_refunded" / "mark_failed" cuando el proveedor lo indica
+    action: str = ""
+
+
+FIELDNAMES = list(Mismatch.__dataclass_fields__)
+
+
+def normalize_status(value: str) -> str:
+    value = (value or "").strip()
+    return SETTLEMENT_STATUS.get(value.lower(), value.upper())
+
+
+def read_settlement(path: str, fmt: str = "", minor_units: bool = False):
+    """
+    Genera tuplas (transaction_id, amount, currency, status) sin cargar el archivo entero.
+    Columnas/claves esperadas: transaction_id, amount, currency, status. Con `minor_units`
+    el monto del archivo viene en la unidad menor (p. ej. centavos) y se convierte.
+    El archivo se abre ya (no al iterar): un OSError sale de esta llamada.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    return _settlement_rows(open(path, newline="", encoding="utf-8"), fmt, minor_units)
+
+
+def _settlement_rows(fh, fmt: str, minor_units: bool = False):
+    with fh:
+        if fmt == "jsonl":
+            rows = (json.loads(line) for line in fh if line.strip())
+        else:
+            rows = csv.DictReader(fh)
+        yield from parse_settlement_rows(rows, minor_units)
+
+
+def parse_settlement_rows(rows, minor_units: bool = False):
+    """Normaliza filas (dicts) del proveedor a tuplas (transaction_id, amount, currency, status)."""
+    for row in rows:
+        tid = str(row.get("transaction_id") or "").strip()
+        if not tid:
+            continue
+        amount = str(row.get("amount", "")).strip()
+        currency = str(row.get("currency", "")).strip().upper()
+        if minor_units:
+            try:
+                amount = str(from_minor_units(amount, currency))
+            except InvalidOperation:
+                pass  # monto ilegible: se informa como amount_differs
+        yield tid, amount, currency, normalize_status(row.get("status", ""))
+
+
+def iter_payments(chunk_size: int = 5000, provider: str = "", since=None, until=None):
+    """Nuestro lado, en lotes por pk (keyset) y solo con las columnas necesarias."""
+    qs = Payment.objects.exclude(transaction_id="").order_by("pk")
+    if provider:
+        qs = qs.filter(provider=provider)
+    if since is not None:
+        qs = qs.filter(created_at__date__gte=since)
+    if until is not None:
+        qs = qs.filter(created_at__date__lte=until)
+    qs = qs.values_list("pk", "transaction_id", "amount", "currency", "status")
+
+    last_pk = 0
+    while True:
+        chunk = list(qs.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_pk = chunk[-1][0]
+
+
+def _amounts_differ(ours, theirs) -> bool:
+    try:
+        return Decimal(ours) != Decimal(theirs)
+    except (InvalidOperation, TypeError):
+        return True
+
+
+def _suggested_action(our_status: str, their_status: str) -> str:
+    if (
+        their_status in (PaymentStatus.REFUNDED, PaymentStatus.FAILED)
+        and our_status != their_status
+    ):
+        return f"mark_{their_status.lower()}"
+    return ""
+
+
+def _join_partition(settlement_path: str, ours_path: str):
+    # Lado del proveedor en memoria. Si un transaction_id se repite (cobro + reembolso),
+    # gana la fila más avanzada en el ciclo de vida.
+    theirs = {}
+    with open(settlement_path, newline="", encoding="utf-8") as fh:
+        for tid, amount, currency, status in csv.reader(fh):
+            prev = theirs.get(tid)
+            if prev is None or STATUS_RANK.get(status, -1) > STATUS_RANK.get(prev[2], -1):
+                theirs[tid] = (amount, currency, status)
+
+    with open(ours_path, newline="", encoding="utf-8") as fh:
+        for pk, tid, amount, currency, status in csv.reader(fh):
+            match = theirs.pop(tid, None)
+            if match is None:
+                yield Mismatch(
+                    MismatchKind.MISSING_IN_SETTLEMENT,
+                    tid,
+                    payment_id=pk,
+                    our_amount=f"{amount} {currency}",
+                    our_status=status,
+                )
+                continue
+            their_amount, their_currency, their_status = match
+            common = {
+                "payment_id": pk,
+                "our_amount": f"{amount} {currency}",
+                "their_amount": f"{their_amount} {their_currency}",
+                "our_status": status,
+                "their_status": their_status,
+                "action": _suggested_action(status, their_status),
+            }
+            if their_currency and their_currency != currency:
+                yield Mismatch(MismatchKind.CURRENCY_DIFFERS, tid, **common)
+            elif _amounts_differ(amount, their_amount):
+                yield Mismatch(MismatchKind.AMOUNT_DIFFERS, tid, **common)
+            elif their_status != status:
+                yield Mismatch(MismatchKind.STATUS_DIFFERS, tid, **common)
+
+    for tid, (amount, currency, status) in theirs.items():
+        yield Mismatch(
+            MismatchKind.MISSING_LOCALLY,
+            tid,
+            their_amount=f"{amount} {currency}",
+            their_status=status,
+        )
+
+
+def reconcile(settlement_rows, payment_rows, partitions: int = 32):
+    """
+    Une ambos lados y genera los Mismatch. `settlement_rows` y `payment_rows` son iterables
+    (normalmente los generadores de arriba); los datos intermedios van a un directorio temporal.
+    """
+
+    def part(tid: str) -> int:
+        return zlib.crc32(tid.encode()) % partitions
+
+    with tempfile.TemporaryDirectory(prefix="lava2-recon-") as tmp:
+        paths = {
+            side: [os.path.join(tmp, f"{side}-{i}.csv") for i in range(partitions)]
+            for side in ("theirs", "ours")
+        }
+        for side, rows in (("theirs", settlement_rows), ("ours", payment_rows)):
+            handles = [open(p, "w", newline="", encoding="utf-8") for p in paths[side]]
+            try:
+                writers = [csv.writer(h) for h in handles]
+                for row in rows:
+                    tid = row[0] if side == "theirs" else row[1]
+                    writers[part(tid)].writerow(row)
+            finally:
+                for h in handles:
+                    h.close()
+
+        for i in range(partitions):
+            yield from _join_partition(paths["theirs"][i], paths["ours"][i])
+
+
+def exclude_known(mismatches, chunk_size: int = 1000):
+    """
+    Descarta los `missing_locally` cuyo transaction_id sí existe en la BD (fuera de la
+    ventana o del proveedor filtrados). Consulta por lotes; el resto pasa tal cual.
+    """
+    batch = []
+    for mismatch in mismatches:
+        if mismatch.kind != MismatchKind.MISSING_LOCALLY:
+            yield mismatch
+            continue
+        batch.append(mismatch)
+        if len(batch) >= chunk_size:
+            yield from _unknown(batch)
+            batch = []
+    yield from _unknown(batch)
+
+
+def _unknown(batch):
+    if not batch:
+        return []
+    known = set(
+        Payment.objects.filter(transaction_id__in=[m.transaction_id for m in batch]).values_list(
+            "transaction_id", flat=True
+        )
+    )
+    return [m for m in batch if m.transaction_id not in known]
+
+
+def as_row(mismatch: Mismatch) -> dict:
+    return asdict(mismatch)
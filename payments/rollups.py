@@ -0,0 +1,173 @@
+# payments/rollups.py
+"""
+Mantenimiento incremental de RevenueRollup.
+
+Cada cambio de estado de un Payment resta su monto del bucket del estado anterior y lo suma
+al del nuevo. Dentro de la transacción del cambio solo se INSERTAN filas RevenueRollupDelta
+(nada de UPDATE sobre el bucket compartido: crear reservas a la vez no se serializa sobre
+la fila del día). `merge_deltas` (`manage.py merge_revenue_deltas`, y el admin antes de
+listar) las agrega y aplica con un UPDATE por bucket, en orden fijo (sin deadlocks). Como
+el delta confirma con el cambio, no se pierde aunque el proceso muera después.
+
+Caminos cubiertos: payments/services.py (altas, cobros, webhooks) y el borrado de un
+Payment, también en cascada desde su Booking (señal post_delete). El admin no deja editar
+estado ni monto. Un `QuerySet.update()` directo sobre Payment se salta los rollups: después
+hay que correr `rebuild_revenue_rollups`.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RevenueRollup, RevenueRollupDelta
+
+
+def rollup_day(created_at):
+    # El día del pago es el de su creación en la zona horaria del negocio (TIME_ZONE)
+    return timezone.localdate(created_at)
+
+
+def record_transitions(transitions, service_ids=None):
+    """
+    `transitions`: iterable de (payment, estado_anterior, estado_nuevo).
+    estado_anterior None = pago nuevo; estado_nuevo None = pago borrado. El servicio sale de
+    `service_ids` ({booking_id: service_id}) o, si no está, de `payment.booking`.
+    Guarda los deltas (un INSERT en bloque); se suman a los rollups con `merge_deltas`.
+    """
+    service_ids = service_ids or {}
+    deltas = defaultdict(lambda: [Decimal("0.00"), 0])
+    for payment, old_status, new_status in transitions:
+        if old_status == new_status:
+            continue
+        service_id = service_ids.get(payment.booking_id) or payment.booking.service_id
+        key = (rollup_day(payment.created_at), service_id, payment.currency)
+        amount = Decimal(payment.amount)
+        if old_status:
+            deltas[key + (old_status,)][0] -= amount
+            deltas[key + (old_status,)][1] -= 1
+        if new_status:
+            deltas[key + (new_status,)][0] += amount
+            deltas[key + (new_status,)][1] += 1
+    RevenueRollupDelta.objects.bulk_create(
+        RevenueRollupDelta(
+            day=day,
+            service_id=service_id,
+            currency=currency,
+            status=status,
+            amount=amount,
+            count=count,
+        )
+        for (day, service_id, currency, status), (amount, count) in deltas.items()
+    )
+
+
+def merge_deltas(batch_size: int = 5000) -> int:
+    """
+    Suma a los rollups un lote de deltas pendientes y los borra, en una transacción.
+    Varios procesos pueden llamarla a la vez (SKIP LOCKED). Devuelve cuántos deltas tomó.
+    """
+    with transaction.atomic():
+        rows = list(
+            RevenueRollupDelta.objects.select_for_update(skip_locked=True).order_by("pk")[
+                :batch_size
+            ]
+        )
+        if not rows:
+            return 0
+        deltas = defaultdict(lambda: [Decimal("0.00"), 0])
+        for row in rows:
+            bucket = deltas[(row.day, row.service_id, row.currency, row.status)]
+            bucket[0] += row.amount
+            bucket[1] += row.count
+        apply_deltas(deltas)
+        RevenueRollupDelta.objects.filter(pk__in=[row.pk for row in rows]).delete()
+    return len(rows)
+
+
+def apply_deltas(deltas):
+    now = timezone.now()
+    for (day, service_id, currency, status), (amount, count) in sorted(deltas.items()):
+        lookup = {"day": day, "service_id": service_id, "currency": currency, "status": status}
+        increment = {
+            "total_amount": F("total_amount") + amount,
+            "payment_count": F("payment_count") + count,
+            "updated_at": now,
+        }
+        if RevenueRollup.objects.filter(**lookup).update(**increment):
+            continue
+        try:
+            with transaction.atomic():
+                RevenueRollup.objects.create(total_amount=amount, payment_count=count, **lookup)
+        except IntegrityError:
+            # Otro proceso creó el bucket entre el UPDATE y el INSERT
+            RevenueRollup.objects.filter(**lookup).update(**increment)
+
+
+def rebuild(chunk_size: int = 10000, since=None) -> int:
+    """
+    Recalcula los rollups desde Payment recorriendo por pk en lotes (keyset), acumulando en
+    memoria (como mucho días × servicios × monedas × estados filas) y reemplazando los
+    buckets. `since` limita la reconstrucción a días >= since.
+    Devuelve el número de buckets escritos.
+
+    Lectura y reemplazo van en la misma transacción, con deltas y rollups bloqueados (en ese
+    orden, el mismo que usa merge_deltas): las transacciones que ya insertaron deltas
+    terminan antes de leer, las nuevas esperan al reemplazo y los deltas de los días
+    reconstruidos se descartan porque ya están en la lectura. Ninguno se pierde ni se
+    cuenta dos veces.
+    """
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (RevenueRollupDelta, RevenueRollup):
+                    table = connection.ops.quote_name(model._meta.db_table)
+                    # EXCLUSIVE: también espera a un merge_deltas en curso (FOR UPDATE)
+                    cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+        return _rebuild(chunk_size, since)
+
+
+def _rebuild(chunk_size: int, since) -> int:
+    from .models import Payment
+
+    totals = defaultdict(lambda: [Decimal("0.00"), 0])
+    qs = Payment.objects.order_by("pk").values_list(
+        "pk", "created_at", "booking__service_id", "currency", "status", "amount"
+    )
+    if since is not None:
+        # __date convierte a la zona horaria actual, igual que rollup_day()
+        qs = qs.filter(created_at__date__gte=since)
+
+    last_pk = 0
+    while True:
+        chunk = list(qs.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        for _pk, created_at, service_id, currency, status, amount in chunk:
+            bucket = totals[(rollup_day(created_at), service_id, currency, status)]
+            bucket[0] += amount
+            bucket[1] += 1
+        last_pk = chunk[-1][0]
+
+    rows = [
+        RevenueRollup(
+            day=day,
+            service_id=service_id,
+            currency=currency,
+            status=status,
+            total_amount=amount,
+            payment_count=count,
+        )
+        for (day, service_id, currency, status), (amount, count) in totals.items()
+    ]
+    existing = RevenueRollup.objects.all()
+    pending = RevenueRollupDelta.objects.all()
+    if since is not None:
+        existing = existing.filter(day__gte=since)
+        pending = pending.filter(day__gte=since)
+    existing.delete()
+    pending.delete()
+    RevenueRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
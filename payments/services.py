@@ -0,0 +1,242 @@
+# payments/services.py
+"""
+Pipeline de pagos:
+1. `create_payment_for_booking`: crea el Payment PENDING al crear la reserva (señal post_save).
+2. `process_pending_payments`: el worker (`manage.py process_payments`) reclama lotes de
+   pagos PENDING en una transacción corta (SKIP LOCKED: varios workers en paralelo sin
+   pisarse), llama al proveedor fuera de toda transacción y guarda cada resultado en la
+   suya propia.
+3. `apply_webhook_events`: el worker (`manage.py apply_payment_events`) aplica por lotes los
+   webhooks guardados en la bandeja `PaymentWebhookEvent`, en orden de llegada.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Payment, PaymentStatus, PaymentWebhookEvent
+from .providers import ChargeStatus, PaymentProviderError, get_provider
+from .rollups import record_transitions
+
+logger = logging.getLogger(__name__)
+
+
+def create_payment_for_booking(booking) -> Payment:
+    payment = Payment.objects.create(
+        booking=booking,
+        amount=booking.service.price,
+        currency=settings.PAYMENTS_CURRENCY,
+        provider=settings.PAYMENTS_DEFAULT_PROVIDER,
+        status=PaymentStatus.PENDING,
+    )
+    record_transitions([(payment, None, payment.status)])
+    return payment
+
+
+def claim_pending_payments(batch_size: int = 50) -> list:
+    """
+    Reclama un lote en una transacción corta: suma el intento y marca `updated_at`, así
+    ningún worker lo vuelve a tomar antes de PAYMENTS_RETRY_DELAY. Si el worker muere con el
+    lote en la mano, otro lo reintenta pasado ese plazo con las mismas idempotency keys.
+    Nunca se pasa de PAYMENTS_MAX_ATTEMPTS: los que agotaron sus intentos sin respuesta
+    (p. ej. el worker murió en el último) se cierran como FAILED.
+    """
+    now = timezone.now()
+    # Reintentos: esperar PAYMENTS_RETRY_DELAY desde el último intento (no martillar al proveedor)
+    retry_before = now - timedelta(seconds=settings.PAYMENTS_RETRY_DELAY)
+    pending = (
+        Payment.objects.select_for_update(skip_locked=True, of=("self",))
+        .select_related("booking")
+        .filter(status=PaymentStatus.PENDING, transaction_id="")
+    )
+    with transaction.atomic():
+        _fail_exhausted(
+            pending.filter(
+                attempts__gte=settings.PAYMENTS_MAX_ATTEMPTS, updated_at__lte=retry_before
+            )[:batch_size],
+            now,
+        )
+        batch = list(
+            pending.filter(attempts__lt=settings.PAYMENTS_MAX_ATTEMPTS)
+            .filter(Q(attempts=0) | Q(updated_at__lte=retry_before))
+            .order_by("created_at")[:batch_size]
+        )
+        for payment in batch:
+            payment.attempts += 1
+            payment.updated_at = now
+        Payment.objects.bulk_update(batch, ["attempts", "updated_at"])
+    return batch
+
+
+def _fail_exhausted(queryset, now):
+    exhausted = list(queryset)
+    for payment in exhausted:
+        payment.status = PaymentStatus.FAILED
+        payment.error_message = payment.error_message or "Sin respuesta del proveedor"
+        payment.processed_at = now
+        payment.updated_at = now
+    Payment.objects.bulk_update(
+        exhausted, ["status", "error_message", "processed_at", "updated_at"]
+    )
+    record_transitions([(p, PaymentStatus.PENDING, p.status) for p in exhausted])
+
+
+def charge_payment(payment: Payment, provider=None) -> Payment:
+    """
+    Cobra un pago ya reclamado con su idempotency_key y persiste el resultado.
+    La llamada al proveedor va fuera de toda transacción (sin locks durante la red).
+    - Éxito → PAID; rechazo → FAILED; pendiente → queda PENDING con transaction_id (webhook).
+    - Error transitorio o inesperado → sigue PENDING y se reintenta hasta
+      PAYMENTS_MAX_ATTEMPTS; en el último intento queda FAILED.
+    """
+    provider = provider or get_provider(payment.provider)
+    try:
+        result = provider.charge(
+            amount=payment.amount,
+            currency=payment.currency,
+            idempotency_key=str(payment.idempotency_key),
+            metadata={"payment_id": payment.pk, "booking_id": payment.booking_id},
+        )
+    except PaymentProviderError as exc:
+        logger.warning("Cobro fallido (transitorio) pago=%s: %s", payment.pk, exc)
+        return _record_charge(payment.pk, None, str(exc))
+    except Exception as exc:
+        # Respuesta inesperada (bug del SDK, datos raros): cuenta como intento fallido
+        logger.exception("Error inesperado cobrando el pago %s", payment.pk)
+        return _record_charge(payment.pk, None, f"Error inesperado: {exc}")
+    return _record_charge(payment.pk, result)
+
+
+def _record_charge(payment_id: int, result, error: str = "") -> Payment:
+    """Guarda el resultado de un cobro en su propia transacción, con la fila bloqueada."""
+    with transaction.atomic():
+        payment = (
+            Payment.objects.select_for_update(of=("self",))
+            .select_related("booking")
+            .get(pk=payment_id)
+        )
+        if payment.status == PaymentStatus.PENDING:  # si no, lo resolvió otro camino
+            _apply_charge(payment, result, error)
+    return payment
+
+
+def _apply_charge(payment: Payment, result, error: str):
+    old_status = payment.status
+    update_fields = ["updated_at"]
+
+    if result is None:
+        payment.error_message = error
+        update_fields.append("error_message")
+        if payment.attempts >= settings.PAYMENTS_MAX_ATTEMPTS:
+            payment.status = PaymentStatus.FAILED
+            payment.processed_at = timezone.now()
+            update_fields += ["status", "processed_at"]
+        payment.save(update_fields=update_fields)
+        record_transitions([(payment, old_status, payment.status)])
+        return
+
+    payment.transaction_id = result.transaction_id
+    payment.error_message = result.error_message
+    update_fields += ["transaction_id", "error_message"]
+    if result.status == ChargeStatus.SUCCEEDED:
+        payment.status = PaymentStatus.PAID
+    elif result.status == ChargeStatus.FAILED:
+        payment.status = PaymentStatus.FAILED
+    if result.status != ChargeStatus.PENDING:
+        payment.processed_at = timezone.now()
+        update_fields += ["status", "processed_at"]
+    payment.save(update_fields=update_fields)
+    record_transitions([(payment, old_status, payment.status)])
+
+
+def process_pending_payments(batch_size: int = 50) -> int:
+    """
+    Reclama y cobra un lote de pagos. Devuelve cuántos procesó.
+    Cada resultado se confirma por separado: un error en un pago no deshace los ya cobrados.
+    Si ni siquiera se pudo guardar el resultado (BD), el pago sigue PENDING y se reintenta
+    al vencer su reserva; el proveedor no cobra dos veces gracias a la idempotency key.
+    """
+    batch = claim_pending_payments(batch_size)
+    for payment in batch:
+        try:
+            charge_payment(payment)
+        except Exception:
+            logger.exception("No se pudo guardar el cobro del pago %s; se reintentará", payment.pk)
+    return len(batch)
+
+
+# Orden de avance de estados: un evento nunca hace retroceder un pago
+# (p. ej. un "failed" atrasado no pisa un PAID, y nada sale de REFUNDED).
+STATUS_RANK = {
+    PaymentStatus.PENDING: 0,
+    PaymentStatus.FAILED: 1,
+    PaymentStatus.PAID: 2,
+    PaymentStatus.REFUNDED: 3,
+}
+
+
+def can_transition(current: str, new: str) -> bool:
+    return STATUS_RANK.get(new, -1) > STATUS_RANK[current]
+
+
+def apply_webhook_events(batch_size: int = 200) -> int:
+    """
+    Aplica un lote de eventos pendientes a sus Payment (buscados en bloque por el índice de
+    transaction_id) y marca los eventos como procesados. Devuelve cuántos eventos tomó
+    (cerrados o aplazados): 0 significa que no queda nada listo.
+
+    Los eventos cuyo pago aún no existe (el webhook llegó antes que nuestro commit) se
+    aplazan PAYMENTS_WEBHOOK_ORPHAN_RETRY segundos con `next_attempt_at`, así no ocupan la
+    cabeza de cada lote; pasado PAYMENTS_WEBHOOK_ORPHAN_TTL se cierran sin efecto.
+    """
+    now = timezone.now()
+    orphan_before = now - timedelta(seconds=settings.PAYMENTS_WEBHOOK_ORPHAN_TTL)
+    retry_at = now + timedelta(seconds=settings.PAYMENTS_WEBHOOK_ORPHAN_RETRY)
+    with transaction.atomic():
+        events = list(
+            PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by("created_at", "id")[:batch_size]
+        )
+        tx_ids = {e.transaction_id for e in events if e.transaction_id and e.status}
+        payments = {
+            p.transaction_id: p
+            for p in Payment.objects.select_for_update(of=("self",))
+            .select_related("booking")
+            .filter(transaction_id__in=tx_ids)
+        }
+
+        changed, done, deferred, transitions = {}, [], [], []
+        for event in events:
+            payment = payments.get(event.transaction_id)
+            if event.status and not event.transaction_id:
+                # La vista ya los rechaza; uno así nunca tendrá pago: se cierra sin esperar
+                logger.warning("Evento %s sin transaction_id: se descarta", event.event_id)
+            elif event.status and payment is None and event.created_at > orphan_before:
+                event.next_attempt_at = retry_at
+                event.updated_at = now
+                deferred.append(event)
+                continue
+            if payment is not None and can_transition(payment.status, event.status):
+                transitions.append((payment, payment.status, event.status))
+                payment.status = event.status
+                payment.error_message = event.error_message
+                payment.processed_at = now
+                payment.updated_at = now
+                changed[payment.pk] = payment
+            event.processed_at = now
+            event.updated_at = now
+            done.append(event)
+
+        Payment.objects.bulk_update(
+            changed.values(), ["status", "error_message", "processed_at", "updated_at"]
+        )
+        PaymentWebhookEvent.objects.bulk_update(done, ["processed_at", "updated_at"])
+        PaymentWebhookEvent.objects.bulk_update(deferred, ["next_attempt_at", "updated_at"])
+        record_transitions(transitions)
+    return len(events)
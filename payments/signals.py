@@ -0,0 +1,46 @@
+# payments/signals.py
+import threading
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from bookings.models import Booking
+
+from .models import Payment
+from .rollups import record_transitions
+from .services import create_payment_for_booking
+
+
+@receiver(post_save, sender=Booking)
+def create_booking_payment(sender, instance: Booking, created: bool, raw: bool = False, **kwargs):
+    # Solo se registra el Payment (un INSERT en la misma transacción de la reserva);
+    # el cobro lo hace el worker `process_payments`, nunca el request.
+    if created and not raw:
+        create_payment_for_booking(instance)
+
+
+# Borrado en cascada desde Booking: Django manda todos los pre_delete antes de borrar nada,
+# así que el servicio de cada reserva queda a mano sin un SELECT por pago (N+1).
+_deleting = threading.local()
+
+
+def _deleting_services() -> dict:
+    if not hasattr(_deleting, "services"):
+        _deleting.services = {}
+    return _deleting.services
+
+
+@receiver(pre_delete, sender=Booking)
+def remember_booking_service(sender, instance: Booking, **kwargs):
+    _deleting_services()[instance.pk] = instance.service_id
+
+
+@receiver(post_delete, sender=Booking)
+def forget_booking_service(sender, instance: Booking, **kwargs):
+    _deleting_services().pop(instance.pk, None)
+
+
+@receiver(post_delete, sender=Payment)
+def remove_payment_from_rollups(sender, instance: Payment, **kwargs):
+    # También en cascada desde Booking: los pagos se borran antes que su reserva
+    record_transitions([(instance, instance.status, None)], service_ids=_deleting_services())
@@ -1,3 +1,491 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Booking
+from services.models import Service
+from users.models import User
+from vehicles.models import Vehicle
+
+from . import providers
+from .models import Payment, PaymentStatus, PaymentWebhookEvent, RevenueRollup, RevenueRollupDelta
+from .providers import (
+    ChargeStatus,
+    FakePaymentProvider,
+    PaymentProviderError,
+    from_minor_units,
+    to_minor_units,
+)
+from .reconciliation import MismatchKind, iter_payments, parse_settlement_rows, reconcile
+from .rollups import merge_deltas, rebuild
+from .services import apply_webhook_events, claim_pending_payments, process_pending_payments
+
+
+class PaymentTestMixin:
+    """Reservas con su Payment PENDING (lo crea la señal) y un FakePaymentProvider limpio."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="cliente@example.com", password="x")
+        cls.service = Service.objects.create(name="Lavado", price=10, duration_minutes=30)
+        cls.vehicle = Vehicle.objects.create(
+            owner=cls.user, plate="ABC123", make="Mazda", model="3", year=2020
+        )
+
+    def setUp(self):
+        self.provider = FakePaymentProvider()
+        patcher = mock.patch.dict(providers._instances, {"fake": self.provider})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_payment(self, days=2) -> Payment:
+        booking = Booking.objects.create(
+            user=self.user,
+            vehicle=self.vehicle,
+            service=self.service,
+            scheduled_at=timezone.now() + timedelta(days=days),
+        )
+        return booking.payment
+
+
+@override_settings(PAYMENTS_MAX_ATTEMPTS=2, PAYMENTS_RETRY_DELAY=60)
+class ProcessPendingPaymentsTests(PaymentTestMixin, TestCase):
+    def test_pending_payment_is_charged(self):
+        payment = self.make_payment()
+        self.assertEqual(process_pending_payments(), 1)
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, PaymentStatus.PAID)
+        self.assertEqual(payment.attempts, 1)
+        self.assertTrue(payment.transaction_id)
+        self.assertIsNotNone(payment.processed_at)
+        merge_deltas()
+        counts = dict(RevenueRollup.objects.values_list("status", "payment_count"))
+        self.assertEqual(counts, {PaymentStatus.PENDING: 0, PaymentStatus.PAID: 1})
+
+    def test_claimed_payments_are_leased(self):
+        self.make_payment()
+        self.assertEqual(len(claim_pending_payments()), 1)
+        # Otro worker no vuelve a tomarlo mientras dura la reserva (PAYMENTS_RETRY_DELAY)
+        self.assertEqual(claim_pending_payments(), [])
+
+    def test_declined_payment_fails(self):
+        self.provider.decline_amounts = {Decimal("10.00")}
+        payment = self.make_payment()
+        process_pending_payments()
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, PaymentStatus.FAILED)
+        self.assertTrue(payment.error_message)
+
+    def test_transient_error_is_retried_until_max_attempts(self):
+        payment = self.make_payment()
+        self.provider.fail_next = 2
+
+        with self.assertLogs("payments.services", "WARNING"):
+            process_pending_payments()
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, payment.attempts), (PaymentStatus.PENDING, 1))
+        self.assertIn("simulado", payment.error_message)
+        self.assertEqual(process_pending_payments(), 0)  # aún dentro del retry delay
+
+        Payment.objects.filter(pk=payment.pk).update(
+            updated_at=timezone.now() - timedelta(minutes=5)
+        )
+        with self.assertLogs("payments.services", "WARNING"):
+            process_pending_payments()
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, payment.attempts), (PaymentStatus.FAILED, 2))
+
+    def test_unexpected_error_does_not_undo_other_charges(self):
+        first, second = self.make_payment(days=2), self.make_payment(days=3)
+        charge = self.provider.charge
+
+        def flaky_charge(**kwargs):
+            if kwargs["metadata"]["payment_id"] == second.pk:
+                raise RuntimeError("respuesta inesperada")
+            return charge(**kwargs)
+
+        with mock.patch.object(self.provider, "charge", flaky_charge), self.assertLogs(
+            "payments.services", "ERROR"
+        ):
+            self.assertEqual(process_pending_payments(), 2)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, PaymentStatus.PAID)
+        self.assertEqual((second.status, second.attempts), (PaymentStatus.PENDING, 1))
+        self.assertIn("respuesta inesperada", second.error_message)
+
+    def test_unexpected_errors_fail_at_max_attempts(self):
+        payment = self.make_payment()
+        with mock.patch.object(
+            self.provider, "charge", side_effect=KeyError("id")
+        ), self.assertLogs("payments.services", "ERROR"):
+            for _ in range(3):
+                Payment.objects.filter(pk=payment.pk).update(
+                    updated_at=timezone.now() - timedelta(minutes=5)
+                )
+                process_pending_payments()
+
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, payment.attempts), (PaymentStatus.FAILED, 2))
+
+    def test_exhausted_payments_are_closed_not_reclaimed(self):
+        payment = self.make_payment()
+        # El worker murió durante el último intento
+        Payment.objects.filter(pk=payment.pk).update(
+            attempts=2, updated_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(claim_pending_payments(), [])
+
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, payment.attempts), (PaymentStatus.FAILED, 2))
+        merge_deltas()
+        counts = dict(RevenueRollup.objects.values_list("status", "payment_count"))
+        self.assertEqual(counts, {PaymentStatus.PENDING: 0, PaymentStatus.FAILED: 1})
+
+    def test_retry_reuses_idempotency_key(self):
+        payment = self.make_payment()
+        process_pending_payments()
+        payment.refresh_from_db()
+
+        result = self.provider.charge(
+            amount=payment.amount,
+            currency=payment.currency,
+            idempotency_key=str(payment.idempotency_key),
+            metadata={},
+        )
+        self.assertEqual(result.transaction_id, payment.transaction_id)
+        self.assertEqual(len(self.provider.charges), 1)
+
+    def test_provider_errors_surface_as_provider_error(self):
+        with self.assertRaises(PaymentProviderError):
+            providers.get_provider("desconocido")
+
+
+class RevenueRollupTests(PaymentTestMixin, TestCase):
+    def incremental(self):
+        while merge_deltas(batch_size=2):
+            pass
+        return self.buckets()
+
+    def rebuilt(self):
+        rebuild()
+        return self.buckets()
+
+    def buckets(self):
+        return {
+            (r.day, r.service_id, r.currency, r.status): (r.total_amount, r.payment_count)
+            for r in RevenueRollup.objects.exclude(payment_count=0, total_amount=0)
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.incremental()
+        self.assertTrue(incremental)
+        self.assertEqual(incremental, self.rebuilt())
+        self.assertFalse(RevenueRollupDelta.objects.exists())
+
+    def test_booking_create_only_inserts_deltas(self):
+        self.make_payment()
+        table = RevenueRollup._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            self.make_payment(days=3)
+        self.assertFalse([q for q in queries if table + '"' in q["sql"]])
+        self.assertEqual(RevenueRollupDelta.objects.count(), 2)
+        self.assertMatchesRebuild()
+
+    def test_status_changes_match_rebuild(self):
+        paid, failed = self.make_payment(days=2), self.make_payment(days=3)
+        self.provider.decline_amounts = set()
+        process_pending_payments(batch_size=1)
+        Payment.objects.filter(pk=failed.pk).update(transaction_id="tx_f")
+        PaymentWebhookEvent.objects.create(
+            provider="fake", event_id="e1", transaction_id="tx_f", status="FAILED", payload={}
+        )
+        apply_webhook_events()
+
+        paid.refresh_from_db()
+        self.assertEqual(paid.status, PaymentStatus.PAID)
+        self.assertMatchesRebuild()
+
+    def test_cascade_delete_matches_rebuild_without_n_plus_one(self):
+        payments = [self.make_payment(days=days) for days in range(2, 6)]
+        self.make_payment(days=8)
+        self.incremental()
+
+        bookings = Booking.objects.filter(pk__in=[p.booking_id for p in payments])
+        with CaptureQueriesContext(connection) as queries:
+            bookings.delete()
+        booking_selects = [
+            q for q in queries if q["sql"].startswith("SELECT") and "bookings_booking" in q["sql"]
+        ]
+        self.assertLessEqual(len(booking_selects), 1)  # la del propio delete(), no una por pago
+        self.assertMatchesRebuild()
+
+    def test_rebuild_discards_pending_deltas(self):
+        self.make_payment()
+        rebuild()
+        self.assertFalse(RevenueRollupDelta.objects.exists())
+        self.assertEqual(self.buckets(), self.rebuilt())
+
+
+class PaymentWebhookViewTests(PaymentTestMixin, TestCase):
+    url = reverse("payments:webhook", kwargs={"provider": "fake"})
+
+    def post(self, payload, url=None, signature=None):
+        body = json.dumps(payload).encode()
+        return self.client.post(
+            url or self.url,
+            body,
+            content_type="application/json",
+            headers={"X-Fake-Signature": signature or self.provider.sign(body)},
+        )
+
+    def test_signed_event_is_stored_once(self):
+        payload = {"id": "evt_1", "type": "charge", "transaction_id": "tx", "status": "PAID"}
+        self.assertEqual(self.post(payload).status_code, 200)
+        self.assertEqual(self.post(payload).status_code, 200)  # reintento del proveedor
+
+        event = PaymentWebhookEvent.objects.get()
+        self.assertEqual((event.event_id, event.status), ("evt_1", PaymentStatus.PAID))
+        self.assertIsNone(event.processed_at)
+
+    def test_bad_signature_is_rejected(self):
+        response = self.post({"id": "evt_1"}, signature="firma-falsa")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_invalid_event_is_rejected(self):
+        self.assertEqual(self.post({"type": "sin-id"}).status_code, 400)
+
+    def test_status_without_transaction_is_rejected(self):
+        payload = {"id": "evt_1", "type": "charge", "transaction_id": "", "status": "PAID"}
+        with self.assertLogs("payments.views", "WARNING"):
+            self.assertEqual(self.post(payload).status_code, 400)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_unknown_provider_is_not_found(self):
+        url = reverse("payments:webhook", kwargs={"provider": "paypal"})
+        self.assertEqual(self.post({"id": "evt_1"}, url=url).status_code, 404)
+
+    @override_settings(PAYMENTS_PROVIDERS={"broken": "payments.providers.NoExiste"})
+    def test_unavailable_provider_is_not_found(self):
+        url = reverse("payments:webhook", kwargs={"provider": "broken"})
+        self.assertEqual(self.post({"id": "evt_1"}, url=url).status_code, 404)
+
+
+@override_settings(PAYMENTS_WEBHOOK_ORPHAN_TTL=3600, PAYMENTS_WEBHOOK_ORPHAN_RETRY=30)
+class ApplyWebhookEventsTests(PaymentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.payment = self.make_payment()
+        Payment.objects.filter(pk=self.payment.pk).update(transaction_id="tx_1")
+
+    def add_event(self, event_id, transaction_id="tx_1", status=PaymentStatus.PAID):
+        return PaymentWebhookEvent.objects.create(
+            provider="fake",
+            event_id=event_id,
+            transaction_id=transaction_id,
+            status=status,
+            payload={},
+        )
+
+    def test_event_is_applied_to_payment(self):
+        event = self.add_event("evt_1")
+        self.assertEqual(apply_webhook_events(), 1)
+
+        self.payment.refresh_from_db()
+        event.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.PAID)
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(apply_webhook_events(), 0)
+
+    def test_late_event_never_regresses_status(self):
+        self.add_event("evt_1", status=PaymentStatus.PAID)
+        self.add_event("evt_2", status=PaymentStatus.FAILED)
+        apply_webhook_events()
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.PAID)
+        self.assertFalse(PaymentWebhookEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_orphans_are_deferred_without_blocking_the_batch(self):
+        orphans = [self.add_event(f"orphan_{i}", transaction_id=f"tx_x{i}") for i in range(3)]
+        self.add_event("evt_1")
+
+        self.assertEqual(apply_webhook_events(batch_size=3), 3)
+        self.assertEqual(apply_webhook_events(batch_size=3), 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, PaymentStatus.PAID)
+
+        for orphan in orphans:
+            orphan.refresh_from_db()
+            self.assertIsNone(orphan.processed_at)
+            self.assertGreater(orphan.next_attempt_at, timezone.now())
+        self.assertEqual(apply_webhook_events(), 0)
+
+    def test_events_without_transaction_are_closed_at_once(self):
+        event = self.add_event("evt_sin_tx", transaction_id="")
+        with self.assertLogs("payments.services", "WARNING"):
+            self.assertEqual(apply_webhook_events(), 1)
+
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(apply_webhook_events(), 0)
+
+    def test_old_orphans_are_closed(self):
+        orphan = self.add_event("orphan", transaction_id="tx_x")
+        PaymentWebhookEvent.objects.filter(pk=orphan.pk).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+        self.assertEqual(apply_webhook_events(), 1)
+
+        orphan.refresh_from_db()
+        self.assertIsNotNone(orphan.processed_at)
+
+
+class StripeProviderTests(SimpleTestCase):
+    def setUp(self):
+        self.stripe = mock.Mock()
+        self.stripe.error.StripeError = type("StripeError", (Exception,), {})
+        self.stripe.error.CardError = type("CardError", (self.stripe.error.StripeError,), {})
+        with mock.patch.dict(sys.modules, {"stripe": self.stripe}):
+            self.provider = providers.StripePaymentProvider(api_key="sk_test")
+
+    def charge(self, intent_status):
+        self.stripe.PaymentIntent.create.return_value = mock.Mock(id="pi_1", status=intent_status)
+        return self.provider.charge(
+            amount=Decimal("10.005"), currency="USD", idempotency_key="k", metadata={}
+        )
+
+    def test_unconfirmed_intent_stays_pending(self):
+        for intent_status in ("requires_payment_method", "requires_action", "processing"):
+            with self.subTest(intent_status=intent_status):
+                result = self.charge(intent_status)
+                self.assertEqual(result.status, ChargeStatus.PENDING)
+                self.assertEqual(result.transaction_id, "pi_1")
+
+    def test_only_succeeded_intent_is_paid(self):
+        self.assertEqual(self.charge("succeeded").status, ChargeStatus.SUCCEEDED)
+        self.assertEqual(self.charge("canceled").status, ChargeStatus.FAILED)
+        kwargs = self.stripe.PaymentIntent.create.call_args.kwargs
+        self.assertEqual((kwargs["amount"], kwargs["currency"]), (1001, "usd"))
+        self.assertEqual(kwargs["idempotency_key"], "k")
+
+    def test_stripe_errors(self):
+        self.stripe.PaymentIntent.create.side_effect = self.stripe.error.CardError("rechazada")
+        self.assertEqual(self.charge("succeeded").status, ChargeStatus.FAILED)
+        self.stripe.PaymentIntent.create.side_effect = self.stripe.error.StripeError("5xx")
+        with self.assertRaises(PaymentProviderError):
+            self.charge("succeeded")
+
+
+class MinorUnitsTests(SimpleTestCase):
+    def test_amounts_are_rounded_not_truncated(self):
+        self.assertEqual(to_minor_units(Decimal("19.99")), 1999)
+        self.assertEqual(to_minor_units(Decimal("10.005")), 1001)
+        self.assertEqual(to_minor_units("0.29"), 29)
+
+    def test_currency_exponent(self):
+        self.assertEqual(to_minor_units("1500", "JPY"), 1500)
+        self.assertEqual(to_minor_units("1.2345", "KWD"), 1235)
+        self.assertEqual(from_minor_units(1001, "usd"), Decimal("10.01"))
+        self.assertEqual(from_minor_units(1001, "JPY"), Decimal("1001"))
+
+
+class ReconciliationTests(PaymentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.payments = {}
+        for days, tid, status in [
+            (2, "tx_paid", PaymentStatus.PAID),
+            (3, "tx_refund", PaymentStatus.PAID),
+            (4, "tx_ours", PaymentStatus.PAID),
+            (5, "tx_old", PaymentStatus.PAID),
+        ]:
+            payment = self.make_payment(days=days)
+            Payment.objects.filter(pk=payment.pk).update(transaction_id=tid, status=status)
+            self.payments[tid] = payment
+        Payment.objects.filter(transaction_id="tx_old").update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+
+    def settlement(self):
+        return [
+            {"transaction_id": "tx_paid", "amount": "10.00", "currency": "usd", "status": "paid"},
+            {"transaction_id": "tx_refund", "amount": "10", "currency": "USD", "status": "paid"},
+            {"transaction_id": "tx_refund", "amount": "10", "currency": "USD", "status": "refund"},
+            {"transaction_id": "tx_old", "amount": "10", "currency": "USD", "status": "settled"},
+            {"transaction_id": "tx_theirs", "amount": "5", "currency": "USD", "status": "paid"},
+        ]
+
+    def mismatches(self, rows, **filters):
+        found = reconcile(parse_settlement_rows(rows), iter_payments(**filters), partitions=4)
+        return {m.transaction_id: m for m in found}
+
+    def test_hash_join_reports_differences(self):
+        found = self.mismatches(self.settlement())
+
+        self.assertEqual(
+            {tid: m.kind for tid, m in found.items()},
+            {
+                "tx_refund": MismatchKind.STATUS_DIFFERS,
+                "tx_ours": MismatchKind.MISSING_IN_SETTLEMENT,
+                "tx_theirs": MismatchKind.MISSING_LOCALLY,
+            },
+        )
+        self.assertEqual(found["tx_refund"].action, "mark_refunded")
+        self.assertEqual(found["tx_ours"].payment_id, str(self.payments["tx_ours"].pk))
+
+    def test_amounts_and_currencies(self):
+        rows = [
+            {"transaction_id": "tx_paid", "amount": "9.99", "currency": "USD", "status": "paid"},
+            {"transaction_id": "tx_ours", "amount": "10", "currency": "EUR", "status": "paid"},
+        ]
+        found = self.mismatches(rows)
+        self.assertEqual(found["tx_paid"].kind, MismatchKind.AMOUNT_DIFFERS)
+        self.assertEqual(found["tx_ours"].kind, MismatchKind.CURRENCY_DIFFERS)
+
+    def test_minor_units_are_normalized_per_currency(self):
+        rows = [
+            {"transaction_id": "tx_paid", "amount": "1000", "currency": "USD", "status": "paid"}
+        ]
+        parsed = list(parse_settlement_rows(rows, minor_units=True))
+        self.assertEqual(parsed, [("tx_paid", "10.00", "USD", PaymentStatus.PAID)])
+        rows[0]["currency"] = "JPY"
+        self.assertEqual(next(parse_settlement_rows(rows, minor_units=True))[1], "1000")
+
+    def test_command_window_does_not_report_older_payments_as_missing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "settlement.jsonl")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.writelines(json.dumps(row) + "\n" for row in self.settlement())
+            output = os.path.join(tmp, "diferencias.csv")
+            since = (timezone.now() - timedelta(days=7)).date().isoformat()
+            call_command(
+                "reconcile_payments",
+                path,
+                f"--since={since}",
+                f"--output={output}",
+                stderr=io.StringIO(),
+            )
+            with open(output, newline="", encoding="utf-8") as fh:
+                reported = {row["transaction_id"]: row["kind"] for row in csv.DictReader(fh)}
+
+        self.assertNotIn("tx_old", reported)  # fuera de la ventana, pero existe
+        self.assertEqual(reported["tx_theirs"], MismatchKind.MISSING_LOCALLY)
+        self.assertEqual(reported["tx_refund"], MismatchKind.STATUS_DIFFERS)
@@ -0,0 +1,10 @@
+# payments/urls.py
+from django.urls import path
+
+from .views import PaymentWebhookView
+
+app_name = "payments"
+
+urlpatterns = [
+    path("webhooks/<str:provider>/", PaymentWebhookView.as_view(), name="webhook"),
+]
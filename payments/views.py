@@ -1,3 +1,59 @@
-from django.shortcuts import render
+# payments/views.py
+import json
+import logging
 
-# Create your views here.
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import PaymentWebhookEvent
+from .providers import PaymentProviderError, get_provider
+
+logger = logging.getLogger(__name__)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class PaymentWebhookView(View):
+    """
+    Recibe webhooks del proveedor con "ack" rápido:
+    - verifica la firma, guarda el evento crudo en la bandeja y responde 200;
+    - un reintento del mismo evento choca con la unicidad (provider, event_id) y se ignora;
+    - aplicar el evento al Payment lo hace el worker `apply_payment_events`.
+    """
+
+    http_method_names = ["post"]
+
+    def post(self, request, provider):
+        try:
+            backend = get_provider(provider)
+        except PaymentProviderError:
+            raise Http404("Proveedor desconocido o no disponible")
+
+        if not backend.verify_webhook(request.body, request.headers):
+            return HttpResponseBadRequest("Firma inválida")
+        try:
+            payload = json.loads(request.body)
+            event = backend.parse_event(payload)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return HttpResponseBadRequest("Evento inválido")
+        if event.status and not event.transaction_id:
+            # Cambia un estado pero no dice de qué pago: nunca se podría aplicar
+            logger.warning("Webhook %s %s sin transaction_id", backend.name, event.event_id)
+            return HttpResponseBadRequest("Evento sin transaction_id")
+
+        PaymentWebhookEvent.objects.bulk_create(
+            [
+                PaymentWebhookEvent(
+                    provider=backend.name,
+                    event_id=event.event_id,
+                    event_type=event.event_type,
+                    transaction_id=event.transaction_id,
+                    status=event.status,
+                    error_message=event.error_message,
+                    payload=payload,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        return HttpResponse(status=200)
@@ -0,0 +1,21 @@
+# services/api.py
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets
+from rest_framework.filters import OrderingFilter
+
+from config.api import ProjectedQuerysetMixin
+
+from .models import Service
+from .serializers import ServiceSerializer
+
+
+class ServiceViewSet(ProjectedQuerysetMixin, viewsets.ReadOnlyModelViewSet):
+    """Catálogo público de servicios activos."""
+
+    queryset = Service.objects.filter(is_active=True)
+    serializer_class = ServiceSerializer
+    permission_classes = []
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ["name"]
+    ordering_fields = ["name"]
+    ordering = ("name",)
@@ -0,0 +1,28 @@
+# services/catalog.py
+"""
+Catálogo público de servicios activos en la cache "tiered" (config/cache.py).
+
+Es pequeño y casi nunca cambia: se guarda la lista completa y se pagina en memoria. Las
+señales de Service (services/signals.py) borran la clave tras el commit y el aviso de la
+cache la quita del L1 de todos los workers.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Service
+
+CATALOG_KEY = "catalog:services:active"
+
+
+def active_services() -> list:
+    cache = caches["tiered"]
+    services = cache.get(CATALOG_KEY)
+    if services is None:
+        services = list(Service.objects.filter(is_active=True).order_by("name"))
+        cache.set(CATALOG_KEY, services, settings.CATALOG_CACHE_TIMEOUT)
+    return services
+
+
+def invalidate_catalog():
+    caches["tiered"].delete(CATALOG_KEY)
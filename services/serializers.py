@@ -0,0 +1,13 @@
+# services/serializers.py
+from rest_framework import serializers
+
+from config.api import SparseFieldsetsMixin
+
+from .models import Service
+
+
+class ServiceSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Service
+        fields = ["id", "name", "description", "price", "duration_minutes", "updated_at"]
+        read_only_fields = fields
@@ -0,0 +1,13 @@
+# services/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import invalidate_catalog
+from .models import Service
+
+
+@receiver([post_save, post_delete], sender=Service)
+def service_changed(sender, instance: Service, **kwargs):
+    # Tras el commit: si se invalidara antes, otra petición podría recachear el estado viejo
+    transaction.on_commit(invalidate_catalog)
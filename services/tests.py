@@ -1,3 +1,67 @@
+from functools import partial
+
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
 from django.test import TestCase
+from django.urls import reverse
+
+from .catalog import active_services
+from .models import Service
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        caches["tiered"].clear()
+        caches["default"].clear()
+        self.wash = Service.objects.create(name="Lavado", price=10, duration_minutes=30)
+
+    def test_catalog_is_served_from_cache(self):
+        active_services()
+        with self.assertNumQueries(0):
+            self.assertEqual([s.name for s in active_services()], ["Lavado"])
+
+    def test_save_invalidates_after_commit(self):
+        active_services()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wash.name = "Lavado premium"
+            self.wash.save()
+        self.assertEqual([s.name for s in active_services()], ["Lavado premium"])
+
+    def test_deactivated_service_leaves_catalog(self):
+        active_services()
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(name="Encerado", price=20, duration_minutes=45)
+            self.wash.is_active = False
+            self.wash.save()
+        self.assertEqual([s.name for s in active_services()], ["Encerado"])
+
+
+class PublicServiceListViewTests(TestCase):
+    url = reverse("services:public_list")
+
+    def setUp(self):
+        caches["tiered"].clear()
+        caches["default"].clear()
+        for i in range(13):
+            Service.objects.create(name=f"Servicio {i:02d}", price=10, duration_minutes=30)
+
+    async def test_cards_are_rendered_from_a_partial(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.context["service_cards"], partial)
+        self.assertContains(response, "Servicio 00")
+        self.assertNotContains(response, "Servicio 12")  # 12 por página
+
+        response = await self.async_client.get(self.url, {"page": 2})
+        self.assertContains(response, "Servicio 12")
+        self.assertEqual(len(response.context["services"]), 1)
+
+    async def test_invalid_page_is_not_found(self):
+        response = await self.async_client.get(self.url, {"page": 9})
+        self.assertEqual(response.status_code, 404)
 
-# Create your tests here.
+    def test_warm_catalog_needs_no_queries(self):
+        get = async_to_sync(self.async_client.get)
+        get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(get(self.url).status_code, 200)
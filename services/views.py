@@ -1,29 +1,50 @@
 # services/views.py
-from django.views.generic import DetailView, ListView
+from functools import partial
 
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.views import View
+
+from config.async_views import apaginate
+from config.fragments import render_rows
+
+from .catalog import active_services
 from .models import Service
 
 
-class PublicServiceListView(ListView):
+class PublicServiceListView(View):
     """
     Lista pública de servicios activos.
-    Cualquiera puede acceder (sin login).
+    Cualquiera puede acceder (sin login). Vista async; el catálogo sale de la cache.
     """
 
-    model = Service
     template_name = "services/service_list.html"
-    context_object_name = "services"
     paginate_by = 12  # ajusta según UI
 
-    def get_queryset(self):
-        return Service.objects.filter(is_active=True).order_by("name")
+    async def get(self, request):
+        # Lista cacheada (services/catalog.py): en régimen normal, sin BD ni red (L1)
+        services = await sync_to_async(active_services)()
+        context = await apaginate(services, request.GET.get("page"), self.paginate_by)
+        context["services"] = context["object_list"]
+        # Tarjetas cacheadas por (pk, updated_at): solo se renderizan las que cambiaron.
+        # Se pasa como callable para que corra al renderizar (hilo sync), no en el event loop.
+        context["service_cards"] = partial(
+            render_rows, "services/_service_card.html", context["services"], "s"
+        )
+        return TemplateResponse(request, self.template_name, context)
 
 
-class PublicServiceDetailView(DetailView):
+class PublicServiceDetailView(View):
     """
     Detalle público de un servicio (opcional, útil para SEO/UX).
     """
 
-    model = Service
     template_name = "services/service_detail.html"
-    context_object_name = "service"
+
+    async def get(self, request, pk):
+        try:
+            service = await Service.objects.aget(pk=pk)
+        except Service.DoesNotExist as exc:
+            raise Http404("Servicio no encontrado.") from exc
+        return TemplateResponse(request, self.template_name, {"service": service})
@@ -0,0 +1,31 @@
+# users/profiles.py
+"""
+Perfil del usuario en la cache "tiered" (config/cache.py): la página de perfil no va a la BD
+en cada visita. Las señales de Profile (users/signals.py) lo invalidan tras el commit.
+
+Se cachea solo el Profile, sin su User relacionado (hash de contraseña, email): al leerlo se
+le vuelve a enganchar el usuario de la petición.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Profile
+
+PROFILE_KEY = "profile:{}"
+
+
+def get_profile(user) -> Profile:
+    cache = caches["tiered"]
+    key = PROFILE_KEY.format(user.pk)
+    profile = cache.get(key)
+    if profile is None:
+        profile, _ = Profile.objects.get_or_create(user=user)
+        profile._state.fields_cache.pop("user", None)
+        cache.set(key, profile, settings.PROFILE_CACHE_TIMEOUT)
+    profile.user = user
+    return profile
+
+
+def invalidate_profile(user_id):
+    caches["tiered"].delete(PROFILE_KEY.format(user_id))
@@ -1,8 +1,12 @@
 # users/signals.py
-from django.db.models.signals import post_save
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from .models import Profile, User
+from .profiles import invalidate_profile
 
 
 @receiver(post_save, sender=User)
@@ -12,3 +16,9 @@ def create_or_update_user_profile(sender, instance: User, created: bool, **kwarg
         Profile.objects.create(user=instance)
     else:
         Profile.objects.get_or_create(user=instance)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def profile_changed(sender, instance: Profile, **kwargs):
+    # Tras el commit, para que nadie vuelva a cachear el perfil viejo entre medio
+    transaction.on_commit(partial(invalidate_profile, instance.user_id))
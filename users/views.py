@@ -11,6 +11,7 @@ from django.views.generic import DetailView, UpdateView
 
 from .forms import LoginForm, ProfileUpdateForm, RegisterCredentialsForm, RegisterProfileForm
 from .models import Profile, User
+from .profiles import get_profile
 
 
 class RegisterStep1View(View):
@@ -93,8 +94,7 @@ class ProfileView(LoginRequiredMixin, DetailView):
     context_object_name = "profile"
 
     def get_object(self, queryset=None):
-        profile, _ = Profile.objects.get_or_create(user=self.request.user)
-        return profile
+        return get_profile(self.request.user)
 
 
 class ProfileUpdateView(LoginRequiredMixin, UpdateView):
@@ -0,0 +1,35 @@
+# vehicles/api.py
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, viewsets
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import IsAuthenticated
+
+from config.api import ProjectedQuerysetMixin
+
+from .models import Vehicle
+from .serializers import VehicleSerializer
+
+
+class VehicleViewSet(
+    ProjectedQuerysetMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    """
+    Vehículos del usuario autenticado. El borrado sigue en la web (revisa reservas activas).
+    """
+
+    queryset = Vehicle.objects.all()
+    serializer_class = VehicleSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ["plate", "is_active"]
+    ordering_fields = ["plate"]
+    ordering = ("plate",)
+
+    def get_queryset(self):
+        return super().get_queryset().filter(owner=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
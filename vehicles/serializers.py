@@ -0,0 +1,16 @@
+# vehicles/serializers.py
+from rest_framework import serializers
+
+from config.api import SparseFieldsetsMixin
+
+from .models import Vehicle
+
+
+class VehicleSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Vehicle
+        fields = ["id", "plate", "make", "model", "year", "color", "is_active", "updated_at"]
+        read_only_fields = ["id", "updated_at"]
+
+    def validate_plate(self, value):
+        return value.upper()
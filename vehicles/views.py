@@ -7,6 +7,7 @@ from django.views.generic import CreateView, DeleteView, DetailView, ListView, U
 
 # Importamos Booking y estados para verificar reservas activas
 from bookings.models import Booking, BookingStatus
+from config.fragments import render_rows
 
 from .forms import VehicleForm
 from .models import Vehicle
@@ -29,6 +30,13 @@ class VehicleListView(OwnerQuerysetMixin, ListView):
     context_object_name = "vehicles"
     paginate_by = 10  # opcional
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["vehicle_rows"] = render_rows(
+            "vehicles/_vehicle_row.html", context["vehicles"], "v"
+        )
+        return context
+
 
 class VehicleDetailView(OwnerQuerysetMixin, DetailView):
     model = Vehicle